@@ -0,0 +1,21 @@
+import os
+
+import pytest
+
+# tests.conftest настраивает окружение до импорта приложения.
+from tests.conftest import _app, client  # noqa: F401
+from tests.yandex_disk_mock_server import mock_server  # noqa: F401
+from yacut.dataset import seed_url_map
+
+TABLE_SIZES = [
+    int(size)
+    for size in os.getenv("BENCH_TABLE_SIZES", "1000,100000").split(",")
+]
+
+
+@pytest.fixture(params=TABLE_SIZES, ids=lambda size: f"rows={size}")
+def seeded_shorts(request, _app):  # noqa: F811
+    """Заполняет url_map заданным числом строк и возвращает их short."""
+    shorts = []
+    seed_url_map(request.param, on_batch=shorts.extend)
+    return shorts
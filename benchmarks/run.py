@@ -0,0 +1,190 @@
+"""Нагрузочный прогон YaCut с отчётом о задержках и пропускной способности.
+
+Пример::
+
+    python -m benchmarks.run --sizes 1000,100000 --requests 2000 \
+        --concurrency 16 --target wsgi
+
+Приложение работает на временной базе SQLite, а запросы к API Диска
+уходят в мок-сервер из ``tests/yandex_disk_mock_server.py``.
+"""
+import asyncio
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from aiohttp import web
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from benchmarks.scenarios import (
+    PERCENTILES,
+    READ_SCENARIOS,
+    SCENARIOS,
+    summarize,
+)
+from tests.yandex_disk_mock_server import create_mock_app
+
+REPORT_HEADER = (
+    f"{'rows':>10} {'scenario':<14} {'requests':>8} {'errors':>6} "
+    f"{'req/s':>9} " + " ".join(f"{f'p{p} ms':>8}" for p in PERCENTILES)
+)
+
+
+def start_mock_disk() -> str:
+    """Запускает мок API Диска в отдельном потоке и возвращает его адрес."""
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_mock_app())
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    host, port = runner.addresses[0][:2]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return f"http://{host}:{port}"
+
+
+class TestClientTarget:
+    """Запросы через тестовый клиент Flask, по клиенту на поток."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def __call__(self, request) -> int:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.open(
+            request.path,
+            method=request.method,
+            data=request.body,
+            content_type=request.content_type,
+        ).status_code
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class WSGITarget:
+    """Запросы по HTTP к приложению, запущенному в WSGI-сервере."""
+
+    def __init__(self, app):
+        self.server = make_server(
+            "127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler
+        )
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __call__(self, request) -> int:
+        connection = http.client.HTTPConnection(
+            self.server.host, self.server.port
+        )
+        try:
+            headers = {}
+            if request.content_type:
+                headers["Content-Type"] = request.content_type
+            connection.request(
+                request.method, request.path, request.body, headers
+            )
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        finally:
+            connection.close()
+
+
+def run_scenario(target, scenario, shorts, count, concurrency) -> dict:
+    """Отправляет ``count`` запросов сценария в ``concurrency`` потоков."""
+    requests = [scenario(shorts) for _ in range(count)]
+
+    def send(request):
+        started = time.perf_counter()
+        try:
+            ok = target(request) == request.expected_status
+        except OSError:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(send, requests))
+    elapsed = time.perf_counter() - started
+    return summarize(
+        [latency for latency, _ in results],
+        sum(1 for _, ok in results if not ok),
+        elapsed,
+    )
+
+
+def format_row(size, name, summary) -> str:
+    return (
+        f"{size:>10} {name:<14} {summary['requests']:>8} "
+        f"{summary['errors']:>6} {summary['rps']:>9.1f} "
+        + " ".join(f"{summary[f'p{p}']:>8.2f}" for p in PERCENTILES)
+    )
+
+
+@click.command()
+@click.option(
+    "--sizes", default="1000,100000", show_default=True,
+    help="Размеры таблицы url_map через запятую.",
+)
+@click.option("--requests", "count", default=1000, show_default=True)
+@click.option("--concurrency", default=8, show_default=True)
+@click.option(
+    "--target", type=click.Choice(["wsgi", "test-client"]), default="wsgi",
+    show_default=True,
+)
+@click.option(
+    "--scenario", "names", multiple=True, type=click.Choice(list(SCENARIOS)),
+    help="Сценарий; можно указать несколько. По умолчанию — все.",
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False), default=None,
+    help="Сохранить результаты в JSON.",
+)
+def main(sizes, count, concurrency, target, names, output):
+    """Измеряет p50/p95/p99 и req/s маршрутов YaCut на разных объёмах."""
+    workdir = tempfile.mkdtemp(prefix="yacut-bench-")
+    os.environ["DATABASE_URI"] = f"sqlite:///{workdir}/bench.sqlite3"
+    os.environ["YADISK_API_BASE"] = f"{start_mock_disk()}/v1/disk/resources"
+    os.environ.setdefault("DISK_TOKEN", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    from yacut import app, db
+    from yacut.dataset import seed_url_map
+    from yacut.models import URLMap
+
+    app.config["WTF_CSRF_ENABLED"] = False
+    target = (WSGITarget if target == "wsgi" else TestClientTarget)(app)
+    names = names or list(SCENARIOS)
+    results = []
+    shorts = []
+    click.echo(REPORT_HEADER)
+    with app.app_context():
+        db.create_all()
+    for size in sorted(int(size) for size in sizes.split(",")):
+        with app.app_context():
+            seed_url_map(
+                max(size - URLMap.query.count(), 0), on_batch=shorts.extend
+            )
+        for name in names:
+            if name in READ_SCENARIOS and not shorts:
+                continue
+            summary = run_scenario(
+                target, SCENARIOS[name], shorts, count, concurrency
+            )
+            results.append({"rows": size, "scenario": name, **summary})
+            click.echo(format_row(size, name, summary))
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
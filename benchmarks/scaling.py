@@ -0,0 +1,147 @@
+"""Зависимость основных операций url_map от размера таблицы.
+
+Пример::
+
+    python -m benchmarks.scaling --sizes 100000,1000000,10000000
+
+Для каждого размера таблица дозаполняется ``flask seed-urls``-генератором,
+после чего измеряются задержки поиска по short (попадания и промахи, без
+кэша), доля коллизий случайных short, скорость генерации short и скорость
+вставки одиночным ``URLMap.create`` и пачкой ``URLMap.create_many``.
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+import click
+
+from benchmarks.scenarios import PERCENTILES, random_url, summarize
+
+REPORT_HEADER = (
+    f"{'rows':>10} {'seed rows/s':>11} "
+    + " ".join(f"{f'hit p{p}':>9}" for p in PERCENTILES) + " "
+    + " ".join(f"{f'miss p{p}':>9}" for p in PERCENTILES)
+    + f" {'collisions':>10} {'gen ids/s':>10} {'create/s':>9} "
+    f"{'batch/s':>9}"
+)
+
+
+def timed(action, count: int) -> float:
+    """Выполняет ``action`` ``count`` раз и возвращает операций в секунду."""
+    started = time.perf_counter()
+    for _ in range(count):
+        action()
+    return count / (time.perf_counter() - started)
+
+
+def lookup_latencies(shorts) -> dict:
+    from yacut.models import URLMap
+
+    latencies = []
+    for short in shorts:
+        started = time.perf_counter()
+        URLMap.get(short, use_cache=False)
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies, 0, sum(latencies))
+
+
+def measure(size, shorts, samples) -> dict:
+    """Снимает метрики для текущего наполнения таблицы."""
+    from yacut.constants import SHORT_ALPHABET, SHORT_LENGTH
+    from yacut.models import URLMap
+
+    hits = lookup_latencies(random.sample(shorts, min(samples, len(shorts))))
+    misses = lookup_latencies(
+        [f"miss{index}" for index in range(samples)]
+    )
+    candidates = {
+        "".join(random.choices(SHORT_ALPHABET, k=SHORT_LENGTH))
+        for _ in range(samples * 10)
+    }
+    collisions = len(URLMap.existing_shorts(candidates)) / len(candidates)
+    batch = max(samples // 10, 1)
+    return {
+        "rows": size,
+        "hit": hits,
+        "miss": misses,
+        "collision_rate": collisions,
+        "generated_per_second": timed(
+            lambda: URLMap.generate_shorts(samples), 1
+        ) * samples,
+        "create_per_second": timed(
+            lambda: URLMap.create(original=random_url()), batch
+        ),
+        "create_many_per_second": timed(
+            lambda: URLMap.create_many([(random_url(), None)] * samples), 1
+        ) * samples,
+    }
+
+
+def format_row(result) -> str:
+    return (
+        f"{result['rows']:>10} {result['seed_per_second']:>11.0f} "
+        + " ".join(
+            f"{result['hit'][f'p{p}']:>9.3f}" for p in PERCENTILES
+        ) + " "
+        + " ".join(
+            f"{result['miss'][f'p{p}']:>9.3f}" for p in PERCENTILES
+        )
+        + f" {result['collision_rate']:>10.2e}"
+        f" {result['generated_per_second']:>10.0f}"
+        f" {result['create_per_second']:>9.0f}"
+        f" {result['create_many_per_second']:>9.0f}"
+    )
+
+
+@click.command()
+@click.option(
+    "--sizes", default="10000,100000,1000000", show_default=True,
+    help="Размеры таблицы url_map через запятую.",
+)
+@click.option(
+    "--samples", default=1000, show_default=True,
+    help="Число поисков и генераций на каждом размере.",
+)
+@click.option(
+    "--database", default=None,
+    help="URI базы; по умолчанию — временный файл SQLite.",
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False), default=None,
+    help="Сохранить результаты в JSON.",
+)
+def main(sizes, samples, database, output):
+    """Измеряет поиск, коллизии и вставку в url_map на разных объёмах."""
+    if database is None:
+        workdir = tempfile.mkdtemp(prefix="yacut-scaling-")
+        database = f"sqlite:///{workdir}/scaling.sqlite3"
+    os.environ["DATABASE_URI"] = database
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    from yacut import app, db
+    from yacut.dataset import seed_url_map
+    from yacut.models import URLMap
+
+    results = []
+    shorts = []
+    click.echo(REPORT_HEADER)
+    with app.test_request_context():
+        db.create_all()
+        for size in sorted(int(size) for size in sizes.split(",")):
+            missing = max(size - URLMap.query.count(), 0)
+            started = time.perf_counter()
+            seed_url_map(missing, on_batch=shorts.extend)
+            elapsed = time.perf_counter() - started
+            result = measure(size, shorts, samples)
+            result["seed_per_second"] = missing / elapsed if missing else 0
+            results.append(result)
+            click.echo(format_row(result))
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Сценарии нагрузки и подсчёт задержек.
+
+Модуль не импортирует приложение: драйвер ``benchmarks.run`` настраивает
+окружение до его загрузки.
+"""
+import json
+import os
+import random
+import statistics
+import uuid
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Optional
+from urllib.parse import urlencode
+
+UPLOAD_FILE_SIZE = 4 * 2 ** 10
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Request:
+    """Один запрос сценария и ожидаемый статус ответа."""
+
+    method: str
+    path: str
+    body: Optional[bytes] = None
+    content_type: Optional[str] = None
+    expected_status: int = HTTPStatus.OK
+
+
+def random_url() -> str:
+    return f"https://example.com/{uuid.uuid4().hex}"
+
+
+def multipart(field: str, filename: str, content: bytes):
+    """Кодирует один файл в тело multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; '
+        f'filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def redirect(shorts) -> Request:
+    return Request(
+        "GET", f"/{random.choice(shorts)}", expected_status=HTTPStatus.FOUND
+    )
+
+
+def api_get_url(shorts) -> Request:
+    return Request("GET", f"/api/id/{random.choice(shorts)}/")
+
+
+def api_create_id(shorts) -> Request:
+    return Request(
+        "POST",
+        "/api/id/",
+        json.dumps({"url": random_url()}).encode(),
+        "application/json",
+        HTTPStatus.CREATED,
+    )
+
+
+def index_form(shorts) -> Request:
+    return Request(
+        "POST",
+        "/",
+        urlencode({"original_link": random_url()}).encode(),
+        "application/x-www-form-urlencoded",
+    )
+
+
+def files_upload(shorts) -> Request:
+    # Случайное содержимое, чтобы дедупликация не отменяла загрузку.
+    body, content_type = multipart(
+        "files", f"{uuid.uuid4().hex}.bin", os.urandom(UPLOAD_FILE_SIZE)
+    )
+    return Request("POST", "/files", body, content_type)
+
+
+SCENARIOS = {
+    "redirect": redirect,
+    "api_get_url": api_get_url,
+    "api_create_id": api_create_id,
+    "index": index_form,
+    "files": files_upload,
+}
+# Сценарии, которым нужны уже существующие short.
+READ_SCENARIOS = {"redirect", "api_get_url"}
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    """Сводка прогона: число запросов, ошибки, req/s и перцентили в мс."""
+    latencies = sorted(latencies)
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    else:
+        cuts = latencies * 99 or [0.0] * 99
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = cuts[percentile - 1] * 1000
+    return summary
@@ -0,0 +1,165 @@
+"""Пропускная способность SQLite при одновременных чтении и записи.
+
+Пример::
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --writers 2
+
+Для каждого профиля создаётся своя временная база (режим журнала хранится
+в файле): ``default`` — движок без настроек с журналом отката, ``tuned`` —
+профиль из ``SQLITE_*``-настроек (WAL, ``synchronous=NORMAL``, mmap, кэш,
+``busy_timeout``). Потоки-читатели ищут ссылки по short, потоки-писатели
+вставляют новые, и по каждому профилю выводятся операции в секунду,
+задержки чтения и число ошибок ``database is locked``.
+"""
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+
+import click
+
+from benchmarks.scenarios import PERCENTILES, random_url, summarize
+
+REPORT_HEADER = (
+    f"{'profile':>8} {'reads/s':>9} {'writes/s':>9} "
+    + " ".join(f"{f'read p{p}':>9}" for p in PERCENTILES)
+    + f" {'errors':>7}"
+)
+
+
+def make_engine(workdir, profile, rows):
+    """Создаёт и заполняет базу профиля ``profile``."""
+    from sqlalchemy import create_engine, insert
+
+    from yacut import app, db
+    from yacut.models import URLMap
+    from yacut.sqlite_profile import (
+        init_sqlite_profile,
+        sqlite_engine_options,
+        sqlite_pragmas,
+    )
+
+    uri = f"sqlite:///{workdir}/{profile}.sqlite3"
+    if profile == "tuned":
+        engine = create_engine(uri, **sqlite_engine_options(app.config))
+        init_sqlite_profile(engine, sqlite_pragmas(app.config, uri))
+    else:
+        engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(URLMap.__table__), [
+            {"original": random_url(), "short": f"s{index}"}
+            for index in range(rows)
+        ])
+    return engine
+
+
+def repeat(action, stop, results):
+    """Повторяет ``action`` до ``stop``, собирая задержки и ошибки."""
+    from sqlalchemy.exc import OperationalError
+
+    latencies = []
+    errors = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            action()
+        except OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.append((latencies, errors))
+
+
+def run_profile(engine, rows, readers, writers, duration) -> dict:
+    from sqlalchemy import insert
+
+    from yacut.models import SHORT_LOOKUP, URLMap
+
+    def read():
+        with engine.connect() as connection:
+            connection.execute(
+                SHORT_LOOKUP, {"short": f"s{random.randrange(rows)}"}
+            ).first()
+
+    def write():
+        with engine.begin() as connection:
+            connection.execute(insert(URLMap.__table__).values(
+                original=random_url(), short=uuid.uuid4().hex[:16]
+            ))
+
+    stop = threading.Event()
+    reads, writes = [], []
+    threads = [
+        threading.Thread(target=repeat, args=(read, stop, reads))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=repeat, args=(write, stop, writes))
+        for _ in range(writers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    read_latencies = [value for latencies, _ in reads for value in latencies]
+    return {
+        "reads_per_second": len(read_latencies) / elapsed,
+        "writes_per_second": sum(
+            len(latencies) for latencies, _ in writes
+        ) / elapsed,
+        "read": summarize(read_latencies, 0, elapsed),
+        "errors": sum(errors for _, errors in reads + writes),
+    }
+
+
+def format_row(profile, result) -> str:
+    return (
+        f"{profile:>8} {result['reads_per_second']:>9.0f}"
+        f" {result['writes_per_second']:>9.0f} "
+        + " ".join(
+            f"{result['read'][f'p{p}']:>9.3f}" for p in PERCENTILES
+        )
+        + f" {result['errors']:>7}"
+    )
+
+
+@click.command()
+@click.option("--rows", default=100000, show_default=True,
+              help="Число строк url_map перед замером.")
+@click.option("--readers", default=8, show_default=True,
+              help="Число потоков-читателей.")
+@click.option("--writers", default=2, show_default=True,
+              help="Число потоков-писателей.")
+@click.option("--duration", default=5.0, show_default=True,
+              help="Длительность замера каждого профиля, секунд.")
+@click.option("--output", type=click.Path(dir_okay=False), default=None,
+              help="Сохранить результаты в JSON.")
+def main(rows, readers, writers, duration, output):
+    """Сравнивает SQLite без настроек и с профилем производительности."""
+    workdir = tempfile.mkdtemp(prefix="yacut-sqlite-")
+    os.environ["DATABASE_URI"] = f"sqlite:///{workdir}/app.sqlite3"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    results = {}
+    click.echo(REPORT_HEADER)
+    for profile in ("default", "tuned"):
+        engine = make_engine(workdir, profile, rows)
+        results[profile] = run_profile(
+            engine, rows, readers, writers, duration
+        )
+        engine.dispose()
+        click.echo(format_row(profile, results[profile]))
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Поиск ссылки по short: ORM-сущность против лёгкого Core-запроса.
+
+Запуск: ``pytest benchmarks/test_lookup.py``; кэш коротких ссылок не
+используется, каждый поиск идёт в базу.
+"""
+import random
+
+import pytest
+
+from yacut import db
+from yacut.models import URLMap
+
+pytest.importorskip("pytest_benchmark")
+
+
+def orm_lookup(short):
+    mapping = URLMap.query.filter_by(short=short).first()
+    db.session.expunge_all()
+    return mapping
+
+
+LOOKUPS = {"orm": orm_lookup, "lean": URLMap.lookup}
+
+
+@pytest.mark.parametrize("name", LOOKUPS)
+def test_lookup(benchmark, seeded_shorts, name):
+    lookup = LOOKUPS[name]
+    assert benchmark(lambda: lookup(random.choice(seeded_shorts)))
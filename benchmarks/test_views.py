@@ -0,0 +1,42 @@
+"""Бенчмарки основных маршрутов через тестовый клиент Flask.
+
+Запуск: ``pytest benchmarks``; размеры таблицы задаются переменной
+окружения ``BENCH_TABLE_SIZES``.
+"""
+import asyncio
+
+import pytest
+
+from benchmarks.scenarios import SCENARIOS
+from tests.yandex_disk_mock_server import intercept_requests
+
+pytest.importorskip("pytest_benchmark")
+
+
+def send(client, request):
+    response = client.open(
+        request.path,
+        method=request.method,
+        data=request.body,
+        content_type=request.content_type,
+    )
+    assert response.status_code == request.expected_status
+    return response
+
+
+@pytest.mark.parametrize(
+    "name", ["redirect", "api_get_url", "api_create_id", "index"]
+)
+def test_route(benchmark, client, seeded_shorts, name):
+    scenario = SCENARIOS[name]
+    benchmark(lambda: send(client, scenario(seeded_shorts)))
+
+
+async def test_files_upload(benchmark, client, seeded_shorts, mock_server,
+                            monkeypatch):
+    server, _ = await mock_server
+    await intercept_requests(server, monkeypatch)
+    scenario = SCENARIOS["files"]
+    await asyncio.get_running_loop().run_in_executor(
+        None, lambda: benchmark(lambda: send(client, scenario(seeded_shorts)))
+    )
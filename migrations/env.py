@@ -94,6 +94,19 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+
+        # Индексы с ddl_if(dialect=...) есть только в своей СУБД, и для
+        # остальных autogenerate не должен предлагать их создать.
+        def include_object(obj, name, type_, reflected, compare_to):
+            ddl_if = getattr(obj, "_ddl_if", None)
+            if ddl_if is None or ddl_if.dialect is None:
+                return True
+            dialects = ddl_if.dialect
+            if isinstance(dialects, str):
+                dialects = (dialects,)
+            return connection.dialect.name in dialects
+
+        conf_args.setdefault("include_object", include_object)
         context.configure(
             connection=connection, target_metadata=get_metadata(), **conf_args
         )
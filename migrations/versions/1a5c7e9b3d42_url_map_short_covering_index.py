@@ -0,0 +1,34 @@
+"""url map short covering index
+
+Revision ID: 1a5c7e9b3d42
+Revises: 6d2f8a4c1e93
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "1a5c7e9b3d42"
+down_revision = "6d2f8a4c1e93"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_url_map_short_covering"
+
+
+def upgrade():
+    # INCLUDE есть только в PostgreSQL 11+. Планировщик SQLite для
+    # равенства по short всегда выбирает уникальный индекс, так что
+    # покрывающий индекс там лишь замедлял бы вставки.
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index(
+            INDEX_NAME, "url_map", ["short"],
+            postgresql_include=["original", "remote_path"],
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index(INDEX_NAME, table_name="url_map")
@@ -0,0 +1,29 @@
+"""short id pool
+
+Revision ID: 2d7b5e0c8f61
+Revises: 9c1f2e7a4b3d
+Create Date: 2026-10-17 13:05:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "2d7b5e0c8f61"
+down_revision = "9c1f2e7a4b3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "short_id_pool",
+        sa.Column("short", sa.String(length=16), nullable=False),
+        sa.PrimaryKeyConstraint("short"),
+    )
+
+
+def downgrade():
+    op.drop_table("short_id_pool")
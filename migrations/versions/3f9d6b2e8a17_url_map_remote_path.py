@@ -0,0 +1,29 @@
+"""url map remote path
+
+Revision ID: 3f9d6b2e8a17
+Revises: 7e4b2a9c1d55
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f9d6b2e8a17"
+down_revision = "7e4b2a9c1d55"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("url_map", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("remote_path", sa.String(length=2048), nullable=True)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("url_map", schema=None) as batch_op:
+        batch_op.drop_column("remote_path")
@@ -0,0 +1,62 @@
+"""link stat
+
+Revision ID: 4c7a9e2d1b68
+Revises: 8b1e4f6a2c30
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "4c7a9e2d1b68"
+down_revision = "8b1e4f6a2c30"
+branch_labels = None
+depends_on = None
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def upgrade():
+    link_stat = op.create_table(
+        "link_stat",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("short", sa.String(length=16), nullable=False),
+        sa.Column("period", sa.String(length=8), nullable=False),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("short", "period", "bucket"),
+    )
+    # Сводки по уже записанным переходам.
+    link_visit = sa.table(
+        "link_visit",
+        sa.column("short", sa.String),
+        sa.column("minute", sa.DateTime),
+        sa.column("count", sa.Integer),
+    )
+    totals = {}
+    for short, minute, count in op.get_bind().execute(
+        sa.select(link_visit.c.short, link_visit.c.minute, link_visit.c.count)
+    ):
+        hour = minute.replace(minute=0, second=0, microsecond=0)
+        for key in (
+            (short, "hour", hour),
+            (short, "day", hour.replace(hour=0)),
+            (short, "total", EPOCH),
+        ):
+            totals[key] = totals.get(key, 0) + count
+    if totals:
+        op.bulk_insert(link_stat, [
+            {"short": short, "period": period, "bucket": bucket,
+             "count": count}
+            for (short, period, bucket), count in totals.items()
+        ])
+
+
+def downgrade():
+    op.drop_table("link_stat")
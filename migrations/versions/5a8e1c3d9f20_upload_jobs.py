@@ -0,0 +1,44 @@
+"""upload jobs
+
+Revision ID: 5a8e1c3d9f20
+Revises: 2d7b5e0c8f61
+Create Date: 2026-10-17 14:10:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5a8e1c3d9f20"
+down_revision = "2d7b5e0c8f61"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "upload_job",
+        sa.Column("id", sa.String(length=32), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "upload_job_file",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("job_id", sa.String(length=32), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("error", sa.String(length=1024), nullable=True),
+        sa.Column("short", sa.String(length=16), nullable=True),
+        sa.ForeignKeyConstraint(["job_id"], ["upload_job.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("upload_job_file")
+    op.drop_table("upload_job")
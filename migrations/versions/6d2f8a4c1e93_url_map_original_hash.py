@@ -0,0 +1,70 @@
+"""url map original hash
+
+Revision ID: 6d2f8a4c1e93
+Revises: 4c7a9e2d1b68
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "6d2f8a4c1e93"
+down_revision = "4c7a9e2d1b68"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade():
+    with op.batch_alter_table("url_map", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("original_hash", sa.String(length=64), nullable=True)
+        )
+        batch_op.create_index(
+            batch_op.f("ix_url_map_original_hash"), ["original_hash"],
+            unique=False,
+        )
+    # Хэши существующих строк пачками по первичному ключу, чтобы не
+    # держать всю таблицу в памяти и не блокировать её одним UPDATE.
+    url_map = sa.table(
+        "url_map",
+        sa.column("id", sa.Integer),
+        sa.column("original", sa.String),
+        sa.column("original_hash", sa.String),
+    )
+    bind = op.get_bind()
+    update = (
+        url_map.update()
+        .where(url_map.c.id == sa.bindparam("row_id"))
+        .values(original_hash=sa.bindparam("hash"))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(url_map.c.id, url_map.c.original)
+            .where(url_map.c.id > last_id)
+            .order_by(url_map.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {
+                "row_id": row_id,
+                "hash": hashlib.sha256(original.encode()).hexdigest(),
+            }
+            for row_id, original in rows
+        ])
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    with op.batch_alter_table("url_map", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_url_map_original_hash"))
+        batch_op.drop_column("original_hash")
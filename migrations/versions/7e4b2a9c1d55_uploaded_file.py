@@ -0,0 +1,34 @@
+"""uploaded file
+
+Revision ID: 7e4b2a9c1d55
+Revises: 5a8e1c3d9f20
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7e4b2a9c1d55"
+down_revision = "5a8e1c3d9f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "uploaded_file",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("remote_path", sa.String(length=2048), nullable=False),
+        sa.Column("short", sa.String(length=16), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("digest"),
+    )
+
+
+def downgrade():
+    op.drop_table("uploaded_file")
@@ -0,0 +1,34 @@
+"""link visit
+
+Revision ID: 8b1e4f6a2c30
+Revises: 3f9d6b2e8a17
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8b1e4f6a2c30"
+down_revision = "3f9d6b2e8a17"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "link_visit",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("short", sa.String(length=16), nullable=False),
+        sa.Column("minute", sa.DateTime(), nullable=False),
+        sa.Column("referrer", sa.String(length=255), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("short", "minute", "referrer"),
+    )
+
+
+def downgrade():
+    op.drop_table("link_visit")
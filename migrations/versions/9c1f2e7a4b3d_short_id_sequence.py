@@ -0,0 +1,30 @@
+"""short id sequence
+
+Revision ID: 9c1f2e7a4b3d
+Revises: 484d73f7a77d
+Create Date: 2026-10-17 12:40:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c1f2e7a4b3d"
+down_revision = "484d73f7a77d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "short_id_sequence",
+        sa.Column("name", sa.String(length=32), nullable=False),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade():
+    op.drop_table("short_id_sequence")
@@ -1,8 +1,103 @@
 import os
+import tempfile
 
 
 class Config(object):
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URI", "sqlite:///db.sqlite3")
+    ASYNC_DATABASE_URI = os.getenv("ASYNC_DATABASE_URI")
+    DATABASE_REPLICA_URIS = os.getenv("DATABASE_REPLICA_URIS", "")
+    REPLICA_RETRY_INTERVAL = float(os.getenv("REPLICA_RETRY_INTERVAL", 30))
+    DATABASE_SHARD_URIS = os.getenv("DATABASE_SHARD_URIS", "")
+    SHARD_PREVIOUS_COUNT = int(os.getenv("SHARD_PREVIOUS_COUNT", 0))
+    SHARD_REBALANCE_BATCH = int(os.getenv("SHARD_REBALANCE_BATCH", 1000))
+    SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() == "true"
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 2 ** 20))
+    SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -64 * 2 ** 10))
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000))
     SECRET_KEY = os.getenv("SECRET_KEY")
     DISK_TOKEN = os.getenv("DISK_TOKEN")
-    YADISK_API_BASE = "https://cloud-api.yandex.net/v1/disk/resources"
+    YADISK_API_BASE = os.getenv(
+        "YADISK_API_BASE", "https://cloud-api.yandex.net/v1/disk/resources"
+    )
+    SHORT_ID_STRATEGY = os.getenv("SHORT_ID_STRATEGY", "random")
+    SHORT_ID_SECRET = os.getenv("SHORT_ID_SECRET") or os.getenv("SECRET_KEY")
+    SHORT_ID_BLOCK_SIZE = int(os.getenv("SHORT_ID_BLOCK_SIZE", 1000))
+    SHORT_ID_POOL_SIZE = int(os.getenv("SHORT_ID_POOL_SIZE", 100000))
+    SHORT_ID_POOL_REFILL_BATCH = int(
+        os.getenv("SHORT_ID_POOL_REFILL_BATCH", 5000)
+    )
+    SHORT_ID_POOL_CLAIM_SIZE = int(os.getenv("SHORT_ID_POOL_CLAIM_SIZE", 100))
+    SHORT_ID_POOL_REFILL_INTERVAL = float(
+        os.getenv("SHORT_ID_POOL_REFILL_INTERVAL", 30)
+    )
+    SHORT_ID_POOL_BACKGROUND_REFILL = (
+        os.getenv("SHORT_ID_POOL_BACKGROUND_REFILL", "true").lower() == "true"
+    )
+    URL_REUSE_EXISTING = (
+        os.getenv("URL_REUSE_EXISTING", "false").lower() == "true"
+    )
+    API_BATCH_MAX_SIZE = int(os.getenv("API_BATCH_MAX_SIZE", 50000))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 64 * 2 ** 10))
+    UPLOAD_SPOOL_MAX_SIZE = int(
+        os.getenv("UPLOAD_SPOOL_MAX_SIZE", 512 * 2 ** 10)
+    )
+    UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", 8))
+    UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", 300))
+    UPLOAD_CONNECT_TIMEOUT = float(os.getenv("UPLOAD_CONNECT_TIMEOUT", 10))
+    UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", 5))
+    UPLOAD_BACKOFF_BASE = float(os.getenv("UPLOAD_BACKOFF_BASE", 0.5))
+    UPLOAD_BACKOFF_MAX = float(os.getenv("UPLOAD_BACKOFF_MAX", 30))
+    UPLOAD_POOL_LIMIT = int(os.getenv("UPLOAD_POOL_LIMIT", 100))
+    UPLOAD_POOL_LIMIT_PER_HOST = int(
+        os.getenv("UPLOAD_POOL_LIMIT_PER_HOST", 20)
+    )
+    UPLOAD_DNS_CACHE_TTL = int(os.getenv("UPLOAD_DNS_CACHE_TTL", 300))
+    UPLOAD_KEEPALIVE_TIMEOUT = float(
+        os.getenv("UPLOAD_KEEPALIVE_TIMEOUT", 60)
+    )
+    UPLOAD_BACKGROUND_JOBS = (
+        os.getenv("UPLOAD_BACKGROUND_JOBS", "false").lower() == "true"
+    )
+    UPLOAD_DEDUPLICATE = (
+        os.getenv("UPLOAD_DEDUPLICATE", "true").lower() == "true"
+    )
+    DISK_HREF_TTL = float(os.getenv("DISK_HREF_TTL", 3600))
+    DISK_HREF_REFRESH_AHEAD = float(os.getenv("DISK_HREF_REFRESH_AHEAD", 600))
+    DISK_HREF_CACHE_SIZE = int(os.getenv("DISK_HREF_CACHE_SIZE", 10000))
+    DISK_HREF_FETCH_TIMEOUT = float(os.getenv("DISK_HREF_FETCH_TIMEOUT", 10))
+    ANALYTICS_ENABLED = (
+        os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+    )
+    ANALYTICS_MAX_KEYS = int(os.getenv("ANALYTICS_MAX_KEYS", 100000))
+    ANALYTICS_FLUSH_INTERVAL = float(
+        os.getenv("ANALYTICS_FLUSH_INTERVAL", 5)
+    )
+    ANALYTICS_BACKGROUND_FLUSH = (
+        os.getenv("ANALYTICS_BACKGROUND_FLUSH", "true").lower() == "true"
+    )
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() == "true"
+    SQL_SLOW_QUERY_THRESHOLD = float(
+        os.getenv("SQL_SLOW_QUERY_THRESHOLD", 0.1)
+    )
+    SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", 20))
+    SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", 5))
+    URL_CACHE_BACKEND = os.getenv("URL_CACHE_BACKEND", "local")
+    URL_CACHE_MAXSIZE = int(os.getenv("URL_CACHE_MAXSIZE", 10000))
+    URL_CACHE_MAX_BYTES = int(os.getenv("URL_CACHE_MAX_BYTES", 16 * 2 ** 20))
+    URL_CACHE_TTL = float(os.getenv("URL_CACHE_TTL", 300))
+    URL_CACHE_NEGATIVE_TTL = float(os.getenv("URL_CACHE_NEGATIVE_TTL", 30))
+    URL_CACHE_SOCKET = os.getenv("URL_CACHE_SOCKET", "127.0.0.1:7379")
+    URL_CACHE_SOCKET_TIMEOUT = float(
+        os.getenv("URL_CACHE_SOCKET_TIMEOUT", 0.05)
+    )
+    URL_CACHE_MMAP_PATH = os.getenv(
+        "URL_CACHE_MMAP_PATH",
+        os.path.join(tempfile.gettempdir(), "yacut-url-cache.bin"),
+    )
+    URL_CACHE_MMAP_SLOTS = int(os.getenv("URL_CACHE_MMAP_SLOTS", 16384))
+    URL_CACHE_MMAP_VALUE_SIZE = int(
+        os.getenv("URL_CACHE_MMAP_VALUE_SIZE", 0)
+    )
@@ -17,6 +17,7 @@ _user_environment = os.environ.copy()
 _tmp_db_uri = "sqlite:///:memory:"
 os.environ["DATABASE_URI"] = _tmp_db_uri
 os.environ["DISK_TOKEN"] = "y0_nbfoiu3445tno35_fd09v854bn2_cs0e8hrb4k"
+os.environ["ANALYTICS_BACKGROUND_FLUSH"] = "false"
 
 PY_URL = "https://www.python.org"
 TEST_BASE_URL = "http://localhost"
@@ -25,7 +26,8 @@ pytest_plugins = ["tests.yandex_disk_mock_server"]
 
 try:
     from yacut import app, db
-    from yacut.models import URLMap  # noqa
+    from yacut.async_upload import upload_loop
+    from yacut.models import URLMap, visit_recorder  # noqa
 except NameError as exc:
     raise AssertionError(
         "При попытке импорта объекта приложения вознакло исключение: "
@@ -68,8 +70,10 @@ def _app():
     with app.app_context():
         db.create_all()
         yield app
+        visit_recorder.flush_now()
         db.drop_all()
         db.session.close()
+    upload_loop.close_session()
 
 
 @pytest.fixture
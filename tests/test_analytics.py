@@ -0,0 +1,114 @@
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+from yacut.analytics import VisitRecorder, referrer_host
+from yacut.models import (
+    STATS_DAY,
+    STATS_HOUR,
+    LinkStat,
+    LinkVisit,
+    visit_recorder,
+)
+
+MINUTE = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_visits_aggregated_per_minute_and_referrer():
+    flushed = []
+    recorder = VisitRecorder(flushed.append, background=False)
+    recorder.record("py", "https://habr.com/post/1", MINUTE)
+    recorder.record("py", "https://habr.com/post/2", MINUTE.replace(second=30))
+    recorder.record("py", None, MINUTE)
+    assert recorder.flush_now() == 3
+    assert flushed == [{("py", MINUTE, "habr.com"): 2, ("py", MINUTE, ""): 1}]
+    assert recorder.flush_now() == 0
+
+
+def test_buffer_is_bounded():
+    recorder = VisitRecorder(lambda counts: None, max_keys=1,
+                             background=False)
+    recorder.record("a", when=MINUTE)
+    recorder.record("a", when=MINUTE)
+    recorder.record("b", when=MINUTE)
+    assert recorder.stats() == {
+        "buffered": 2, "keys": 1, "flushed": 0, "dropped": 1
+    }, "Переходы сверх размера буфера должны отбрасываться и учитываться."
+
+
+def test_failed_flush_counted_as_dropped():
+    def broken_flush(counts):
+        raise RuntimeError("fail")
+
+    recorder = VisitRecorder(broken_flush, background=False)
+    recorder.record("a", when=MINUTE)
+    assert recorder.flush_now() == 0
+    assert recorder.stats()["dropped"] == 1
+
+
+def test_referrer_host():
+    assert referrer_host("https://Example.com:8080/path?q=1") == (
+        "example.com:8080"
+    )
+    assert referrer_host(None) == ""
+
+
+def test_counts_accumulate_in_table(_app):
+    LinkVisit.add({("py", MINUTE, ""): 2})
+    LinkVisit.add({("py", MINUTE, ""): 3, ("py", MINUTE, "habr.com"): 1})
+    assert sorted(
+        (visit.referrer, visit.count) for visit in LinkVisit.query.all()
+    ) == [("", 5), ("habr.com", 1)]
+
+
+def test_redirect_visits_api(client, short_python_url):
+    client.get("/py", headers={"Referer": "https://habr.com/post"})
+    client.get("/py")
+    assert LinkVisit.query.count() == 0, (
+        "Переход по ссылке не должен писать в базу синхронно."
+    )
+    visit_recorder.flush_now()
+    response = client.get("/api/id/py/visits/")
+    assert response.status_code == HTTPStatus.OK
+    data = response.json
+    assert data["total"] == 2
+    assert data["referrers"] == {"habr.com": 1, "": 1}
+    assert sum(item["count"] for item in data["minutes"]) == 2
+
+
+def test_visits_api_errors(client, short_python_url):
+    assert client.get("/api/id/nope/visits/").status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert client.get("/api/id/py/visits/?minutes=0").status_code == (
+        HTTPStatus.BAD_REQUEST
+    )
+
+
+def test_rollups_updated_with_visits(_app):
+    LinkVisit.add({
+        ("py", MINUTE, ""): 2,
+        ("py", MINUTE.replace(minute=30), "habr.com"): 1,
+        ("py", MINUTE.replace(hour=13), ""): 4,
+    })
+    assert LinkStat.total("py") == 7
+    assert [item["count"] for item in LinkStat.series(
+        "py", STATS_HOUR, MINUTE
+    )] == [3, 4], "Сводки по часам должны пополняться вместе с переходами."
+    assert [item["count"] for item in LinkStat.series(
+        "py", STATS_DAY, MINUTE.replace(hour=0)
+    )] == [7]
+
+
+def test_stats_api_reads_rollups(client, short_python_url):
+    for _ in range(3):
+        client.get("/py")
+    visit_recorder.flush_now()
+    response = client.get("/api/id/py/stats/")
+    assert response.status_code == HTTPStatus.OK
+    data = response.json
+    assert data["total"] == 3
+    assert [item["count"] for item in data["hours"]] == [3]
+    assert [item["count"] for item in data["days"]] == [3]
+    assert client.get("/api/id/py/stats/?days=1000").status_code == (
+        HTTPStatus.BAD_REQUEST
+    )
@@ -0,0 +1,215 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from yacut import db
+from yacut.asgi import async_database_uri, create_asgi_app
+from yacut.async_upload import upload_loop
+from yacut.models import URLMap, url_cache
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def asgi_app(_app, tmp_path):
+    url_cache.clear()
+    application = create_asgi_app(
+        _app, database_uri=f"sqlite:///{tmp_path}/asgi.sqlite3"
+    )
+    yield application
+    url_cache.clear()
+
+
+async def call(application, method, path, body=b"", headers=()):
+    """Выполняет один HTTP-запрос к ASGI-приложению."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")] + [
+            (name.encode(), value.encode()) for name, value in headers
+        ],
+        "server": ("localhost", 80),
+    }
+    messages = [{"type": "http.request", "body": body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    headers = {
+        name.decode(): value.decode() for name, value in sent[0]["headers"]
+    }
+    return sent[0]["status"], headers, b"".join(
+        message.get("body", b"") for message in sent[1:]
+    )
+
+
+async def create_tables(application):
+    async with application.engine.begin() as connection:
+        await connection.run_sync(db.metadata.create_all)
+
+
+def test_async_database_uri():
+    assert async_database_uri("sqlite:///db.sqlite3") == (
+        "sqlite+aiosqlite:///db.sqlite3"
+    )
+    assert async_database_uri("postgresql://u:p@db/yacut") == (
+        "postgresql+asyncpg://u:p@db/yacut"
+    )
+    assert async_database_uri("sqlite+aiosqlite:///x") == (
+        "sqlite+aiosqlite:///x"
+    )
+    with pytest.raises(ValueError):
+        async_database_uri("oracle://db/yacut")
+
+
+async def test_asgi_create_get_and_redirect(asgi_app):
+    await create_tables(asgi_app)
+    status, _, body = await call(
+        asgi_app, "POST", "/api/id/",
+        json.dumps({"url": "https://www.python.org", "custom_id": "py"})
+        .encode(),
+        [("content-type", "application/json")],
+    )
+    assert status == HTTPStatus.CREATED
+    assert json.loads(body) == {
+        "url": "https://www.python.org",
+        "short_link": "http://localhost/py",
+    }
+    url_cache.clear()
+
+    status, _, body = await call(asgi_app, "GET", "/api/id/py/")
+    assert status == HTTPStatus.OK
+    assert json.loads(body) == {"url": "https://www.python.org"}
+
+    status, headers, _ = await call(asgi_app, "GET", "/py")
+    assert status == HTTPStatus.FOUND
+    assert headers["location"] == "https://www.python.org"
+    await asgi_app.engine.dispose()
+
+
+async def test_asgi_create_errors(asgi_app):
+    await create_tables(asgi_app)
+    status, _, body = await call(asgi_app, "POST", "/api/id/")
+    assert status == HTTPStatus.BAD_REQUEST
+    assert json.loads(body) == {"message": "Отсутствует тело запроса"}
+
+    request = (
+        json.dumps({"url": "https://www.python.org", "custom_id": "py"})
+        .encode(),
+        [("content-type", "application/json")],
+    )
+    await call(asgi_app, "POST", "/api/id/", *request)
+    status, _, body = await call(asgi_app, "POST", "/api/id/", *request)
+    assert status == HTTPStatus.BAD_REQUEST
+    assert json.loads(body) == {
+        "message": "Предложенный вариант короткой ссылки уже существует."
+    }
+
+    status, _, body = await call(asgi_app, "GET", "/api/id/missing/")
+    assert status == HTTPStatus.NOT_FOUND
+    assert json.loads(body) == {"message": "Указанный id не найден"}
+    await asgi_app.engine.dispose()
+
+
+async def test_asgi_reads_from_replica(_app, tmp_path, monkeypatch):
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.sqlite3")
+    db.metadata.create_all(replica)
+    with replica.begin() as connection:
+        connection.execute(insert(URLMap.__table__), [
+            {"short": "py", "original": "https://replica.example"}
+        ])
+    replica.dispose()
+    monkeypatch.setitem(
+        _app.config, "DATABASE_REPLICA_URIS",
+        f"sqlite:///{tmp_path}/replica.sqlite3",
+    )
+    url_cache.clear()
+    application = create_asgi_app(
+        _app, database_uri=f"sqlite:///{tmp_path}/asgi.sqlite3"
+    )
+    await create_tables(application)
+    await call(
+        application, "POST", "/api/id/",
+        json.dumps({"url": "https://www.python.org", "custom_id": "fresh"})
+        .encode(),
+        [("content-type", "application/json")],
+    )
+    url_cache.clear()
+
+    status, _, body = await call(application, "GET", "/api/id/py/")
+    assert status == HTTPStatus.OK
+    assert json.loads(body) == {"url": "https://replica.example"}, (
+        "Под ASGI ссылки должны читаться с реплик."
+    )
+    status, _, body = await call(application, "GET", "/api/id/fresh/")
+    assert json.loads(body) == {"url": "https://www.python.org"}, (
+        "Ссылка, ещё не попавшая на реплики, должна находиться на основной "
+        "базе."
+    )
+    url_cache.clear()
+    await application.engine.dispose()
+    for engine in application.replicas.engines:
+        await engine.dispose()
+
+
+async def test_asgi_falls_back_to_flask(asgi_app):
+    await create_tables(asgi_app)
+    status, headers, body = await call(asgi_app, "GET", "/missing")
+    assert status == HTTPStatus.NOT_FOUND, (
+        "Неизвестный short должен отдавать страницу 404 Flask-приложения."
+    )
+    assert headers["content-type"].startswith("text/html")
+
+    status, _, body = await call(asgi_app, "GET", "/")
+    assert status == HTTPStatus.OK
+    assert "form" in body.decode()
+    await asgi_app.engine.dispose()
+
+
+async def test_asgi_lifespan_attaches_upload_loop(asgi_app):
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent = []
+    loop_during_startup = []
+
+    async def receive():
+        if sent:
+            loop_during_startup.append(upload_loop._start())
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message["type"])
+
+    await asgi_app({"type": "lifespan"}, receive, send)
+    assert sent == [
+        "lifespan.startup.complete", "lifespan.shutdown.complete"
+    ]
+    assert loop_during_startup == [asyncio.get_running_loop()], (
+        "Под ASGI-сервером загрузки должны выполняться в его цикле событий."
+    )
+    assert upload_loop._loop is None
+
+
+async def test_asgi_create_reuses_existing_original(asgi_app, monkeypatch):
+    await create_tables(asgi_app)
+    monkeypatch.setitem(asgi_app.flask_app.config, "URL_REUSE_EXISTING", True)
+    request = (
+        json.dumps({"url": "https://www.python.org"}).encode(),
+        [("content-type", "application/json")],
+    )
+    _, _, first = await call(asgi_app, "POST", "/api/id/", *request)
+    _, _, second = await call(asgi_app, "POST", "/api/id/", *request)
+    assert json.loads(first) == json.loads(second)
+    await asgi_app.engine.dispose()
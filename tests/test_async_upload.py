@@ -0,0 +1,169 @@
+import asyncio
+from http import HTTPStatus
+from io import BytesIO
+
+import aiohttp
+from aiohttp import web
+from flask import request
+from werkzeug.datastructures import FileStorage
+
+from settings import Config
+from yacut.async_upload import (
+    UploadLoop,
+    UploadResult,
+    parse_retry_after,
+    read_chunks,
+    request_with_retries,
+    stream_size,
+    upload_files,
+)
+
+
+async def test_read_chunks_streams_from_start():
+    stream = BytesIO(b"abcdefghij")
+    stream.read(4)
+    chunks = [chunk async for chunk in read_chunks(stream, chunk_size=4)]
+    assert chunks == [b"abcd", b"efgh", b"ij"], (
+        "Файл должен передаваться с начала кусками заданного размера."
+    )
+    assert stream_size(stream) == 10
+
+
+def test_large_upload_spooled_to_disk(_app):
+    spool_max_size = _app.config["UPLOAD_SPOOL_MAX_SIZE"]
+    _app.config["UPLOAD_SPOOL_MAX_SIZE"] = 1024
+    try:
+        with _app.test_request_context(
+            "/files",
+            method="POST",
+            data={"files": [
+                (BytesIO(b"x" * 10), "small.txt"),
+                (BytesIO(b"x" * 4096), "large.txt"),
+            ]},
+        ):
+            small, large = request.files.getlist("files")
+            assert not small.stream._rolled
+            assert large.stream._rolled, (
+                "Файлы больше UPLOAD_SPOOL_MAX_SIZE должны сбрасываться "
+                "на диск."
+            )
+    finally:
+        _app.config["UPLOAD_SPOOL_MAX_SIZE"] = spool_max_size
+
+
+async def test_request_retried_on_429(aiohttp_server, monkeypatch):
+    monkeypatch.setattr(Config, "UPLOAD_BACKOFF_BASE", 0)
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        if len(calls) == 2:
+            return web.Response(status=503)
+        return web.json_response({"href": "ok"})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    server = await aiohttp_server(app)
+    async with aiohttp.ClientSession() as session:
+        status, data = await request_with_retries(
+            session, "GET", str(server.make_url("/"))
+        )
+    assert (status, data) == (HTTPStatus.OK, {"href": "ok"})
+    assert len(calls) == 3, "Запросы с ответами 429 и 5xx нужно повторять."
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+
+
+async def test_upload_concurrency_limited(monkeypatch):
+    monkeypatch.setattr(Config, "UPLOAD_CONCURRENCY", 2)
+    active = []
+    peak = []
+
+    async def fake_upload(session, file_obj, remote_path=None):
+        active.append(file_obj)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.remove(file_obj)
+        if file_obj.filename == "bad":
+            raise RuntimeError("boom")
+        return f"https://disk/{file_obj.filename}"
+
+    monkeypatch.setattr(
+        "yacut.async_upload.upload_file_to_yadisk", fake_upload
+    )
+    files = [FileStorage(BytesIO(b"x"), name) for name in "abcde"]
+    files.append(FileStorage(BytesIO(b"x"), "bad"))
+    results = await upload_files(files)
+    assert max(peak) == 2, (
+        "Число одновременных загрузок должно ограничиваться "
+        "UPLOAD_CONCURRENCY."
+    )
+    assert [result.ok for result in results] == [True] * 5 + [False]
+    assert results[-1] == UploadResult("bad", error="boom")
+
+
+async def test_upload_bad_response_fails_only_that_file(monkeypatch):
+    async def fake_upload(session, file_obj, remote_path=None):
+        if file_obj.filename == "bad":
+            raise ValueError("Expecting value")
+        return f"https://disk/{file_obj.filename}"
+
+    monkeypatch.setattr(
+        "yacut.async_upload.upload_file_to_yadisk", fake_upload
+    )
+    results = await upload_files([
+        FileStorage(BytesIO(b"x"), "good"), FileStorage(BytesIO(b"x"), "bad")
+    ])
+    assert results[0].ok
+    assert not results[1].ok, (
+        "Некорректный ответ API должен давать ошибку одного файла, а не "
+        "всего запроса."
+    )
+
+
+async def test_shared_semaphore_limits_concurrent_calls(monkeypatch):
+    monkeypatch.setattr(Config, "UPLOAD_CONCURRENCY", 2)
+    active = []
+    peak = []
+
+    async def fake_upload(session, file_obj, remote_path=None):
+        active.append(file_obj)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.remove(file_obj)
+        return f"https://disk/{file_obj.filename}"
+
+    monkeypatch.setattr(
+        "yacut.async_upload.upload_file_to_yadisk", fake_upload
+    )
+    semaphore = UploadLoop().semaphore()
+    await asyncio.gather(*(
+        upload_files(
+            [FileStorage(BytesIO(b"x"), f"{call}{name}") for name in "abc"],
+            session=object(), semaphore=semaphore,
+        )
+        for call in range(3)
+    ))
+    assert max(peak) == 2, (
+        "Общий семафор должен ограничивать загрузки всех вызовов вместе."
+    )
+
+
+def test_upload_loop_reuses_session():
+    loop = UploadLoop()
+    try:
+        first = loop.run(loop.session())
+        second = loop.run(loop.session())
+        assert first is second, (
+            "Синхронные загрузки должны переиспользовать одну сессию aiohttp."
+        )
+        assert not first.closed
+    finally:
+        loop.shutdown()
+    assert first.closed
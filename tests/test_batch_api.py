@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+from tests.conftest import PY_URL, TEST_BASE_URL
+from yacut.models import URLMap
+
+BATCH_URL = "/api/id/batch/"
+
+
+def test_batch_create(client, short_python_url):
+    response = client.post(
+        BATCH_URL,
+        json=[
+            {"url": PY_URL},
+            {"url": PY_URL, "custom_id": "docs"},
+            {"url": PY_URL, "custom_id": "py"},
+            {"custom_id": "nourl"},
+        ],
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    generated, custom, duplicated, invalid = response.json
+    assert generated["short_link"].startswith(TEST_BASE_URL)
+    assert custom["short_link"] == f"{TEST_BASE_URL}/docs"
+    assert duplicated == {
+        "url": PY_URL,
+        "message": "Предложенный вариант короткой ссылки уже существует.",
+    }
+    assert invalid == {"message": '"url" является обязательным полем!'}
+    assert URLMap.query.count() == 3, (
+        "Корректные элементы пачки должны сохраняться, а некорректные — "
+        "нет."
+    )
+
+
+def test_batch_create_ndjson(client):
+    response = client.post(
+        BATCH_URL,
+        data=f'{{"url": "{PY_URL}", "custom_id": "py"}}\nnot json\n',
+        content_type="application/x-ndjson",
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json == [
+        {"url": PY_URL, "short_link": f"{TEST_BASE_URL}/py"},
+        {"message": "Некорректный JSON"},
+    ]
+    assert URLMap.get("py").original == PY_URL
+
+
+def test_batch_rejects_non_string_fields(client):
+    response = client.post(BATCH_URL, json=[
+        {"url": 123},
+        {"url": ["x"]},
+        {"url": PY_URL, "custom_id": 5},
+        {"url": PY_URL, "custom_id": "py"},
+    ])
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json == [
+        {"message": '"url" должен быть строкой'},
+        {"message": '"url" должен быть строкой'},
+        {"message": "Указано недопустимое имя для короткой ссылки"},
+        {"url": PY_URL, "short_link": f"{TEST_BASE_URL}/py"},
+    ], "Элементы с нестроковыми полями должны отклоняться поштучно."
+
+
+def test_batch_ndjson_too_large(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, "API_BATCH_MAX_SIZE", 2)
+    response = client.post(
+        BATCH_URL,
+        data="".join(f'{{"url": "{PY_URL}"}}\n' for _ in range(5)),
+        content_type="application/x-ndjson",
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert URLMap.query.count() == 0
+
+
+def test_batch_short_taken_concurrently(client, short_python_url,
+                                        monkeypatch):
+    existing_shorts = URLMap.existing_shorts
+    calls = []
+
+    def stale_existing_shorts(shorts):
+        calls.append(shorts)
+        return set() if len(calls) == 1 else existing_shorts(shorts)
+
+    monkeypatch.setattr(URLMap, "existing_shorts", stale_existing_shorts)
+    response = client.post(BATCH_URL, json=[
+        {"url": PY_URL, "custom_id": "py"},
+        {"url": PY_URL, "custom_id": "docs"},
+    ])
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json == [
+        {
+            "url": PY_URL,
+            "message": "Предложенный вариант короткой ссылки уже существует.",
+        },
+        {"url": PY_URL, "short_link": f"{TEST_BASE_URL}/docs"},
+    ], "Занятый параллельно short должен стать ошибкой элемента, а не 500."
+
+
+def test_batch_nothing_created(client):
+    response = client.post(BATCH_URL, json=[{"url": 1}, {}])
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert len(response.json) == 2
+
+
+def test_batch_requires_list(client):
+    response = client.post(BATCH_URL, json={"url": PY_URL})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_create_many_is_atomic(_app, short_python_url):
+    try:
+        URLMap.create_many([(PY_URL, None), (PY_URL, "py")])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Ожидалась ошибка для занятого short.")
+    assert URLMap.query.count() == 1
@@ -0,0 +1,106 @@
+import threading
+from http import HTTPStatus
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.cache import (
+    MISSING,
+    CacheServer,
+    LRUCache,
+    MmapCache,
+    SocketCache,
+)
+from yacut.models import URLMap, url_cache
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is MISSING, (
+        "При переполнении кэша должна вытесняться давно не использованная "
+        "запись."
+    )
+    assert cache.get("a") == "1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_and_negative_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("yacut.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=10, ttl=60, negative_ttl=5)
+    cache.set("a", "1")
+    cache.set("b", None)
+    assert cache.get("b") is None
+    now[0] += 10
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == "1"
+    now[0] += 60
+    assert cache.get("a") is MISSING
+
+
+def test_redirect_served_from_cache(client, short_python_url):
+    client.get("/py")
+    hits = url_cache.stats()["hits"]
+    response = client.get("/py")
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.location == PY_URL
+    assert url_cache.stats()["hits"] == hits + 1
+
+
+def test_negative_entry_invalidated_on_insert(client):
+    assert client.get("/py").status_code == HTTPStatus.NOT_FOUND
+    db.session.add(URLMap(original=PY_URL, short="py"))
+    db.session.commit()
+    assert client.get("/py").status_code == HTTPStatus.FOUND
+
+
+def test_mmap_cache_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    writer = MmapCache(path, slots=64, value_size=128)
+    reader = MmapCache(path, slots=64, value_size=128)
+    writer.set("py", PY_URL)
+    writer.set("none", None)
+    assert reader.get("py") == PY_URL, (
+        "Запись, сохранённая одним процессом в mmap-кэш, должна быть видна "
+        "другим процессам."
+    )
+    assert reader.get("none") is None
+    reader.delete("py")
+    assert writer.get("py") is MISSING
+
+
+def test_mmap_cache_fits_long_file_links(tmp_path):
+    cache = MmapCache(str(tmp_path / "cache.bin"), slots=8)
+    file_link = "\x00/yacut/" + "f" * 2000 + "\x00https://" + "d" * 2030
+    cache.set("file", file_link)
+    assert cache.get("file") == file_link, (
+        "Ссылка на файл максимальной длины должна помещаться в слот."
+    )
+    small = MmapCache(str(tmp_path / "small.bin"), slots=8, value_size=16)
+    small.set("py", PY_URL)
+    assert small.get("py") is MISSING
+    assert small.stats()["oversized"] == 1
+
+
+def test_socket_cache_roundtrip():
+    server = CacheServer("127.0.0.1:0", LRUCache())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    try:
+        cache = SocketCache(f"{host}:{port}", timeout=1)
+        assert cache.get("py") is MISSING
+        cache.set("py", PY_URL)
+        assert cache.get("py") == PY_URL
+        assert SocketCache(f"{host}:{port}", timeout=1).get("py") == PY_URL
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_socket_cache_unavailable_is_miss():
+    cache = SocketCache("127.0.0.1:1", timeout=0.1)
+    assert cache.get("py") is MISSING
+    assert cache.stats()["errors"] == 1
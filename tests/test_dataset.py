@@ -0,0 +1,28 @@
+from yacut.dataset import SyntheticLinks, seed_url_map
+from yacut.models import URLMap
+
+
+def test_seed_url_map_inserts_unique_shorts(_app):
+    batches = []
+    added = seed_url_map(
+        250, batch_size=100, links=SyntheticLinks(seed=1, custom_share=0.5),
+        on_batch=batches.append,
+    )
+    assert added == 250
+    assert [len(batch) for batch in batches] == [100, 100, 50], (
+        "Ссылки должны добавляться пачками по batch_size."
+    )
+    assert URLMap.query.count() == 250
+    assert len({short for batch in batches for short in batch}) == 250
+
+
+def test_seed_urls_command(_app, cli_runner):
+    URLMap.create(original="https://www.python.org", short="docs")
+    result = cli_runner.invoke(
+        args=["seed-urls", "--count", "50", "--custom-share", "1"]
+    )
+    assert result.exit_code == 0, result.output
+    assert URLMap.query.count() == 51, (
+        "Команда seed-urls должна добавлять заданное число ссылок, "
+        "пропуская занятые пользовательские short."
+    )
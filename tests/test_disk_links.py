@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+from http import HTTPStatus
+
+from yacut.disk_links import (
+    DownloadLinkResolver,
+    download_links,
+    href_expires_in,
+)
+from yacut.models import URLMap
+
+FILE_HREF = "https://downloader.disk.yandex.ru/disk/file?expires={expires}"
+
+
+def wait_refreshed(resolver):
+    deadline = time.monotonic() + 1
+    while resolver._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_href_expires_in():
+    expires = int(time.time()) + 100
+    assert 98 <= href_expires_in(FILE_HREF.format(expires=expires), 3600) <= 100
+    assert href_expires_in("https://disk/file", 3600) == 3600
+
+
+def test_fresh_href_served_without_api_call(monkeypatch):
+    calls = []
+
+    async def fake_fetch(session, remote_path):
+        calls.append(remote_path)
+        return "https://disk/new"
+
+    monkeypatch.setattr("yacut.disk_links.fetch_download_href", fake_fetch)
+    resolver = DownloadLinkResolver(ttl=3600, refresh_ahead=60)
+    resolver.store("app:/file", "https://disk/old")
+    assert resolver.resolve("app:/file") == "https://disk/old"
+    assert calls == [], (
+        "Действующая ссылка на скачивание должна отдаваться из кэша без "
+        "обращения к API Диска."
+    )
+
+
+def test_expiring_href_refreshed_in_background(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("yacut.disk_links.time.monotonic", lambda: now[0])
+
+    async def fake_fetch(session, remote_path):
+        return "https://disk/new"
+
+    monkeypatch.setattr("yacut.disk_links.fetch_download_href", fake_fetch)
+    resolver = DownloadLinkResolver(ttl=100, refresh_ahead=30)
+    resolver.store("app:/file", "https://disk/old")
+    now[0] += 80
+    assert resolver.resolve("app:/file") == "https://disk/old", (
+        "Ссылка, срок которой подходит к концу, должна отдаваться сразу, "
+        "а обновляться — в фоне."
+    )
+    wait_refreshed(resolver)
+    assert resolver.resolve("app:/file") == "https://disk/new"
+
+
+def test_missing_href_not_awaited(monkeypatch):
+    released = threading.Event()
+
+    async def slow_fetch(session, remote_path):
+        await asyncio.get_running_loop().run_in_executor(
+            None, released.wait, 5
+        )
+        return "https://disk/new"
+
+    monkeypatch.setattr("yacut.disk_links.fetch_download_href", slow_fetch)
+    resolver = DownloadLinkResolver(ttl=3600, refresh_ahead=60, timeout=2)
+    started = time.monotonic()
+    assert resolver.resolve("app:/file") is None
+    assert time.monotonic() - started < 1, (
+        "Переход не должен ждать ответа API Диска, даже если ссылки нет "
+        "в кэше."
+    )
+    released.set()
+    wait_refreshed(resolver)
+    assert resolver.resolve("app:/file") == "https://disk/new"
+
+
+def test_file_link_redirects_to_current_href(client, monkeypatch):
+    async def fake_fetch(session, remote_path):
+        return f"https://disk/fresh/{remote_path}"
+
+    monkeypatch.setattr("yacut.disk_links.fetch_download_href", fake_fetch)
+    URLMap.create(
+        original="https://disk/stale", short="file", remote_path="app:/x.txt"
+    )
+    response = client.get("/file")
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.location == "https://disk/stale", (
+        "Пока ссылки нет в кэше, переход должен вести на сохранённую ссылку."
+    )
+    wait_refreshed(download_links)
+    assert client.get("/file").location == "https://disk/fresh/app:/x.txt", (
+        "Переход по короткой ссылке на файл должен вести на актуальную "
+        "ссылку на скачивание."
+    )
+    assert URLMap.get("file").remote_path == "app:/x.txt"
+
+
+def test_file_link_falls_back_to_stored_href(client, monkeypatch):
+    async def failing_fetch(session, remote_path):
+        raise RuntimeError("fail")
+
+    monkeypatch.setattr("yacut.disk_links.fetch_download_href", failing_fetch)
+    URLMap.create(
+        original="https://disk/stale", short="file", remote_path="app:/y.txt"
+    )
+    assert client.get("/file").location == "https://disk/stale"
@@ -0,0 +1,102 @@
+from io import BytesIO
+
+import pytest
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+
+from yacut import db
+from yacut.async_upload import UploadResult
+from yacut.file_links import upload_file_links
+from yacut.models import UploadedFile, URLMap
+
+
+def make_files(*contents):
+    return [
+        FileStorage(BytesIO(content), f"file{index}.txt")
+        for index, content in enumerate(contents)
+    ]
+
+
+def test_same_content_uploaded_once(_app, monkeypatch):
+    uploaded = []
+
+    def fake_upload(files, remote_paths=None):
+        uploaded.append(remote_paths)
+        return [
+            UploadResult(
+                file_obj.filename, url=f"https://disk/{path}", remote_path=path
+            )
+            for file_obj, path in zip(files, remote_paths)
+        ]
+
+    monkeypatch.setattr("yacut.file_links.upload_files_sync", fake_upload)
+    first = upload_file_links(make_files(b"same", b"same", b"other"))
+    assert len(uploaded[0]) == 2, (
+        "Одинаковые файлы в одной отправке должны загружаться один раз."
+    )
+    assert first[0]["short"] == first[1]["short"] != first[2]["short"]
+    assert all(path.startswith("app:/") for path in uploaded[0])
+
+    second = upload_file_links(make_files(b"other"))
+    assert uploaded[1] == [], (
+        "Файл с уже загруженным содержимым не должен загружаться повторно."
+    )
+    assert second[0]["short"] == first[2]["short"]
+    assert UploadedFile.query.count() == 2
+
+
+def test_failed_upload_not_remembered(_app, monkeypatch):
+    monkeypatch.setattr(
+        "yacut.file_links.upload_files_sync",
+        lambda files, remote_paths=None: [
+            UploadResult(file_obj.filename, error="fail") for file_obj in files
+        ],
+    )
+    assert upload_file_links(make_files(b"data")) == [
+        {"filename": "file0.txt", "error": "fail"}
+    ]
+    assert UploadedFile.query.count() == 0
+
+
+def fake_upload_sync(files, remote_paths=None):
+    return [
+        UploadResult(
+            file_obj.filename, url=f"https://disk/{path}", remote_path=path
+        )
+        for file_obj, path in zip(files, remote_paths)
+    ]
+
+
+def test_links_created_in_one_commit(_app, monkeypatch):
+    commits = []
+
+    def count_commit(connection):
+        commits.append(connection)
+
+    monkeypatch.setattr("yacut.file_links.upload_files_sync", fake_upload_sync)
+    event.listen(db.engine, "commit", count_commit)
+    try:
+        links = upload_file_links(make_files(b"a", b"b", b"c"))
+    finally:
+        event.remove(db.engine, "commit", count_commit)
+    assert len(commits) == 1, (
+        "Ссылки на все загруженные файлы должны сохраняться одним коммитом."
+    )
+    assert URLMap.query.count() == 3
+    assert {link["short"] for link in links} == set(
+        db.session.scalars(db.select(URLMap.short))
+    )
+
+
+def test_failed_batch_leaves_no_links(_app, monkeypatch):
+    def broken_remember(records):
+        list(records)
+        raise RuntimeError("fail")
+
+    monkeypatch.setattr("yacut.file_links.upload_files_sync", fake_upload_sync)
+    monkeypatch.setattr(UploadedFile, "remember_many", broken_remember)
+    with pytest.raises(RuntimeError):
+        upload_file_links(make_files(b"a", b"b"))
+    assert URLMap.query.count() == 0, (
+        "Ошибка при сохранении пачки не должна оставлять часть ссылок."
+    )
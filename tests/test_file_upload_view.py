@@ -1,17 +1,43 @@
 import asyncio
+import re
+import threading
 from http import HTTPStatus
 from io import BytesIO
 
+import pytest
+
 from tests.conftest import TEST_BASE_URL, generate_png_bytes
 from tests.yandex_disk_mock_server import (
     COMMON_ASSERT_MSG_FOR_UPLOAD_FILES,
     intercept_requests,
 )
+from yacut import upload_jobs
+from yacut.upload_jobs import running_jobs
 
 FILES_URL = "/files"
 EXPECTED_API_CALLS = {"get_upload_link", "upload", "get_download_link"}
 
 
+@pytest.fixture
+def held_jobs(monkeypatch):
+    """Откладывает фоновые задачи загрузки до ``set()`` события.
+
+    Все потоки тестов делят одно соединение с базой в памяти, поэтому
+    задача не должна писать в базу, пока запрос ещё обрабатывается.
+    """
+    responded = threading.Event()
+    run_upload_job = upload_jobs.run_upload_job
+
+    async def held(*args):
+        await asyncio.get_running_loop().run_in_executor(
+            None, responded.wait, 5
+        )
+        return await run_upload_job(*args)
+
+    monkeypatch.setattr(upload_jobs, "run_upload_job", held)
+    return responded
+
+
 def test_files_upload_page_available(client):
     response = client.get(FILES_URL)
     assert response.status_code == HTTPStatus.OK, (
@@ -84,3 +110,93 @@ async def test_upload_files(client, mock_server, monkeypatch):
 
     loop = asyncio.get_running_loop()
     await loop.run_in_executor(None, sync_test)
+
+
+async def test_upload_files_background_job(
+    client, mock_server, monkeypatch, held_jobs
+):
+    mock_server, user_calls = await mock_server
+    await intercept_requests(mock_server, monkeypatch)
+    monkeypatch.setitem(client.application.config, "UPLOAD_BACKGROUND_JOBS", True)
+    form_data = {
+        "files": [
+            (BytesIO(generate_png_bytes()), "картинка 1.png"),
+            (BytesIO(generate_png_bytes()), "картинка 2.png"),
+        ]
+    }
+
+    def sync_test():
+        response = client.post(FILES_URL, data=form_data)
+        held_jobs.set()
+        assert response.status_code == HTTPStatus.OK
+        job_url = re.search(
+            r"http://localhost(/api/files/\w+/)", response.data.decode("utf-8")
+        )
+        assert job_url, (
+            "При фоновой загрузке страница должна содержать ссылку на "
+            "статус задачи."
+        )
+        job_id = job_url.group(1).split("/")[-2]
+        future = running_jobs.get(job_id)
+        if future is not None:
+            future.result(timeout=10)
+        status = client.get(job_url.group(1)).json
+        assert status["status"] == "done"
+        assert [item["filename"] for item in status["files"]] == [
+            name for _, name in form_data["files"]
+        ]
+        assert all(
+            item["status"] == "done"
+            and item["short_link"].startswith(TEST_BASE_URL)
+            for item in status["files"]
+        ), "После загрузки задача должна содержать короткие ссылки на файлы."
+        assert not (EXPECTED_API_CALLS - user_calls)
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, sync_test)
+
+
+async def test_background_job_uploads_duplicates_once(
+    client, monkeypatch, held_jobs
+):
+    monkeypatch.setitem(client.application.config, "UPLOAD_BACKGROUND_JOBS", True)
+    uploaded = []
+
+    async def fake_upload(session, file_obj, remote_path=None):
+        uploaded.append(file_obj.filename)
+        return f"https://disk.example/{remote_path}"
+
+    monkeypatch.setattr(
+        "yacut.async_upload.upload_file_to_yadisk", fake_upload
+    )
+    png_bytes = generate_png_bytes()
+    form_data = {
+        "files": [
+            (BytesIO(png_bytes), "первая.png"),
+            (BytesIO(png_bytes), "вторая.png"),
+        ]
+    }
+
+    def sync_test():
+        response = client.post(FILES_URL, data=form_data)
+        held_jobs.set()
+        job_url = re.search(
+            r"http://localhost(/api/files/\w+/)", response.data.decode("utf-8")
+        )
+        future = running_jobs.get(job_url.group(1).split("/")[-2])
+        if future is not None:
+            future.result(timeout=10)
+        status = client.get(job_url.group(1)).json
+        assert len(uploaded) == 1, (
+            "Одинаковые файлы одной задачи должны загружаться один раз."
+        )
+        assert [item["status"] for item in status["files"]] == ["done"] * 2
+        assert len({item["short_link"] for item in status["files"]}) == 1
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, sync_test)
+
+
+def test_upload_job_not_found(client):
+    response = client.get("/api/files/unknown/")
+    assert response.status_code == HTTPStatus.NOT_FOUND
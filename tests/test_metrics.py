@@ -0,0 +1,54 @@
+import asyncio
+from http import HTTPStatus
+from io import BytesIO
+
+from tests.conftest import generate_png_bytes
+from tests.yandex_disk_mock_server import intercept_requests
+from yacut.metrics import Counter, Histogram, Registry
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    histogram = registry.register(
+        Histogram("latency_seconds", "Задержка.", ("path",), buckets=(1, 2))
+    )
+    counter = registry.register(Counter("hits", "Попадания.", ("path",)))
+    histogram.observe(0.5, path='/"a"')
+    histogram.observe(1.5, path='/"a"')
+    counter.inc(path="/")
+    lines = registry.render().splitlines()
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{path="/\\"a\\"",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{path="/\\"a\\"",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{path="/\\"a\\""} 2' in lines
+    assert 'hits_total{path="/"} 1' in lines
+
+
+def test_metrics_endpoint_reports_requests(client, short_python_url):
+    client.get("/py")
+    response = client.get("/metrics")
+    assert response.status_code == HTTPStatus.OK
+    body = response.get_data(as_text=True)
+    assert (
+        'yacut_request_duration_seconds_count{endpoint="redirect_short",'
+        'method="GET",status="302"}'
+    ) in body, "Метрики должны содержать задержки запросов по эндпоинтам."
+    assert 'yacut_db_query_duration_seconds_count{operation="SELECT"}' in body
+    assert 'yacut_cache_lookup_duration_seconds_count{result=' in body
+
+
+async def test_upload_stage_metrics(client, mock_server, monkeypatch):
+    server, _ = await mock_server
+    await intercept_requests(server, monkeypatch)
+
+    def sync_test():
+        client.post("/files", data={
+            "files": [(BytesIO(generate_png_bytes()), "image.png")]
+        })
+        return client.get("/metrics").get_data(as_text=True)
+
+    body = await asyncio.get_running_loop().run_in_executor(None, sync_test)
+    for stage in ("get_link", "put", "get_href"):
+        assert (
+            f'yacut_upload_stage_duration_seconds_count{{stage="{stage}"}}'
+        ) in body, f"Метрики должны содержать время этапа загрузки {stage}."
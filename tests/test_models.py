@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import event
+
+from tests.conftest import PY_URL
+from yacut import db
+from yacut.models import URLMap, original_hash
+
+
+@pytest.fixture
+def statements(_app):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def test_create_does_not_select_before_insert(statements):
+    URLMap.create(PY_URL, "py")
+    assert not [
+        statement for statement in statements
+        if statement.lstrip().upper().startswith("SELECT")
+    ], "Создание ссылки не должно проверять занятость short отдельным SELECT."
+
+
+def test_create_existing_custom_short(_app, short_python_url,
+                                      duplicated_custom_id_msg):
+    with pytest.raises(ValueError, match=duplicated_custom_id_msg):
+        URLMap.create(PY_URL, "py")
+    assert URLMap.create(PY_URL, "docs").short == "docs", (
+        "После конфликта уникальности сессия должна оставаться рабочей."
+    )
+    assert URLMap.query.count() == 2
+
+
+def test_create_retries_generated_collision(_app, short_python_url,
+                                            monkeypatch):
+    draws = iter(["py", "free42"])
+    monkeypatch.setattr(
+        "yacut.models.random.choices", lambda *args, **kwargs: next(draws)
+    )
+    assert URLMap.create(PY_URL).short == "free42"
+    assert URLMap.query.count() == 2
+
+
+def test_original_hash_filled_on_insert(_app):
+    URLMap.create(PY_URL, "py")
+    URLMap.create_many([(PY_URL, "docs")])
+    assert {mapping.original_hash for mapping in URLMap.query} == {
+        original_hash(PY_URL)
+    }, "Хэш original должен заполняться при любой вставке в url_map."
+
+
+def test_create_reuses_existing_original(_app, monkeypatch):
+    first = URLMap.create(PY_URL)
+    assert URLMap.create(PY_URL).short != first.short, (
+        "Без URL_REUSE_EXISTING каждая ссылка получает новый short."
+    )
+    monkeypatch.setitem(_app.config, "URL_REUSE_EXISTING", True)
+    assert URLMap.create(PY_URL).short == first.short
+    assert URLMap.create(PY_URL, "py").short == "py", (
+        "Пользовательский short должен создаваться и для известного адреса."
+    )
+    URLMap.create("https://disk/file", remote_path="app:/file")
+    assert URLMap.create("https://disk/file").remote_path is None, (
+        "Ссылки на файлы не должны переиспользоваться для обычных ссылок."
+    )
+    assert URLMap.query.count() == 5
+
+
+def test_create_many_reuses_existing_original(_app, monkeypatch):
+    monkeypatch.setitem(_app.config, "URL_REUSE_EXISTING", True)
+    existing = URLMap.create(PY_URL)
+    other = "https://docs.python.org"
+    mappings = URLMap.create_many(
+        [(PY_URL, None), (other, None), (other, None), (PY_URL, "py")]
+    )
+    assert mappings[0].short == existing.short
+    assert mappings[1].short == mappings[2].short, (
+        "Повторы адреса внутри пачки должны получать один short."
+    )
+    assert mappings[3].short == "py"
+    assert URLMap.query.count() == 3
+
+
+def test_lookup_does_not_load_entity(_app, short_python_url):
+    db.session.expunge_all()
+    mapping = URLMap.lookup("py")
+    assert (mapping.original, mapping.short) == (PY_URL, "py")
+    assert mapping not in db.session and not db.session.identity_map, (
+        "Поиск по short не должен загружать сущность в сессию."
+    )
+    assert URLMap.lookup("missing") is None
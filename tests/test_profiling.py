@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+
+from yacut import db
+from yacut.models import URLMap
+from yacut.profiling import QUERY_COUNT_HEADER
+
+
+@pytest.fixture
+def profiling(_app, monkeypatch):
+    monkeypatch.setitem(_app.config, "SQL_PROFILING", True)
+    return _app
+
+
+def test_profiling_disabled_by_default(client, short_python_url):
+    assert QUERY_COUNT_HEADER not in client.get("/api/id/py/").headers
+
+
+def test_query_count_header(profiling, short_python_url):
+    response = profiling.test_client().get("/api/id/py/")
+    assert int(response.headers[QUERY_COUNT_HEADER]) <= 1, (
+        "Поиск ссылки должен выполнять не больше одного SQL-запроса."
+    )
+
+
+def test_slow_query_logged_with_plan(profiling, monkeypatch, caplog):
+    monkeypatch.setitem(profiling.config, "SQL_SLOW_QUERY_THRESHOLD", 0)
+    with caplog.at_level(logging.WARNING):
+        URLMap.get("py", use_cache=False)
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        "url_map" in message and "SEARCH" in message for message in messages
+    ), "Медленный запрос должен логироваться вместе с планом выполнения."
+
+
+def test_repeated_queries_flagged(profiling, monkeypatch, caplog):
+    monkeypatch.setitem(profiling.config, "SQL_QUERY_BUDGET", 3)
+    db.session.add_all(
+        URLMap(original=f"https://example.com/{index}", short=f"s{index}")
+        for index in range(10)
+    )
+    db.session.commit()
+
+    with caplog.at_level(logging.WARNING), \
+            profiling.test_request_context("/n-plus-one"):
+        profiling.preprocess_request()
+        for index in range(10):
+            URLMap.get(f"s{index}", use_cache=False)
+        response = profiling.process_response(profiling.response_class())
+    assert int(response.headers[QUERY_COUNT_HEADER]) == 10
+    messages = " ".join(record.getMessage() for record in caplog.records)
+    assert "бюджете 3" in messages
+    assert "N+1" in messages, (
+        "Повторяющийся в одном запросе SQL-запрос должен отмечаться как "
+        "возможная проблема N+1."
+    )
@@ -0,0 +1,116 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from yacut import db, models
+from yacut.models import SHORT_LOOKUP, URLMap, url_cache
+from yacut.replicas import MISSING_REPLICA, ReplicaRouter, replica_binds
+
+
+def make_replica(tmp_path, name, rows=()):
+    """Файловая SQLite-реплика с таблицей url_map и строками ``rows``."""
+    engine = create_engine(f"sqlite:///{tmp_path}/{name}.sqlite3")
+    db.metadata.create_all(engine)
+    if rows:
+        with engine.begin() as connection:
+            connection.execute(insert(URLMap.__table__), [
+                {"short": short, "original": original}
+                for short, original in rows
+            ])
+    return engine
+
+
+@pytest.fixture
+def replica_engines(tmp_path):
+    engines = [
+        make_replica(tmp_path, "first", [("py", "https://first.example")]),
+        make_replica(tmp_path, "second", [("py", "https://second.example")]),
+    ]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def routed(_app, replica_engines, monkeypatch):
+    url_cache.clear()
+    monkeypatch.setattr(models, "replicas", ReplicaRouter(replica_engines))
+    yield replica_engines
+    url_cache.clear()
+
+
+def test_replica_binds():
+    assert replica_binds({
+        "DATABASE_REPLICA_URIS": " sqlite:///a.sqlite3, ,sqlite:///b.sqlite3"
+    }) == {
+        "replica_0": "sqlite:///a.sqlite3",
+        "replica_1": "sqlite:///b.sqlite3",
+    }
+    assert replica_binds({"DATABASE_REPLICA_URIS": ""}) == {}
+
+
+def test_router_round_robin(replica_engines):
+    router = ReplicaRouter(replica_engines)
+    originals = [
+        router.first(SHORT_LOOKUP, {"short": "py"}).original
+        for _ in range(4)
+    ]
+    assert originals == [
+        "https://first.example", "https://second.example",
+    ] * 2, "Запросы должны распределяться по репликам по кругу."
+
+
+def test_router_skips_broken_replica(tmp_path, replica_engines):
+    broken = create_engine(f"sqlite:///{tmp_path}/broken.sqlite3")
+    router = ReplicaRouter([broken, replica_engines[0]], retry_interval=60)
+    for _ in range(3):
+        row = router.first(SHORT_LOOKUP, {"short": "py"})
+        assert row.original == "https://first.example"
+    assert list(router.candidates()) == [replica_engines[0]], (
+        "Реплика с ошибкой должна исключаться из ротации до повторной "
+        "проверки."
+    )
+    broken.dispose()
+
+    assert ReplicaRouter([]).first(SHORT_LOOKUP, {"short": "py"}) is (
+        MISSING_REPLICA
+    )
+
+
+def test_router_restores_replica_after_probe(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/late.sqlite3")
+    router = ReplicaRouter([engine], retry_interval=0)
+    assert router.first(SHORT_LOOKUP, {"short": "py"}) is MISSING_REPLICA
+    db.metadata.create_all(engine)
+    assert router.first(SHORT_LOOKUP, {"short": "py"}) is None, (
+        "После интервала реплика, отвечающая на SELECT 1, должна "
+        "возвращаться в ротацию."
+    )
+    engine.dispose()
+
+
+def test_redirect_reads_from_replica(routed, client):
+    response = client.get("/py")
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.location in (
+        "https://first.example", "https://second.example"
+    )
+
+
+def test_lookup_falls_back_to_primary_on_replica_miss(routed, client):
+    URLMap.create("https://www.python.org", "fresh")
+    url_cache.clear()
+    response = client.get("/api/id/fresh/")
+    assert response.status_code == HTTPStatus.OK, (
+        "Ссылка, ещё не попавшая на реплики, должна находиться на основной "
+        "базе."
+    )
+    assert response.json == {"url": "https://www.python.org"}
+
+
+def test_primary_reads_without_replica_flag(routed):
+    URLMap.create("https://www.python.org", "py")
+    assert URLMap.get("py", use_cache=False).original == (
+        "https://www.python.org"
+    )
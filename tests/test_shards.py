@@ -0,0 +1,159 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from tests.conftest import PY_URL
+from yacut import cli, db, models
+from yacut.models import URLMap, url_cache
+from yacut.shards import ShardRouter, jump_hash, shard_binds, shard_key
+
+TABLE = URLMap.__table__
+
+
+def make_router(engines, previous_count=0):
+    router = ShardRouter(engines, previous_count=previous_count)
+    router.create_all(db.metadata, [TABLE])
+    return router
+
+
+def shard_shorts(engine) -> set:
+    with engine.connect() as connection:
+        return set(connection.scalars(select(TABLE.c.short)))
+
+
+@pytest.fixture
+def shard_engines(tmp_path):
+    engines = [
+        create_engine(f"sqlite:///{tmp_path}/shard{index}.sqlite3")
+        for index in range(3)
+    ]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def sharded(_app, shard_engines, monkeypatch):
+    """Переключает url_map на шарды ``shard_engines``."""
+    url_cache.clear()
+
+    def use(count, previous_count=0):
+        router = make_router(shard_engines[:count], previous_count)
+        monkeypatch.setattr(models, "shards", router)
+        monkeypatch.setattr(cli, "shards", router)
+        return router
+
+    yield use
+    url_cache.clear()
+
+
+def test_shard_binds():
+    assert shard_binds({
+        "DATABASE_SHARD_URIS": "sqlite:///a.sqlite3, sqlite:///b.sqlite3"
+    }) == {"shard_0": "sqlite:///a.sqlite3", "shard_1": "sqlite:///b.sqlite3"}
+
+
+def test_jump_hash_moves_keys_only_to_new_shard():
+    keys = [shard_key(f"s{index}") for index in range(2000)]
+    before = [jump_hash(key, 3) for key in keys]
+    after = [jump_hash(key, 4) for key in keys]
+    assert set(before) == {0, 1, 2}
+    moved = [new for old, new in zip(before, after) if old != new]
+    assert set(moved) == {3}, (
+        "При добавлении шарда ключи должны переезжать только в новый шард."
+    )
+    assert 350 < len(moved) < 650
+
+
+def test_create_and_get_use_short_shard(sharded, shard_engines, client):
+    router = sharded(3)
+    mapping = URLMap.create(PY_URL, "py")
+    assert mapping.short == "py"
+    for index, engine in enumerate(shard_engines):
+        assert ("py" in shard_shorts(engine)) == (index == router.index("py"))
+    assert db.session.scalar(select(func.count()).select_from(TABLE)) == 0, (
+        "При шардировании ссылки не должны попадать в основную базу."
+    )
+    url_cache.clear()
+    assert URLMap.get("py").original == PY_URL
+    response = client.get("/py")
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.location == PY_URL
+    assert client.get("/missing").status_code == HTTPStatus.NOT_FOUND
+
+    with pytest.raises(ValueError):
+        URLMap.create("https://other.example", "py")
+    generated = URLMap.create("https://other.example").short
+    assert generated in shard_shorts(shard_engines[router.index(generated)])
+    assert URLMap.existing_shorts(["py", "missing"]) == {"py"}
+
+
+def test_create_many_spreads_rows(sharded, shard_engines):
+    sharded(3)
+    mappings = URLMap.create_many(
+        [(f"https://example.com/{index}", None) for index in range(300)]
+    )
+    shorts = {mapping.short for mapping in mappings}
+    stored = [shard_shorts(engine) for engine in shard_engines]
+    assert set().union(*stored) == shorts
+    assert all(stored), "Пачка должна распределиться по всем шардам."
+    assert all(
+        URLMap.get(mapping.short, use_cache=False).original
+        == mapping.original
+        for mapping in mappings
+    )
+
+
+def test_reuse_existing_across_shards(sharded, monkeypatch):
+    sharded(3)
+    monkeypatch.setitem(models.app.config, "URL_REUSE_EXISTING", True)
+    first = URLMap.create(PY_URL)
+    assert URLMap.create(PY_URL).short == first.short
+    results = URLMap.create_many([(PY_URL, None), ("https://a.example", None)])
+    assert results[0].short == first.short
+    assert URLMap.find_by_original("https://a.example").short == (
+        results[1].short
+    )
+
+
+def test_rebalance_after_adding_shard(sharded, shard_engines, cli_runner):
+    sharded(2)
+    mappings = URLMap.create_many(
+        [(f"https://example.com/{index}", None) for index in range(200)]
+    )
+    router = sharded(3, previous_count=2)
+    url_cache.clear()
+    assert all(
+        URLMap.get(mapping.short, use_cache=False) is not None
+        for mapping in mappings
+    ), "До переноса ссылки должны находиться в прежних шардах."
+    moved_short = next(
+        mapping.short for mapping in mappings
+        if router.read_indexes(mapping.short) != [router.index(mapping.short)]
+    )
+    with pytest.raises(ValueError):
+        URLMap.create(PY_URL, moved_short)
+
+    result = cli_runner.invoke(args=["rebalance-shards", "--batch-size", "7"])
+    assert result.exit_code == 0, result.output
+    assert "Перенесено ссылок между шардами" in result.output
+    for index, engine in enumerate(shard_engines):
+        assert all(
+            router.index(short) == index for short in shard_shorts(engine)
+        )
+    assert shard_shorts(shard_engines[2]), "Новый шард должен заполниться."
+    assert router.count(TABLE) == len(mappings)
+    assert router.rebalance(TABLE, 50) == 0
+
+    sharded(3)
+    assert all(
+        URLMap.get(mapping.short, use_cache=False) is not None
+        for mapping in mappings
+    )
+
+
+def test_shard_commands_require_shards(_app, cli_runner):
+    result = cli_runner.invoke(args=["rebalance-shards"])
+    assert result.exit_code != 0
+    assert "DATABASE_SHARD_URIS" in result.output
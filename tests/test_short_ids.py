@@ -0,0 +1,192 @@
+import os
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import create_engine
+
+from tests.conftest import PY_URL
+from yacut import db, models
+from yacut.constants import SHORT_ALPHABET, SHORT_LENGTH
+from yacut.models import ShortIdPool, URLMap, short_id_pool
+from yacut.short_ids import (
+    ID_SPACE,
+    SequenceAllocator,
+    encode,
+    scramble,
+    sequence_key,
+)
+
+KEY = b"test-key"
+
+
+def test_scramble_is_bijective_prefix():
+    numbers = range(5000)
+    scrambled = {scramble(number, KEY) for number in numbers}
+    assert len(scrambled) == len(numbers), (
+        "Перемешивание номеров не должно давать совпадающих значений."
+    )
+    assert all(0 <= number < ID_SPACE for number in scrambled)
+    assert scrambled != set(numbers)
+
+
+def test_encode_fixed_length():
+    for number in (0, 1, ID_SPACE - 1):
+        short = encode(number)
+        assert len(short) == SHORT_LENGTH
+        assert set(short) <= set(SHORT_ALPHABET)
+
+
+def test_allocator_reserves_blocks():
+    reserved = []
+
+    def reserve(size):
+        reserved.append(size)
+        return sum(reserved) - size
+
+    allocator = SequenceAllocator(reserve, KEY, block_size=10)
+    assert allocator.numbers(4) == [0, 1, 2, 3]
+    assert allocator.numbers(8) == list(range(4, 12))
+    assert reserved == [10, 10], (
+        "Номера должны выдаваться из зарезервированного блока, а новый "
+        "блок — запрашиваться только после исчерпания текущего."
+    )
+
+
+def test_sequence_key_accepts_long_secret():
+    key = sequence_key("s" * 100)
+    assert len(key) == 32
+    allocator = SequenceAllocator(lambda size: 0, key, block_size=10)
+    assert len(set(allocator.shorts(5))) == 5, (
+        "Секрет длиннее 64 байт не должен ломать генерацию short."
+    )
+
+
+def test_sequence_requires_secret():
+    allocator = SequenceAllocator(lambda size: 0, sequence_key(""))
+    with pytest.raises(RuntimeError):
+        allocator.shorts(1)
+
+
+@pytest.fixture
+def sequence_strategy(_app):
+    _app.config["SHORT_ID_STRATEGY"] = "sequence"
+    yield
+    _app.config["SHORT_ID_STRATEGY"] = "random"
+
+
+def test_sequence_strategy_create(sequence_strategy):
+    shorts = {URLMap.create(PY_URL).short for _ in range(3)}
+    shorts |= {
+        mapping.short
+        for mapping in URLMap.create_many([(PY_URL, None)] * 3)
+    }
+    assert len(shorts) == 6
+    assert URLMap.query.count() == 6
+
+
+def test_sequence_batch_skips_custom_shorts(sequence_strategy, client,
+                                            monkeypatch):
+    monkeypatch.setattr(models, "short_id_sequence", SequenceAllocator(
+        lambda size: 0, KEY, block_size=10
+    ))
+    taken = encode(scramble(0, KEY))
+    URLMap.create(PY_URL, taken)
+    response = client.post("/api/id/batch/", json=[{"url": PY_URL}])
+    assert response.status_code == HTTPStatus.CREATED
+    assert not response.json[0]["short_link"].endswith(taken), (
+        "Номер счётчика, занятый пользовательским short, должен "
+        "пропускаться при пачечном создании."
+    )
+    assert URLMap.query.count() == 2
+
+
+@pytest.fixture
+def file_database(_app, tmp_path, monkeypatch):
+    """Основная база в файле: блокировки SQLite видны между соединениями."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/db.sqlite3", connect_args={"timeout": 0.5}
+    )
+    db.session.remove()
+    monkeypatch.setitem(db.engines, None, engine)
+    db.create_all()
+    yield
+    db.session.remove()
+    engine.dispose()
+
+
+def test_sequence_create_retries_after_collision(sequence_strategy,
+                                                 file_database, monkeypatch):
+    monkeypatch.setattr(models, "short_id_sequence", SequenceAllocator(
+        models.ShortIdSequence.reserve, KEY, block_size=1
+    ))
+    taken = encode(scramble(0, KEY))
+    URLMap.create(PY_URL, taken)
+    mapping = URLMap.create(PY_URL)
+    assert mapping.short != taken, (
+        "После коллизии с пользовательским short должен резервироваться "
+        "новый номер, а не ожидаться блокировка базы."
+    )
+    assert URLMap.query.count() == 2
+
+
+def test_collision_does_not_commit_pending_changes(_app):
+    URLMap.create(PY_URL, "py")
+    db.session.add(ShortIdPool(short="pending"))
+    with pytest.raises(ValueError):
+        URLMap.create(PY_URL, "py")
+    db.session.rollback()
+    assert ShortIdPool.query.count() == 0, (
+        "Неудачная вставка не должна сохранять посторонние изменения сессии."
+    )
+
+
+@pytest.fixture
+def pool_strategy(_app):
+    _app.config["SHORT_ID_STRATEGY"] = "pool"
+    short_id_pool.background = False
+    yield
+    _app.config["SHORT_ID_STRATEGY"] = "random"
+    short_id_pool._buffer.clear()
+
+
+def test_pool_strategy_uses_pool(pool_strategy):
+    assert ShortIdPool.refill(size=150, batch_size=40) == 150
+    pooled = {row.short for row in ShortIdPool.query}
+    mapping = URLMap.create(PY_URL)
+    assert mapping.short in pooled, (
+        "При стратегии pool short должен браться из пула."
+    )
+    assert ShortIdPool.query.count() == 150 - short_id_pool.claim_size
+
+
+def test_pool_strategy_falls_back_when_empty(pool_strategy):
+    assert URLMap.create(PY_URL).short
+    assert URLMap.query.count() == 1
+
+
+def test_pool_batch_skips_custom_shorts(pool_strategy, client):
+    ShortIdPool.refill(size=1)
+    taken = ShortIdPool.query.one().short
+    URLMap.create(PY_URL, taken)
+    response = client.post("/api/id/batch/", json=[{"url": PY_URL}])
+    assert response.status_code == HTTPStatus.CREATED
+    assert not response.json[0]["short_link"].endswith(taken), (
+        "Short из пула, занятый пользовательским short, должен "
+        "пропускаться при пачечном создании."
+    )
+    assert URLMap.query.count() == 2
+
+
+def test_pool_buffer_dropped_after_fork(pool_strategy, monkeypatch):
+    short_id_pool._buffer.extend(["parent1", "parent2"])
+    short_id_pool._pid = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    assert "parent1" not in short_id_pool.shorts(2), (
+        "После fork воркер не должен выдавать short из буфера родителя."
+    )
+
+
+def test_fill_short_pool_command(_app, cli_runner):
+    result = cli_runner.invoke(args=["fill-short-pool", "--size", "10"])
+    assert result.exit_code == 0
+    assert ShortIdPool.query.count() == 10
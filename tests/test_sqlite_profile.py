@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from yacut import db
+from yacut.sqlite_profile import init_sqlite_profile, sqlite_pragmas
+
+
+def test_sqlite_pragmas(default_app, tmp_path):
+    config = default_app.config
+    file_uri = f"sqlite:///{tmp_path}/db.sqlite3"
+    pragmas = sqlite_pragmas(config, file_uri)
+    assert pragmas["journal_mode"] == "WAL"
+    assert pragmas["synchronous"] == "NORMAL"
+    assert "journal_mode" not in sqlite_pragmas(config), (
+        "Для базы в памяти режим журнала не настраивается."
+    )
+    assert sqlite_pragmas({**config, "SQLITE_TUNING": False}) == {}
+    with pytest.raises(ValueError):
+        sqlite_pragmas({**config, "SQLITE_JOURNAL_MODE": "wal; DROP"})
+
+
+def test_pragmas_applied_on_connect(default_app, tmp_path):
+    uri = f"sqlite:///{tmp_path}/db.sqlite3"
+    engine = create_engine(uri)
+    init_sqlite_profile(engine, sqlite_pragmas(default_app.config, uri))
+    with engine.connect() as connection:
+        assert connection.scalar(text("PRAGMA journal_mode")) == "wal"
+        assert connection.scalar(text("PRAGMA synchronous")) == 1
+        assert connection.scalar(text("PRAGMA busy_timeout")) == (
+            default_app.config["SQLITE_BUSY_TIMEOUT"]
+        )
+    engine.dispose()
+
+
+def test_app_engine_uses_profile(default_app):
+    with db.engine.connect() as connection:
+        assert connection.scalar(text("PRAGMA cache_size")) == (
+            default_app.config["SQLITE_CACHE_SIZE"]
+        ), "Профиль SQLite должен применяться к движку приложения."
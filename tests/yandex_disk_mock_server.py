@@ -22,10 +22,12 @@ COMMON_ASSERT_MSG_FOR_UPLOAD_FILES = (
 )
 
 
-@pytest.fixture
-async def mock_server(aiohttp_server):
-    """Возвращает мок-сервер для проверки работы с API Я.Диска."""
-    user_calls = set()
+def create_mock_app(user_calls=None):
+    """Создаёт приложение, имитирующее API Я.Диска.
+
+    Имена вызванных эндпоинтов добавляются в ``user_calls``.
+    """
+    user_calls = set() if user_calls is None else user_calls
     file_names = {}
 
     async def check_headers(path, headers):
@@ -126,8 +128,14 @@ async def mock_server(aiohttp_server):
 
     app.router.add_get("/v1/disk/", disk_info_handler)
     app.router.add_route("*", "/{tail:.*}", catch_all_handler)
+    return app
 
-    server = await aiohttp_server(app)
+
+@pytest.fixture
+async def mock_server(aiohttp_server):
+    """Возвращает мок-сервер для проверки работы с API Я.Диска."""
+    user_calls = set()
+    server = await aiohttp_server(create_mock_app(user_calls))
     return server, user_calls
 
 
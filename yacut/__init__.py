@@ -3,12 +3,42 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 from settings import Config
+from yacut.metrics import init_metrics
+from yacut.profiling import init_profiling
+from yacut.replicas import replica_binds
+from yacut.shards import shard_binds
+from yacut.sqlite_profile import (
+    init_sqlite_profile,
+    is_sqlite,
+    sqlite_engine_options,
+    sqlite_pragmas,
+)
+from yacut.wrappers import SpooledRequest
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.request_class = SpooledRequest
+app.config["SQLALCHEMY_BINDS"] = {
+    **replica_binds(app.config),
+    **shard_binds(app.config),
+    **app.config.get("SQLALCHEMY_BINDS", {}),
+}
+if is_sqlite(app.config["SQLALCHEMY_DATABASE_URI"]):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **sqlite_engine_options(app.config),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
 
 db = SQLAlchemy(app)
+with app.app_context():
+    for engine in db.engines.values():
+        init_sqlite_profile(engine, sqlite_pragmas(
+            app.config, engine.url.render_as_string(hide_password=False)
+        ))
 
 migrate = Migrate(app, db)
 
-from . import api_views, views, error_handlers
+init_metrics(app)
+init_profiling(app, db)
+
+from . import api_views, cli, views, error_handlers
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from yacut.constants import REFERRER_MAX_LEN
+from yacut.metrics import visits_dropped, visits_flushed
+
+ERR_VISITS_FLUSH = "Не удалось сохранить статистику переходов"
+
+
+def visit_minute(when=None) -> datetime:
+    """Начало минуты, к которой относится переход."""
+    when = when or datetime.now(timezone.utc)
+    return when.replace(second=0, microsecond=0)
+
+
+def referrer_host(referrer) -> str:
+    """Домен источника перехода; пустая строка — прямой переход."""
+    if not referrer:
+        return ""
+    return urlsplit(referrer).netloc.lower()[:REFERRER_MAX_LEN]
+
+
+class VisitRecorder:
+    """Буфер переходов по коротким ссылкам с фоновой записью в базу.
+
+    Переходы агрегируются в памяти воркера в счётчики по ключу
+    (short, минута, источник), и ``flush(counts)`` раз в ``interval``
+    секунд записывает их пачкой. Буфер ограничен ``max_keys`` ключами:
+    переходы с новыми ключами сверх лимита отбрасываются и учитываются
+    в счётчике ``dropped``.
+    """
+
+    def __init__(self, flush, max_keys=100000, interval=5.0,
+                 background=True, logger=None):
+        self.flush = flush
+        self.max_keys = max_keys
+        self.interval = interval
+        self.background = background
+        self.logger = logger
+        self.dropped = 0
+        self.flushed = 0
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def record(self, short, referrer=None, when=None):
+        """Учитывает переход по ``short``; в базу ничего не пишет."""
+        key = (short, visit_minute(when), referrer_host(referrer))
+        self.start()
+        with self._lock:
+            if key in self._counts:
+                self._counts[key] += 1
+                return
+            if len(self._counts) < self.max_keys:
+                self._counts[key] = 1
+                return
+            self.dropped += 1
+        visits_dropped.inc()
+
+    def flush_now(self) -> int:
+        """Записывает накопленные счётчики и возвращает число переходов."""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        total = sum(counts.values())
+        if not total:
+            return 0
+        try:
+            self.flush(counts)
+        except Exception:
+            if self.logger is not None:
+                self.logger.exception(ERR_VISITS_FLUSH)
+            with self._lock:
+                self.dropped += total
+            visits_dropped.inc(total)
+            return 0
+        with self._lock:
+            self.flushed += total
+        visits_flushed.inc(total)
+        return total
+
+    def start(self):
+        """Запускает фоновую запись, если она ещё не запущена.
+
+        После fork буфер родителя отбрасывается, а поток создаётся
+        заново.
+        """
+        if not self.background or (
+            self._thread is not None and self._pid == os.getpid()
+        ):
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._counts = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="visit-recorder", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush_now()
+
+    def stats(self) -> dict:
+        """Счётчики буфера для мониторинга."""
+        with self._lock:
+            return {
+                "buffered": sum(self._counts.values()),
+                "keys": len(self._counts),
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+            }
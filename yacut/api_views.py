@@ -1,15 +1,40 @@
+import json
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 
 from flask import jsonify, request
+from sqlalchemy.exc import IntegrityError
 
-from yacut import app
-from yacut.models import URLMap
+from yacut import app, db
+from yacut.constants import MAX_GENERATION_ATTEMPTS
+from yacut.models import (
+    ERR_GENERATION_FAILED,
+    STATS_DAY,
+    STATS_HOUR,
+    LinkStat,
+    LinkVisit,
+    UploadJob,
+    URLMap,
+    url_cache,
+)
 from yacut.error_handlers import InvalidAPIUsage
 
 ERR_NO_BODY = "Отсутствует тело запроса"
 ERR_URL_REQUIRED = '"url" является обязательным полем!'
 ERR_NOT_FOUND = "Указанный id не найден"
+ERR_JOB_NOT_FOUND = "Задача загрузки не найдена"
 ERR_SHORT_INVALID = "Указано недопустимое имя для короткой ссылки"
+ERR_BATCH_INVALID = "Тело запроса должно содержать список ссылок"
+ERR_BATCH_TOO_LARGE = "Слишком много ссылок в одном запросе, максимум {limit}"
+ERR_ITEM_INVALID_JSON = "Некорректный JSON"
+ERR_URL_NOT_STRING = '"url" должен быть строкой'
+ERR_STATS_WINDOW = "Параметр {name} должен быть числом от 1 до {limit}"
+STATS_WINDOWS = {
+    "minutes": (60, 24 * 60),
+    "hours": (48, 14 * 24),
+    "days": (30, 366),
+}
+NDJSON_MIMETYPE = "application/x-ndjson"
 
 
 @app.route("/api/id/", methods=["POST"])
@@ -35,11 +60,173 @@ def api_create_id():
         raise InvalidAPIUsage(str(exc))
 
 
+def read_batch(limit: int):
+    """Читает пачку ссылок из JSON-массива или потока NDJSON.
+
+    Поток NDJSON читается не дальше ``limit + 1`` элементов: этого
+    достаточно, чтобы отклонить слишком большую пачку.
+    """
+    if request.mimetype != NDJSON_MIMETYPE:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            raise InvalidAPIUsage(ERR_BATCH_INVALID)
+        return data
+    items = []
+    for line in request.stream:
+        if len(items) > limit:
+            break
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(ValueError(ERR_ITEM_INVALID_JSON))
+    return items
+
+
+def batch_item_error(item):
+    """Сообщение об ошибке элемента пачки или None, если он корректен."""
+    if isinstance(item, ValueError):
+        return str(item)
+    if not isinstance(item, dict) or not item.get("url"):
+        return ERR_URL_REQUIRED
+    if not isinstance(item["url"], str):
+        return ERR_URL_NOT_STRING
+    if not isinstance(item.get("custom_id"), (str, type(None))):
+        return ERR_SHORT_INVALID
+    return None
+
+
+def create_batch(pairs) -> list:
+    """``URLMap.create_many`` с повтором при гонке за short.
+
+    Параллельный запрос может занять short между проверкой занятости и
+    вставкой. Тогда транзакция откатывается, и пачка создаётся заново:
+    повторная проверка вернёт для занятых пользовательских short ошибку
+    элемента, а сгенерированные будут выданы заново.
+    """
+    for _ in range(MAX_GENERATION_ATTEMPTS):
+        try:
+            return URLMap.create_many(pairs, return_errors=True)
+        except IntegrityError:
+            db.session.rollback()
+    raise RuntimeError(ERR_GENERATION_FAILED)
+
+
+@app.route("/api/id/batch/", methods=["POST"])
+def api_create_batch():
+    """Создаёт пачку коротких ссылок одной транзакцией.
+
+    Если не создана ни одна ссылка, ответ — 400 с ошибками элементов.
+    """
+    limit = app.config["API_BATCH_MAX_SIZE"]
+    items = read_batch(limit)
+    if len(items) > limit:
+        raise InvalidAPIUsage(ERR_BATCH_TOO_LARGE.format(limit=limit))
+
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        error = batch_item_error(item)
+        if error is None:
+            valid.append(index)
+        else:
+            results[index] = {"message": error}
+
+    try:
+        created = create_batch(
+            [(items[index]["url"], items[index].get("custom_id"))
+             for index in valid]
+        )
+    except RuntimeError as exc:
+        raise InvalidAPIUsage(str(exc))
+
+    for index, mapping in zip(valid, created):
+        results[index] = (
+            {"url": items[index]["url"], "message": str(mapping)}
+            if isinstance(mapping, ValueError)
+            else {"url": mapping.original, "short_link": mapping.short_url()}
+        )
+    if not any("short_link" in result for result in results):
+        return jsonify(results), HTTPStatus.BAD_REQUEST
+    return jsonify(results), HTTPStatus.CREATED
+
+
 @app.route("/api/id/<string:short>/", methods=["GET"])
 def api_get_url(short):
     """Возвращает исходный URL по короткому идентификатору."""
-    mapping = URLMap.get(short)
+    mapping = URLMap.get(short, replica=True)
     if mapping is None:
         raise InvalidAPIUsage(ERR_NOT_FOUND, status_code=HTTPStatus.NOT_FOUND)
 
-    return jsonify({"url": mapping.original}), HTTPStatus.OK
+    return jsonify({"url": mapping.destination()}), HTTPStatus.OK
+
+
+def stats_window(name) -> int:
+    """Читает из запроса размер окна статистики и проверяет его."""
+    default, limit = STATS_WINDOWS[name]
+    value = request.args.get(name, default, type=int)
+    if not 1 <= value <= limit:
+        raise InvalidAPIUsage(
+            ERR_STATS_WINDOW.format(name=name, limit=limit)
+        )
+    return value
+
+
+@app.route("/api/id/<string:short>/visits/", methods=["GET"])
+def api_get_visits(short):
+    """Возвращает переходы по короткой ссылке за последние минуты."""
+    if URLMap.get(short) is None:
+        raise InvalidAPIUsage(ERR_NOT_FOUND, status_code=HTTPStatus.NOT_FOUND)
+    minutes = stats_window("minutes")
+    since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    return jsonify({
+        "short": short, **LinkVisit.summary(short, since)
+    }), HTTPStatus.OK
+
+
+@app.route("/api/id/<string:short>/stats/", methods=["GET"])
+def api_get_stats(short):
+    """Возвращает сводную статистику переходов по короткой ссылке.
+
+    Читаются только сводки по часам и дням, поэтому время ответа зависит
+    от размера окна, а не от числа переходов.
+    """
+    if URLMap.get(short) is None:
+        raise InvalidAPIUsage(ERR_NOT_FOUND, status_code=HTTPStatus.NOT_FOUND)
+    hours = stats_window("hours")
+    days = stats_window("days")
+    now = datetime.now(timezone.utc)
+    return jsonify({
+        "short": short,
+        "total": LinkStat.total(short),
+        "hours": LinkStat.series(
+            short,
+            STATS_HOUR,
+            now.replace(minute=0, second=0, microsecond=0)
+            - timedelta(hours=hours - 1),
+        ),
+        "days": LinkStat.series(
+            short,
+            STATS_DAY,
+            now.replace(hour=0, minute=0, second=0, microsecond=0)
+            - timedelta(days=days - 1),
+        ),
+    }), HTTPStatus.OK
+
+
+@app.route("/api/cache/stats/", methods=["GET"])
+def api_cache_stats():
+    """Возвращает счётчики кэша коротких ссылок текущего процесса."""
+    return jsonify(url_cache.stats()), HTTPStatus.OK
+
+
+@app.route("/api/files/<string:job_id>/", methods=["GET"])
+def api_get_upload_job(job_id):
+    """Возвращает состояние фоновой загрузки файлов."""
+    job = db.session.get(UploadJob, job_id)
+    if job is None:
+        raise InvalidAPIUsage(
+            ERR_JOB_NOT_FOUND, status_code=HTTPStatus.NOT_FOUND
+        )
+    return jsonify(job.to_dict()), HTTPStatus.OK
@@ -0,0 +1,378 @@
+"""ASGI-точка входа приложения.
+
+Пример::
+
+    uvicorn yacut.asgi:application --workers 4
+
+Переход по короткой ссылке, получение и создание ссылки через API
+обрабатываются корутинами с асинхронным драйвером базы, остальные
+маршруты — Flask-приложением в пуле потоков. Загрузки на Диск идут
+в цикле событий сервера.
+"""
+import asyncio
+import json
+import re
+import time
+from http import HTTPStatus
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from sqlalchemy import insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.utils import redirect
+
+from yacut import app
+from yacut.api_views import ERR_NO_BODY, ERR_NOT_FOUND, ERR_URL_REQUIRED
+from yacut.async_upload import upload_loop
+from yacut.cache import MISSING
+from yacut.constants import MAX_GENERATION_ATTEMPTS, RESERVED_SHORTS
+from yacut.disk_links import download_links
+from yacut.metrics import cache_lookup_duration, request_duration
+from yacut.models import (
+    ERR_GENERATION_FAILED,
+    ERR_SHORT_EXISTS,
+    SHORT_LOOKUP,
+    URLMap,
+    original_hash,
+    shards,
+    url_cache,
+    visit_recorder,
+)
+from yacut.replicas import (
+    MISSING_REPLICA,
+    AsyncReplicaRouter,
+    replica_binds,
+)
+from yacut.sqlite_profile import init_sqlite_profile, sqlite_pragmas
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+ERR_NO_ASYNC_DRIVER = "Нет асинхронного драйвера для базы {drivername}"
+JSON_MIMETYPE_RE = re.compile(r"^application/(?:[\w.+-]+\+)?json$")
+
+
+def async_database_uri(uri) -> str:
+    """URI базы для асинхронного движка.
+
+    Синхронный драйвер заменяется асинхронным того же диалекта; URI,
+    уже указывающий асинхронный драйвер, возвращается как есть.
+    """
+    url = make_url(uri)
+    if url.drivername in ASYNC_DRIVERS.values():
+        return uri
+    if url.get_backend_name() not in ASYNC_DRIVERS:
+        raise ValueError(ERR_NO_ASYNC_DRIVER.format(
+            drivername=url.drivername
+        ))
+    return url.set(
+        drivername=ASYNC_DRIVERS[url.get_backend_name()]
+    ).render_as_string(hide_password=False)
+
+
+class ThreadedWsgiInstance(WsgiToAsgiInstance):
+    """Обработка WSGI-запроса в общем пуле потоков.
+
+    По умолчанию asgiref выполняет все WSGI-запросы в одном потоке, и
+    медленный маршрут (например, загрузка файлов) задерживал бы остальные.
+    """
+
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.__dict__["run_wsgi_app"].func,
+        thread_sensitive=False,
+    )
+
+
+class ThreadedWsgiToAsgi(WsgiToAsgi):
+
+    async def __call__(self, scope, receive, send):
+        await ThreadedWsgiInstance(self.wsgi_application)(
+            scope, receive, send
+        )
+
+
+class AsyncLinks:
+    """Чтение и создание коротких ссылок через асинхронный движок.
+
+    Кэш ``url_cache`` общий с синхронной частью приложения. Чтение, как
+    и в ``URLMap.lookup`` с ``replica``, идёт на реплики ``replicas`` с
+    повтором на основной базе; запись — только на основную базу.
+    """
+
+    def __init__(self, engine, replicas=None):
+        self.engine = engine
+        self.replicas = replicas or AsyncReplicaRouter([])
+        self.table = URLMap.__table__
+
+    async def get(self, short: str):
+        """Возвращает несвязанный с сессией URLMap или None."""
+        started = time.perf_counter()
+        value = url_cache.get(short)
+        cache_lookup_duration.observe(
+            time.perf_counter() - started,
+            result="miss" if value is MISSING else "hit",
+        )
+        if value is not MISSING:
+            return value and URLMap._from_cache(short, value)
+        row = await self.replicas.first(SHORT_LOOKUP, {"short": short})
+        if row is None or row is MISSING_REPLICA:
+            async with self.engine.connect() as connection:
+                row = (await connection.execute(
+                    SHORT_LOOKUP, {"short": short}
+                )).first()
+        url_cache.set(short, URLMap._cache_value(*row) if row else None)
+        return row and URLMap(
+            original=row.original, short=short, remote_path=row.remote_path
+        )
+
+    async def destination(self, mapping) -> str:
+        """То же, что ``URLMap.destination``, без блокировки цикла."""
+        if mapping.remote_path:
+            return (
+                download_links.resolve(mapping.remote_path)
+                or mapping.original
+            )
+        return mapping.original
+
+    async def candidate_short(self) -> str:
+        """Short для вставки; счётчик и пул читаются в пуле потоков."""
+        if URLMap._strategy() == "random":
+            return URLMap._candidate_short()
+
+        def candidate():
+            with app.app_context():
+                return URLMap._candidate_short()
+
+        return await asyncio.to_thread(candidate)
+
+    async def create(self, original: str, short: str = None) -> str:
+        """Асинхронный аналог ``URLMap.create``; возвращает short."""
+        URLMap.check(original, short)
+        if URLMap._reuses_existing(short):
+            async with self.engine.connect() as connection:
+                existing = await connection.scalar(
+                    select(self.table.c.short)
+                    .where(
+                        self.table.c.original_hash == original_hash(original),
+                        self.table.c.original == original,
+                        self.table.c.remote_path.is_(None),
+                    )
+                    .order_by(self.table.c.id)
+                    .limit(1)
+                )
+            if existing is not None:
+                return existing
+        for _ in range(MAX_GENERATION_ATTEMPTS):
+            candidate = short or await self.candidate_short()
+            try:
+                async with self.engine.begin() as connection:
+                    await connection.execute(
+                        insert(self.table).values(
+                            original=original, short=candidate
+                        )
+                    )
+            except IntegrityError:
+                if short:
+                    raise ValueError(ERR_SHORT_EXISTS)
+                continue
+            url_cache.set(candidate, URLMap._cache_value(original))
+            return candidate
+        raise RuntimeError(ERR_GENERATION_FAILED)
+
+
+class Request:
+    """Минимальная обёртка над ASGI-запросом для асинхронных маршрутов."""
+
+    def __init__(self, scope, receive):
+        self.scope = scope
+        self.receive = receive
+        self.headers = {
+            name.decode("latin1").lower(): value.decode("latin1")
+            for name, value in scope.get("headers", [])
+        }
+
+    @property
+    def base_url(self) -> str:
+        host = self.headers.get("host")
+        if host is None:
+            server = self.scope.get("server") or ("localhost", 80)
+            host = f"{server[0]}:{server[1]}"
+        return (
+            f"{self.scope.get('scheme', 'http')}://{host}"
+            f"{self.scope.get('root_path', '')}"
+        )
+
+    async def body(self) -> bytes:
+        chunks = []
+        while True:
+            message = await self.receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    async def get_json(self):
+        """Тело JSON-запроса или None, как ``get_json(silent=True)``."""
+        mimetype = self.headers.get("content-type", "").split(";")[0]
+        if not JSON_MIMETYPE_RE.match(mimetype.strip().lower()):
+            return None
+        try:
+            return json.loads(await self.body())
+        except ValueError:
+            return None
+
+
+async def send_response(send, response):
+    """Отправляет ответ werkzeug целиком."""
+    await send({
+        "type": "http.response.start",
+        "status": response.status_code,
+        "headers": [
+            (name.lower().encode("latin1"), value.encode("latin1"))
+            for name, value in response.headers.to_wsgi_list()
+        ],
+    })
+    await send({"type": "http.response.body", "body": response.get_data()})
+
+
+def json_response(data, status=HTTPStatus.OK):
+    response = app.json.response(data)
+    response.status_code = status
+    return response
+
+
+class YacutASGI:
+    """ASGI-приложение: быстрые маршруты — корутины, остальное — Flask."""
+
+    def __init__(self, flask_app, database_uri=None, engine_options=None):
+        self.flask_app = flask_app
+        self.wsgi = ThreadedWsgiToAsgi(flask_app)
+        self.database_uri = async_database_uri(
+            database_uri
+            or flask_app.config["ASYNC_DATABASE_URI"]
+            or flask_app.config["SQLALCHEMY_DATABASE_URI"]
+        )
+        self.engine = create_async_engine(
+            self.database_uri, **(engine_options or {})
+        )
+        init_sqlite_profile(
+            self.engine.sync_engine,
+            sqlite_pragmas(flask_app.config, self.database_uri),
+        )
+        self.replicas = AsyncReplicaRouter(
+            [
+                create_async_engine(
+                    async_database_uri(uri), **(engine_options or {})
+                )
+                for uri in replica_binds(flask_app.config).values()
+            ],
+            retry_interval=flask_app.config["REPLICA_RETRY_INTERVAL"],
+            logger=flask_app.logger,
+        )
+        self.links = AsyncLinks(self.engine, self.replicas)
+        # Асинхронные маршруты читают url_map основной базы и реплик;
+        # шардированная таблица обслуживается синхронным кодом Flask.
+        self.routes = [] if shards else [
+            ("GET", re.compile(r"/api/id/(?P<short>[^/]+)/"),
+             "api_get_url", self.api_get_url),
+            ("POST", re.compile(r"/api/id/"),
+             "api_create_id", self.api_create_id),
+            ("GET", re.compile(r"/(?P<short>[^/]+)"),
+             "redirect_short", self.redirect_short),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] == "http":
+            for method, pattern, endpoint, handler in self.routes:
+                match = pattern.fullmatch(scope["path"])
+                if scope["method"] == method and match:
+                    return await self.dispatch(
+                        endpoint, handler, scope, receive, send,
+                        **match.groupdict(),
+                    )
+        return await self.wsgi(scope, receive, send)
+
+    async def dispatch(self, endpoint, handler, scope, receive, send,
+                       **kwargs):
+        started = time.perf_counter()
+        response = await handler(Request(scope, receive), **kwargs)
+        if response is None:
+            return await self.wsgi(scope, receive, send)
+        await send_response(send, response)
+        if self.flask_app.config["METRICS_ENABLED"]:
+            request_duration.observe(
+                time.perf_counter() - started,
+                endpoint=endpoint,
+                method=scope["method"],
+                status=response.status_code,
+            )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                upload_loop.attach(asyncio.get_running_loop())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await upload_loop.detach()
+                await asyncio.to_thread(visit_recorder.flush_now)
+                await self.engine.dispose()
+                for engine in self.replicas.engines:
+                    await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def redirect_short(self, request, short):
+        """Перенаправление; неизвестный short отдаётся Flask для 404."""
+        if short in RESERVED_SHORTS:
+            return None
+        mapping = await self.links.get(short)
+        if mapping is None:
+            return None
+        if self.flask_app.config["ANALYTICS_ENABLED"]:
+            visit_recorder.record(short, request.headers.get("referer"))
+        return redirect(await self.links.destination(mapping))
+
+    async def api_get_url(self, request, short):
+        mapping = await self.links.get(short)
+        if mapping is None:
+            return json_response(
+                {"message": ERR_NOT_FOUND}, HTTPStatus.NOT_FOUND
+            )
+        return json_response({"url": await self.links.destination(mapping)})
+
+    async def api_create_id(self, request):
+        data = await request.get_json()
+        if not data:
+            return json_response(
+                {"message": ERR_NO_BODY}, HTTPStatus.BAD_REQUEST
+            )
+        if "url" not in data or not data.get("url"):
+            return json_response(
+                {"message": ERR_URL_REQUIRED}, HTTPStatus.BAD_REQUEST
+            )
+        try:
+            short = await self.links.create(
+                data["url"], data.get("custom_id")
+            )
+        except (ValueError, RuntimeError) as exc:
+            return json_response({"message": str(exc)}, HTTPStatus.BAD_REQUEST)
+        with self.flask_app.test_request_context(base_url=request.base_url):
+            short_link = URLMap.short_url_for(short)
+        return json_response(
+            {"url": data["url"], "short_link": short_link},
+            HTTPStatus.CREATED,
+        )
+
+
+def create_asgi_app(flask_app=app, database_uri=None, engine_options=None):
+    """Создаёт ASGI-приложение поверх Flask-приложения ``flask_app``."""
+    return YacutASGI(flask_app, database_uri, engine_options)
+
+
+application = create_asgi_app()
@@ -1,65 +1,425 @@
 import asyncio
+import atexit
+import hashlib
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from http import HTTPStatus
+from typing import Optional
 
 import aiohttp
+from yarl import URL
 
 from settings import Config
+from yacut.metrics import upload_requests, upload_stage_duration
 
 ERROR_UPLOAD = "Ошибка загрузки {file}: {status}"
 ERROR_GET_HREF = "Не удалось получить публичную ссылку для {file}"
 ERROR_GET_UPLOAD_LINK = "Ошибка получения ссылки для загрузки: {status} {data}"
+ERROR_REQUEST_FAILED = "Запрос к Яндекс.Диску не удался: {error}"
+ERROR_BAD_RESPONSE = "Некорректный ответ Яндекс.Диска: {error}"
 
 YADISK_UPLOAD_URL = f"{Config.YADISK_API_BASE}/upload"
 YADISK_DOWNLOAD_URL = f"{Config.YADISK_API_BASE}/download"
 YADISK_HEADERS = {"Authorization": f"OAuth {Config.DISK_TOKEN}"}
+RETRY_STATUSES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.INTERNAL_SERVER_ERROR,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
 
 
-async def upload_file_to_yadisk(session, file_obj):
+@dataclass
+class UploadResult:
+    """Итог загрузки одного файла."""
+
+    filename: str
+    url: Optional[str] = None
+    error: Optional[str] = None
+    remote_path: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def stream_size(stream):
+    """Возвращает размер потока, не меняя текущую позицию."""
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
+
+
+async def read_chunks(stream, chunk_size=Config.UPLOAD_CHUNK_SIZE):
+    """Читает поток с начала кусками по ``chunk_size`` байт."""
+    stream.seek(0)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_retry_after(value):
+    """Возвращает задержку из заголовка Retry-After в секундах."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt):
+    """Экспоненциальная задержка перед повтором с полным джиттером."""
+    return random.uniform(0, min(
+        Config.UPLOAD_BACKOFF_MAX,
+        Config.UPLOAD_BACKOFF_BASE * 2 ** (attempt - 1),
+    ))
+
+
+async def read_json_object(resp):
+    """JSON-объект из тела ответа или None, если тело не такое."""
+    if resp.content_type != "application/json":
+        return None
+    try:
+        data = await resp.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def request_with_retries(session, method, url, body=None, **kwargs):
+    """Выполняет запрос, повторяя его при 429, 5xx и сетевых ошибках.
+
+    ``body`` — функция, создающая тело запроса заново для каждой
+    попытки. Возвращает статус и разобранный JSON-объект ответа (или
+    None, если ответ не JSON или не объект).
+    """
+    for attempt in range(1, Config.UPLOAD_MAX_ATTEMPTS + 1):
+        last_attempt = attempt == Config.UPLOAD_MAX_ATTEMPTS
+        try:
+            async with session.request(
+                method, url, data=body() if body else None, **kwargs
+            ) as resp:
+                if resp.status not in RETRY_STATUSES or last_attempt:
+                    return resp.status, await read_json_object(resp)
+                delay = parse_retry_after(resp.headers.get("Retry-After"))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            if last_attempt:
+                raise RuntimeError(ERROR_REQUEST_FAILED.format(
+                    error=str(exc) or type(exc).__name__
+                ))
+            delay = None
+        if delay is None:
+            delay = backoff_delay(attempt)
+        elif delay > Config.UPLOAD_BACKOFF_MAX:
+            return resp.status, None
+        await asyncio.sleep(delay)
+
+
+def file_digest(stream):
+    """Возвращает SHA-256 содержимого потока, читая его кусками."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(Config.UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def content_path(digest, filename):
+    """Путь на Диске, однозначно определяемый содержимым файла."""
+    return f"app:/{digest}_{filename}"
+
+
+def default_remote_path(file_obj):
+    """Путь на Диске по умолчанию — по имени файла."""
+    return f"app:/{file_obj.filename}"
+
+
+async def fetch_download_href(session, remote_path, filename=None):
+    """Запрашивает текущую ссылку на скачивание файла с Диска."""
+    _, data = await request_with_retries(
+        session,
+        "GET",
+        YADISK_DOWNLOAD_URL,
+        headers=YADISK_HEADERS,
+        params={"path": remote_path},
+    )
+    href = (data or {}).get("href")
+    if not href:
+        raise RuntimeError(
+            ERROR_GET_HREF.format(file=filename or remote_path)
+        )
+    return href
+
+
+async def upload_file_to_yadisk(session, file_obj, remote_path=None):
     """Загрузка одного файла на Яндекс.Диск и получение публичной ссылки."""
 
-    remote_path = f"app:/{file_obj.filename}"
+    remote_path = remote_path or default_remote_path(file_obj)
 
-    async with session.get(
+    status, data = await request_with_retries(
+        session,
+        "GET",
         YADISK_UPLOAD_URL,
         headers=YADISK_HEADERS,
         params={"path": remote_path, "overwrite": "true"},
-    ) as resp:
-        data = await resp.json()
-        if resp.status != HTTPStatus.OK or "href" not in data:
-            raise RuntimeError(
-                ERROR_GET_UPLOAD_LINK.format(status=resp.status, data=data)
+    )
+    if status != HTTPStatus.OK or "href" not in (data or {}):
+        raise RuntimeError(
+            ERROR_GET_UPLOAD_LINK.format(status=status, data=data)
+        )
+    upload_href = data["href"]
+
+    status, _ = await request_with_retries(
+        session,
+        "PUT",
+        upload_href,
+        body=lambda: read_chunks(file_obj.stream),
+        headers={"Content-Length": str(stream_size(file_obj.stream))},
+    )
+    if status not in (HTTPStatus.OK, HTTPStatus.CREATED):
+        raise RuntimeError(
+            ERROR_UPLOAD.format(file=file_obj.filename, status=status)
+        )
+
+    return await fetch_download_href(session, remote_path, file_obj.filename)
+
+
+async def upload_file(session, semaphore, file_obj, index=0, on_result=None,
+                      remote_path=None):
+    """Загружает файл, ограничивая число одновременных загрузок.
+
+    Если передан ``on_result``, он ожидается с индексом файла и итогом
+    сразу после завершения загрузки. Ошибка загрузки, в том числе
+    некорректный ответ API, становится итогом этого файла и не прерывает
+    остальные загрузки.
+    """
+    remote_path = remote_path or default_remote_path(file_obj)
+    async with semaphore:
+        try:
+            result = UploadResult(
+                file_obj.filename,
+                url=await upload_file_to_yadisk(
+                    session, file_obj, remote_path
+                ),
+                remote_path=remote_path,
+            )
+        except RuntimeError as exc:
+            result = UploadResult(file_obj.filename, error=str(exc))
+        except (ValueError, aiohttp.ClientError) as exc:
+            result = UploadResult(
+                file_obj.filename,
+                error=ERROR_BAD_RESPONSE.format(
+                    error=str(exc) or type(exc).__name__
+                ),
             )
-        upload_href = data["href"]
+    if on_result is not None:
+        await on_result(index, result)
+    return result
+
+
+def upload_stage(method, url) -> str:
+    """Этап загрузки, к которому относится запрос к API Диска."""
+    if url.path == URL(YADISK_UPLOAD_URL).path:
+        return "get_link"
+    if url.path == URL(YADISK_DOWNLOAD_URL).path:
+        return "get_href"
+    if method == "PUT":
+        return "put"
+    return "other"
+
+
+def upload_trace_config():
+    """Трассировка запросов к API Диска для метрик этапов загрузки."""
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        stage = upload_stage(params.method, params.url)
+        upload_stage_duration.observe(
+            time.perf_counter() - context.started, stage=stage
+        )
+        upload_requests.inc(stage=stage, status=params.response.status)
+
+    async def on_request_exception(session, context, params):
+        upload_requests.inc(
+            stage=upload_stage(params.method, params.url), status="error"
+        )
 
-    file_obj.stream.seek(0)
-    content = file_obj.read()
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
 
-    async with session.put(upload_href, data=content) as resp:
-        if resp.status not in (HTTPStatus.OK, HTTPStatus.CREATED):
-            raise RuntimeError(
-                ERROR_UPLOAD.format(
-                    file=file_obj.filename, status=resp.status
-                )
+
+def client_timeout():
+    """Таймауты запросов к API Диска."""
+    return aiohttp.ClientTimeout(
+        total=Config.UPLOAD_TIMEOUT, connect=Config.UPLOAD_CONNECT_TIMEOUT
+    )
+
+
+async def upload_files(files, session=None, on_result=None,
+                       remote_paths=None, semaphore=None):
+    """Загрузка списка файлов на Яндекс.Диск.
+
+    Если ``session`` не передана, на время загрузки открывается своя.
+    ``remote_paths`` задаёт пути на Диске; по умолчанию — имя файла.
+    ``semaphore`` ограничивает одновременные загрузки; общий семафор
+    ``upload_loop.semaphore()`` действует на все загрузки воркера, без
+    него лимит ``UPLOAD_CONCURRENCY`` применяется к одному вызову.
+    Возвращает список UploadResult в порядке ``files``.
+    """
+    if session is None:
+        async with aiohttp.ClientSession(
+            timeout=client_timeout(), trace_configs=[upload_trace_config()]
+        ) as session:
+            return await upload_files(
+                files, session, on_result, remote_paths, semaphore
             )
+    semaphore = semaphore or asyncio.Semaphore(Config.UPLOAD_CONCURRENCY)
+    remote_paths = remote_paths or [None] * len(files)
+    return await asyncio.gather(*(
+        upload_file(session, semaphore, f, index, on_result, path)
+        for index, (f, path) in enumerate(zip(files, remote_paths))
+    ))
+
+
+class UploadLoop:
+    """Фоновый цикл событий воркера с долгоживущей сессией aiohttp.
+
+    Синхронные view передают сюда корутины через ``run``, а соединения
+    с API Диска (keep-alive, кэш DNS, TLS) переиспользуются между
+    запросами. После fork цикл и сессия создаются заново. Под ASGI-сервером
+    вместо своего потока используется цикл сервера (``attach``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphore = None
+        self._pid = None
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+            self._loop = asyncio.new_event_loop()
+            self._session = None
+            self._semaphore = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="upload-loop", daemon=True
+            )
+            self._thread.start()
+            return self._loop
+
+    def attach(self, loop):
+        """Переносит загрузки в уже работающий цикл, например ASGI-сервера.
+
+        Свой поток при этом не запускается; ``run`` можно вызывать только
+        из других потоков.
+        """
+        with self._lock:
+            self._loop = loop
+            self._thread = None
+            self._session = None
+            self._semaphore = None
+            self._pid = os.getpid()
+
+    async def detach(self):
+        """Закрывает сессию и отвязывает цикл, переданный в ``attach``."""
+        await self._close_session()
+        with self._lock:
+            self._loop = None
+            self._semaphore = None
+
+    def submit(self, coro):
+        """Запускает корутину в фоновом цикле и возвращает Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._start())
+
+    def run(self, coro):
+        """Выполняет корутину в фоновом цикле и ждёт результат."""
+        return self.submit(coro).result()
+
+    async def session(self):
+        """Возвращает общую сессию; вызывается внутри фонового цикла."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=Config.UPLOAD_POOL_LIMIT,
+                    limit_per_host=Config.UPLOAD_POOL_LIMIT_PER_HOST,
+                    ttl_dns_cache=Config.UPLOAD_DNS_CACHE_TTL,
+                    keepalive_timeout=Config.UPLOAD_KEEPALIVE_TIMEOUT,
+                ),
+                timeout=client_timeout(),
+                trace_configs=[upload_trace_config()],
+            )
+        return self._session
+
+    def semaphore(self):
+        """Общий для всех загрузок воркера лимит ``UPLOAD_CONCURRENCY``.
+
+        Вызывается внутри фонового цикла.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(Config.UPLOAD_CONCURRENCY)
+        return self._semaphore
+
+    async def _close_session(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def close_session(self):
+        """Закрывает общую сессию; новая откроется при следующей загрузке."""
+        if self._loop is not None and self._pid == os.getpid():
+            self.run(self._close_session())
+
+    def shutdown(self):
+        """Закрывает сессию и останавливает фоновый цикл."""
+        if (
+            self._loop is None or self._pid != os.getpid()
+            or self._thread is None
+        ):
+            return
+        self.close_session()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
 
-    async with session.get(
-        YADISK_DOWNLOAD_URL,
-        headers=YADISK_HEADERS,
-        params={"path": remote_path},
-    ) as info_resp:
-        public_url = (await info_resp.json()).get("href")
-        if not public_url:
-            raise RuntimeError(ERROR_GET_HREF.format(file=file_obj.filename))
 
-    return public_url
+upload_loop = UploadLoop()
+atexit.register(upload_loop.shutdown)
 
 
-async def upload_files(files):
-    """Загрузка списка файлов на Яндекс.Диск."""
-    async with aiohttp.ClientSession() as session:
-        tasks = [upload_file_to_yadisk(session, f) for f in files]
-        return await asyncio.gather(*tasks, return_exceptions=True)
+async def upload_files_shared(files, remote_paths=None):
+    """Загрузка файлов через общую сессию фонового цикла."""
+    return await upload_files(
+        files, await upload_loop.session(), remote_paths=remote_paths,
+        semaphore=upload_loop.semaphore(),
+    )
 
 
-def upload_files_sync(files):
-    return asyncio.run(upload_files(files))
+def upload_files_sync(files, remote_paths=None):
+    return upload_loop.run(upload_files_shared(files, remote_paths))
@@ -0,0 +1,412 @@
+import json
+import mmap
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from yacut.constants import ORIGINAL_MAX_LEN
+
+MISSING = object()
+# Значение ссылки на файл: метка + путь на Диске + метка + original.
+MMAP_VALUE_SIZE = 2 * ORIGINAL_MAX_LEN + 2
+
+ERR_UNKNOWN_BACKEND = "Неизвестный бэкенд кэша: {backend}"
+ERR_UNKNOWN_COMMAND = "Неизвестная команда: {command}"
+
+
+class BaseCache:
+    """Общий интерфейс кэша short -> original.
+
+    Значение ``None`` означает, что идентификатора нет в базе
+    (негативное кэширование), ``MISSING`` — что в кэше нет записи.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=30):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def _ttl_for(self, value):
+        return self.ttl if value is not None else self.negative_ttl
+
+    def get(self, key):
+        """Возвращает значение из кэша или ``MISSING``."""
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """Сохраняет значение; ``None`` кэшируется как отсутствующее."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Удаляет значение из кэша."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Очищает кэш."""
+        raise NotImplementedError
+
+    def stats(self):
+        """Возвращает счётчики кэша для мониторинга."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+
+class LRUCache(BaseCache):
+    """Потокобезопасный LRU-кэш с TTL и ограничением по размеру и памяти.
+
+    Живёт в памяти процесса, поэтому у каждого воркера свой набор записей.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300, negative_ttl=30,
+                 max_bytes=None):
+        super().__init__(ttl=ttl, negative_ttl=negative_ttl)
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(key, value):
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        size = self._sizeof(key, value)
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            self._data[key] = (
+                value, time.monotonic() + self._ttl_for(value), size
+            )
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                **super().stats(),
+                "size": len(self._data),
+                "bytes": self._bytes,
+            }
+
+    def _pop(self, key):
+        self._bytes -= self._data.pop(key)[2]
+
+
+def _parse_address(address):
+    """Разбирает адрес сервера кэша: ``host:port`` или путь к сокету."""
+    if ":" in address:
+        host, port = address.rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+class CacheRequestHandler(socketserver.StreamRequestHandler):
+    """Обрабатывает JSON-команды клиента, по одной на строку."""
+
+    def handle(self):
+        for line in self.rfile:
+            command, *args = json.loads(line)
+            if command == "get":
+                value = self.server.cache.get(args[0])
+                reply = {"miss": True} if value is MISSING else {"v": value}
+            elif command == "set":
+                self.server.cache.set(*args)
+                reply = {}
+            elif command == "delete":
+                self.server.cache.delete(args[0])
+                reply = {}
+            elif command == "clear":
+                self.server.cache.clear()
+                reply = {}
+            elif command == "stats":
+                reply = self.server.cache.stats()
+            else:
+                reply = {"error": ERR_UNKNOWN_COMMAND.format(command=command)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class CacheServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Локальный key/value-сервер, общий для всех воркеров хоста."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, cache):
+        self.address_family, server_address = _parse_address(address)
+        if self.address_family == socket.AF_UNIX and os.path.exists(
+            server_address
+        ):
+            os.unlink(server_address)
+        self.cache = cache
+        super().__init__(server_address, CacheRequestHandler)
+
+
+class SocketCache(BaseCache):
+    """Клиент ``CacheServer`` с постоянным соединением на поток.
+
+    Ошибки связи не пробрасываются: запрос считается промахом и уходит
+    в базу, а повторное подключение откладывается на ``retry_delay``.
+    """
+
+    def __init__(self, address, timeout=0.05, retry_delay=1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.family, self.address = _parse_address(address)
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+            conn = self._local.conn = sock.makefile("rwb")
+        return conn
+
+    def _call(self, *command):
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            conn = self._connection()
+            conn.write(json.dumps(command).encode() + b"\n")
+            conn.flush()
+            return json.loads(conn.readline())
+        except (OSError, ValueError):
+            self.errors += 1
+            self._disconnect()
+            self._down_until = time.monotonic() + self.retry_delay
+            return None
+
+    def _disconnect(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def get(self, key):
+        reply = self._call("get", key)
+        if reply is None or reply.get("miss"):
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return reply["v"]
+
+    def set(self, key, value):
+        self._call("set", key, value)
+
+    def delete(self, key):
+        self._call("delete", key)
+
+    def clear(self):
+        self._call("clear")
+
+    def stats(self):
+        return {**super().stats(), "server": self._call("stats")}
+
+
+class MmapCache(BaseCache):
+    """Хэш-таблица фиксированного размера в разделяемом mmap-файле.
+
+    Воркеры хоста открывают один и тот же файл и видят записи друг
+    друга. Блокировок нет: каждая запись содержит CRC32, и запись,
+    повреждённая одновременной перезаписью, считается промахом. Значения
+    длиннее ``value_size`` байт не кэшируются и учитываются в
+    ``stats()["oversized"]``.
+    """
+
+    MAGIC = b"YCUT"
+    HEADER = struct.Struct("<4sII")
+    SLOT_HEADER = struct.Struct("<dHHI")
+    KEY_SIZE = 64
+    NEGATIVE = 0xFFFF
+    PROBES = 4
+
+    def __init__(self, path, slots=16384, value_size=MMAP_VALUE_SIZE,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.oversized = 0
+        self.slots = slots
+        self.value_size = value_size
+        self.slot_size = self.SLOT_HEADER.size + self.KEY_SIZE + value_size
+        size = self.HEADER.size + slots * self.slot_size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        header = self.HEADER.pack(self.MAGIC, slots, value_size)
+        if self._map[:self.HEADER.size] != header:
+            self.clear()
+            self._map[:self.HEADER.size] = header
+
+    def _offsets(self, key):
+        start = zlib.crc32(key)
+        for probe in range(self.PROBES):
+            yield (
+                self.HEADER.size
+                + (start + probe) % self.slots * self.slot_size
+            )
+
+    def _read(self, offset):
+        expires_at, key_len, value_len, crc = self.SLOT_HEADER.unpack_from(
+            self._map, offset
+        )
+        if not key_len or key_len > self.KEY_SIZE:
+            return None
+        body = offset + self.SLOT_HEADER.size
+        key = self._map[body:body + key_len]
+        size = 0 if value_len == self.NEGATIVE else value_len
+        if size > self.value_size:
+            return None
+        value_start = body + self.KEY_SIZE
+        value = self._map[value_start:value_start + size]
+        if zlib.crc32(value, zlib.crc32(key) ^ value_len) != crc:
+            return None
+        return key, expires_at, None if value_len == self.NEGATIVE else value
+
+    def _write(self, offset, key, value, expires_at):
+        value_len = self.NEGATIVE if value is None else len(value)
+        value = value or b""
+        crc = zlib.crc32(value, zlib.crc32(key) ^ value_len)
+        body = offset + self.SLOT_HEADER.size
+        self._map[body:body + len(key)] = key
+        self._map[body + self.KEY_SIZE:body + self.KEY_SIZE + len(value)] = (
+            value
+        )
+        self.SLOT_HEADER.pack_into(
+            self._map, offset, expires_at, len(key), value_len, crc
+        )
+
+    def get(self, key):
+        key = key.encode()
+        for offset in self._offsets(key):
+            entry = self._read(offset)
+            if entry is not None and entry[0] == key:
+                if entry[1] <= time.time():
+                    break
+                self.hits += 1
+                value = entry[2]
+                return value.decode() if value is not None else None
+        self.misses += 1
+        return MISSING
+
+    def set(self, key, value):
+        key = key.encode()
+        if value is not None:
+            value = value.encode()
+            if len(value) > self.value_size:
+                self.oversized += 1
+                return
+        if len(key) > self.KEY_SIZE:
+            self.oversized += 1
+            return
+        now = time.time()
+        target = None
+        for offset in self._offsets(key):
+            entry = self._read(offset)
+            if entry is None or entry[0] == key or entry[1] <= now:
+                target = offset
+                break
+        if target is None:
+            target = next(self._offsets(key))
+            self.evictions += 1
+        self._write(target, key, value, now + self._ttl_for(value))
+
+    def delete(self, key):
+        key = key.encode()
+        for offset in self._offsets(key):
+            entry = self._read(offset)
+            if entry is not None and entry[0] == key:
+                self.SLOT_HEADER.pack_into(self._map, offset, 0, 0, 0, 0)
+
+    def clear(self):
+        self._map[self.HEADER.size:] = bytes(
+            len(self._map) - self.HEADER.size
+        )
+
+    def stats(self):
+        return {**super().stats(), "oversized": self.oversized}
+
+
+def create_cache(config, backend=None):
+    """Создаёт кэш short -> original по настройкам приложения."""
+    backend = backend or config["URL_CACHE_BACKEND"]
+    ttls = {
+        "ttl": config["URL_CACHE_TTL"],
+        "negative_ttl": config["URL_CACHE_NEGATIVE_TTL"],
+    }
+    if backend == "local":
+        return LRUCache(
+            maxsize=config["URL_CACHE_MAXSIZE"],
+            max_bytes=config["URL_CACHE_MAX_BYTES"],
+            **ttls,
+        )
+    if backend == "socket":
+        return SocketCache(
+            config["URL_CACHE_SOCKET"],
+            timeout=config["URL_CACHE_SOCKET_TIMEOUT"],
+            **ttls,
+        )
+    if backend == "mmap":
+        return MmapCache(
+            config["URL_CACHE_MMAP_PATH"],
+            slots=config["URL_CACHE_MMAP_SLOTS"],
+            value_size=(
+                config["URL_CACHE_MMAP_VALUE_SIZE"] or MMAP_VALUE_SIZE
+            ),
+            **ttls,
+        )
+    raise ValueError(ERR_UNKNOWN_BACKEND.format(backend=backend))
@@ -0,0 +1,99 @@
+import time
+
+import click
+
+from yacut import app, db
+from yacut.cache import CacheServer, create_cache
+from yacut.dataset import (
+    SEED_BATCH_SIZE,
+    SEED_CUSTOM_SHARE,
+    SEED_DUPLICATE_SHARE,
+    SyntheticLinks,
+    seed_url_map,
+)
+from yacut.models import ShortIdPool, URLMap, shards
+
+CACHE_SERVER_STARTED = "Сервер кэша запущен на {address}"
+SHORT_POOL_FILLED = "В пул добавлено коротких идентификаторов: {count}"
+URLS_SEEDED = (
+    "Добавлено ссылок: {count} за {seconds:.1f} с ({rate:.0f} в секунду)"
+)
+ERR_NO_SHARDS = "Шарды не настроены: задайте DATABASE_SHARD_URIS"
+SHARDS_INITIALIZED = "Таблица url_map создана в шардах: {count}"
+SHARDS_REBALANCED = "Перенесено ссылок между шардами: {count}"
+
+
+@app.cli.command("cache-server")
+@click.option("--address", default=None, help="host:port или путь к сокету.")
+def cache_server(address):
+    """Запускает общий для воркеров сервер кэша коротких ссылок."""
+    address = address or app.config["URL_CACHE_SOCKET"]
+    server = CacheServer(address, create_cache(app.config, backend="local"))
+    click.echo(CACHE_SERVER_STARTED.format(address=address))
+    server.serve_forever()
+
+
+@app.cli.command("fill-short-pool")
+@click.option("--size", type=int, default=None, help="Целевой размер пула.")
+def fill_short_pool(size):
+    """Пополняет пул заранее сгенерированных коротких идентификаторов."""
+    click.echo(SHORT_POOL_FILLED.format(count=ShortIdPool.refill(size)))
+
+
+@app.cli.command("seed-urls")
+@click.option("--count", type=int, required=True, help="Число ссылок.")
+@click.option(
+    "--batch-size", type=int, default=SEED_BATCH_SIZE, show_default=True,
+    help="Строк на одну вставку и транзакцию.",
+)
+@click.option(
+    "--custom-share", type=float, default=SEED_CUSTOM_SHARE,
+    show_default=True, help="Доля пользовательских short.",
+)
+@click.option(
+    "--duplicate-share", type=float, default=SEED_DUPLICATE_SHARE,
+    show_default=True, help="Доля повторно сокращаемых популярных URL.",
+)
+@click.option("--seed", type=int, default=None, help="Зерно генератора.")
+def seed_urls(count, batch_size, custom_share, duplicate_share, seed):
+    """Заполняет url_map синтетическими ссылками для нагрузочных тестов."""
+    started = time.perf_counter()
+    with click.progressbar(length=count) as progress:
+        added = seed_url_map(
+            count,
+            batch_size,
+            SyntheticLinks(seed, custom_share, duplicate_share),
+            on_batch=lambda shorts: progress.update(len(shorts)),
+        )
+    seconds = time.perf_counter() - started
+    click.echo(URLS_SEEDED.format(
+        count=added, seconds=seconds, rate=added / seconds if seconds else 0
+    ))
+
+
+@app.cli.command("init-shards")
+def init_shards():
+    """Создаёт таблицу url_map во всех шардах, где её ещё нет."""
+    if not shards:
+        raise click.ClickException(ERR_NO_SHARDS)
+    shards.create_all(db.metadata, [URLMap.__table__])
+    click.echo(SHARDS_INITIALIZED.format(count=len(shards.engines)))
+
+
+@app.cli.command("rebalance-shards")
+@click.option(
+    "--batch-size", type=int, default=None,
+    help="Строк на одно чтение шарда (по умолчанию SHARD_REBALANCE_BATCH).",
+)
+def rebalance_shards(batch_size):
+    """Переносит ссылки в положенные им шарды после добавления шардов."""
+    if not shards:
+        raise click.ClickException(ERR_NO_SHARDS)
+    shards.create_all(db.metadata, [URLMap.__table__])
+    with click.progressbar(length=shards.count(URLMap.__table__)) as progress:
+        moved = shards.rebalance(
+            URLMap.__table__,
+            batch_size or app.config["SHARD_REBALANCE_BATCH"],
+            on_batch=progress.update,
+        )
+    click.echo(SHARDS_REBALANCED.format(count=moved))
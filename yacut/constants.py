@@ -4,9 +4,18 @@ import string
 
 ORIGINAL_MAX_LEN = 2048
 SHORT_MAX_LEN = 16
-RESERVED_SHORTS = {"files"}
+RESERVED_SHORTS = {"files", "metrics"}
 SHORT_ALPHABET = string.ascii_letters + string.digits
 SHORT_LENGTH = 6
 MAX_GENERATION_ATTEMPTS = 100
 ALLOWED_RE = rf"^[{re.escape(SHORT_ALPHABET)}]+$"
 REDIRECT_VIEW_NAME = "redirect_short"
+BULK_QUERY_CHUNK_SIZE = 500
+FILENAME_MAX_LEN = 255
+REFERRER_MAX_LEN = 255
+SHA256_HEX_LEN = 64
+UPLOAD_ERROR_MAX_LEN = 1024
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
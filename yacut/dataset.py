@@ -0,0 +1,127 @@
+import random
+import string
+from datetime import datetime, timedelta, timezone
+
+from yacut.constants import RESERVED_SHORTS, SHORT_MAX_LEN
+from yacut.models import URLMap, url_cache
+
+SEED_BATCH_SIZE = 50000
+SEED_CUSTOM_SHARE = 0.1
+SEED_DUPLICATE_SHARE = 0.2
+SEED_PERIOD_DAYS = 365
+SEED_HOT_URLS = 1000
+
+DOMAINS = (
+    "youtube.com", "github.com", "wikipedia.org", "python.org",
+    "stackoverflow.com", "yandex.ru", "habr.com", "vk.com", "ozon.ru",
+    "docs.google.com", "medium.com", "reddit.com", "example.com",
+)
+WORDS = (
+    "docs", "blog", "news", "post", "item", "watch", "article", "user",
+    "search", "catalog", "product", "wiki", "issues", "release", "api",
+)
+
+
+class SyntheticLinks:
+    """Генератор правдоподобных данных для url_map.
+
+    Домены и популярные ссылки выбираются по закону Ципфа, часть ссылок
+    повторяет уже сокращённые адреса, часть short — пользовательские
+    варианты разной длины.
+    """
+
+    def __init__(self, seed=None, custom_share=SEED_CUSTOM_SHARE,
+                 duplicate_share=SEED_DUPLICATE_SHARE):
+        self.random = random.Random(seed)
+        self.custom_share = custom_share
+        self.duplicate_share = duplicate_share
+        self.domain_weights = [
+            1 / rank for rank in range(1, len(DOMAINS) + 1)
+        ]
+        self.hot_urls = [self.url() for _ in range(SEED_HOT_URLS)]
+        self.hot_weights = [
+            1 / rank for rank in range(1, SEED_HOT_URLS + 1)
+        ]
+        self.now = datetime.now(timezone.utc)
+
+    def segment(self) -> str:
+        rng = self.random
+        if rng.random() < 0.5:
+            return rng.choice(WORDS)
+        return "".join(rng.choices(
+            string.ascii_lowercase + string.digits, k=rng.randint(4, 16)
+        ))
+
+    def url(self) -> str:
+        rng = self.random
+        domain = rng.choices(DOMAINS, self.domain_weights)[0]
+        path = "/".join(
+            self.segment() for _ in range(rng.randint(1, 5))
+        )
+        url = f"https://{domain}/{path}"
+        if rng.random() < 0.3:
+            url += "?" + "&".join(
+                f"{rng.choice(WORDS)}={rng.randint(1, 10 ** 6)}"
+                for _ in range(rng.randint(1, 4))
+            )
+        return url
+
+    def original(self) -> str:
+        if self.random.random() < self.duplicate_share:
+            return self.random.choices(self.hot_urls, self.hot_weights)[0]
+        return self.url()
+
+    def custom_short(self) -> str:
+        rng = self.random
+        short = rng.choice(WORDS)
+        if rng.random() < 0.7:
+            short += str(rng.randint(1, 10 ** rng.randint(1, 6)))
+        return short[:SHORT_MAX_LEN]
+
+    def custom_count(self, size: int) -> int:
+        return sum(
+            1 for _ in range(size) if self.random.random() < self.custom_share
+        )
+
+    def timestamp(self) -> datetime:
+        return self.now - timedelta(
+            seconds=self.random.uniform(0, SEED_PERIOD_DAYS * 86400)
+        )
+
+
+def seed_url_map(count: int, batch_size: int = SEED_BATCH_SIZE,
+                 links: SyntheticLinks = None, on_batch=None) -> int:
+    """Добавляет в url_map ``count`` синтетических ссылок.
+
+    Строки вставляются пачками по ``batch_size`` одним executemany и
+    одним коммитом на пачку. Сгенерированные short выдаются настроенной
+    стратегией, пользовательские — проверяются на занятость. После
+    каждой пачки вызывается ``on_batch`` со списком её short.
+    Возвращает число добавленных строк.
+    """
+    links = links or SyntheticLinks()
+    added = 0
+    while added < count:
+        size = min(batch_size, count - added)
+        custom = {
+            links.custom_short() for _ in range(links.custom_count(size))
+        }
+        custom -= RESERVED_SHORTS | URLMap.existing_shorts(custom)
+        shorts = list(custom) + URLMap.generate_shorts(
+            size - len(custom), taken=custom
+        )
+        links.random.shuffle(shorts)
+        URLMap.insert_rows([
+            {
+                "original": links.original(),
+                "short": short,
+                "timestamp": links.timestamp(),
+            }
+            for short in shorts
+        ])
+        added += size
+        if on_batch is not None:
+            on_batch(shorts)
+    # Негативные записи кэша могли устареть для любого из новых short.
+    url_cache.clear()
+    return added
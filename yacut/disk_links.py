@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from settings import Config
+from yacut.async_upload import fetch_download_href, upload_loop
+
+
+def href_expires_in(href, default_ttl):
+    """Срок жизни ссылки на скачивание в секундах.
+
+    Ссылки Диска содержат параметр ``expires`` с unix-временем; если его
+    нет или он дальше ``default_ttl``, используется ``default_ttl``.
+    """
+    try:
+        expires = float(parse_qs(urlsplit(href).query)["expires"][0])
+    except (KeyError, IndexError, ValueError):
+        return default_ttl
+    return min(max(expires - time.time(), 0.0), default_ttl)
+
+
+class DownloadLinkResolver:
+    """Кэш ссылок на скачивание файлов с Диска по их путям.
+
+    Ссылка, срок которой подходит к концу, отдаётся из кэша, а новая
+    запрашивается в фоновом цикле загрузок. Запросы к API Диска идут
+    только в фоне: без действующей ссылки ``resolve`` сразу возвращает
+    None, и вызывающий отдаёт ссылку, сохранённую при загрузке.
+    """
+
+    def __init__(self, ttl=3600, refresh_ahead=600, maxsize=10000,
+                 timeout=10):
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def store(self, remote_path, href):
+        """Кэширует свежую ссылку на скачивание."""
+        expires_at = time.monotonic() + href_expires_in(href, self.ttl)
+        with self._lock:
+            self._entries[remote_path] = (href, expires_at)
+            self._entries.move_to_end(remote_path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def resolve(self, remote_path):
+        """Действующая ссылка из кэша или None, не дожидаясь API Диска.
+
+        Ссылка, которой нет или срок которой подходит к концу, заодно
+        запрашивается в фоне.
+        """
+        with self._lock:
+            entry = self._entries.get(remote_path)
+        now = time.monotonic()
+        if entry is None or now >= entry[1] - self.refresh_ahead:
+            self._refresh_later(remote_path)
+        if entry is not None and now < entry[1]:
+            return entry[0]
+        return None
+
+    def _refresh_later(self, remote_path):
+        with self._lock:
+            if remote_path in self._refreshing:
+                return
+            self._refreshing.add(remote_path)
+        upload_loop.submit(self._fetch(remote_path))
+
+    async def _fetch(self, remote_path):
+        try:
+            href = await asyncio.wait_for(
+                fetch_download_href(await upload_loop.session(), remote_path),
+                self.timeout,
+            )
+            self.store(remote_path, href)
+            return href
+        finally:
+            with self._lock:
+                self._refreshing.discard(remote_path)
+
+
+download_links = DownloadLinkResolver(
+    ttl=Config.DISK_HREF_TTL,
+    refresh_ahead=Config.DISK_HREF_REFRESH_AHEAD,
+    maxsize=Config.DISK_HREF_CACHE_SIZE,
+    timeout=Config.DISK_HREF_FETCH_TIMEOUT,
+)
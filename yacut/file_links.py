@@ -0,0 +1,98 @@
+from yacut import app, db
+from yacut.async_upload import content_path, file_digest, upload_files_sync
+from yacut.disk_links import download_links
+from yacut.models import UploadedFile, URLMap
+
+
+def upload_keys(files) -> list:
+    """Ключи файлов: хэши содержимого или, без дедупликации, позиции."""
+    if app.config["UPLOAD_DEDUPLICATE"]:
+        return [file_digest(file_obj.stream) for file_obj in files]
+    return list(range(len(files)))
+
+
+def find_known(keys) -> dict:
+    """Возвращает short уже загруженных файлов по их ключам."""
+    if app.config["UPLOAD_DEDUPLICATE"]:
+        return UploadedFile.find(keys)
+    return {}
+
+
+def remote_path_for(key, file_obj):
+    """Путь на Диске: по хэшу содержимого или, без хэша, по имени."""
+    if isinstance(key, str):
+        return content_path(key, file_obj.filename)
+    return None
+
+
+def link_uploaded_many(uploads) -> list:
+    """Создаёт короткие ссылки на загруженные файлы одной транзакцией.
+
+    ``uploads`` — пары (ключ, UploadResult) успешных загрузок. Ссылки и
+    записи о содержимом файлов сохраняются одним коммитом, а полученные
+    при загрузке ссылки на скачивание сразу попадают в ``download_links``.
+    Возвращает short в порядке ``uploads``.
+    """
+    uploads = list(uploads)
+    try:
+        mappings = URLMap.create_many(
+            [(result.url, None) for _, result in uploads],
+            remote_paths=[result.remote_path for _, result in uploads],
+            commit=False,
+        )
+        UploadedFile.remember_many(
+            (key, result.remote_path, mapping.short)
+            for (key, result), mapping in zip(uploads, mappings)
+            if isinstance(key, str)
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for _, result in uploads:
+        if result.remote_path:
+            download_links.store(result.remote_path, result.url)
+    return [mapping.short for mapping in mappings]
+
+
+def link_uploaded(key, result) -> str:
+    """Создаёт короткую ссылку на один загруженный файл."""
+    return link_uploaded_many([(key, result)])[0]
+
+
+def upload_file_links(files) -> list:
+    """Загружает файлы на Диск, пропуская уже загруженное содержимое.
+
+    Одинаковые файлы внутри одной отправки загружаются один раз.
+    Возвращает словари с ключами filename и short либо error в порядке
+    ``files``.
+    """
+    keys = upload_keys(files)
+    known = find_known(keys)
+    pending = {}
+    for key, file_obj in zip(keys, files):
+        if key not in known:
+            pending.setdefault(key, file_obj)
+    results = upload_files_sync(
+        list(pending.values()),
+        remote_paths=[
+            remote_path_for(key, file_obj)
+            for key, file_obj in pending.items()
+        ],
+    )
+    errors = {}
+    uploaded = []
+    for key, result in zip(pending, results):
+        if result.ok:
+            uploaded.append((key, result))
+        else:
+            errors[key] = result.error
+    known.update(zip(
+        (key for key, _ in uploaded), link_uploaded_many(uploaded)
+    ))
+    return [
+        {"filename": file_obj.filename, "short": known[key]}
+        if key in known
+        else {"filename": file_obj.filename, "error": errors[key]}
+        for key, file_obj in zip(keys, files)
+    ]
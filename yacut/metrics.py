@@ -0,0 +1,234 @@
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+REQUEST_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+FAST_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 1,
+)
+UPLOAD_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+def _escape(value) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _format_sample(name, labels, value) -> str:
+    if labels:
+        name += "{" + ",".join(
+            f'{key}="{_escape(label)}"' for key, label in labels
+        ) + "}"
+    return f"{name} {value!r}"
+
+
+class Metric:
+    """Метрика с набором меток, значения которой хранятся в процессе."""
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key) -> list:
+        return list(zip(self.labelnames, key))
+
+    def samples(self):
+        """Возвращает тройки (имя, метки, значение) для вывода."""
+        raise NotImplementedError
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name + "_total", self._labels(key), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * len(self.buckets) + [0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {
+                key: list(counts) for key, counts in self._values.items()
+            }
+        for key, counts in sorted(values.items()):
+            labels = self._labels(key)
+            for bound, count in zip(self.buckets, counts):
+                yield self.name + "_bucket", labels + [("le", bound)], count
+            yield self.name + "_bucket", labels + [("le", "+Inf")], counts[-2]
+            yield self.name + "_sum", labels, counts[-1]
+            yield self.name + "_count", labels, counts[-2]
+
+
+class Registry:
+    """Набор метрик процесса в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(
+                _format_sample(*sample) for sample in metric.samples()
+            )
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+request_duration = registry.register(Histogram(
+    "yacut_request_duration_seconds",
+    "Время обработки HTTP-запроса.",
+    ("endpoint", "method", "status"),
+))
+request_queries = registry.register(Histogram(
+    "yacut_request_db_queries",
+    "Число SQL-запросов на один HTTP-запрос.",
+    ("endpoint",),
+    buckets=COUNT_BUCKETS,
+))
+db_query_duration = registry.register(Histogram(
+    "yacut_db_query_duration_seconds",
+    "Время выполнения SQL-запроса.",
+    ("operation",),
+    buckets=FAST_BUCKETS,
+))
+cache_lookup_duration = registry.register(Histogram(
+    "yacut_cache_lookup_duration_seconds",
+    "Время поиска в кэше коротких ссылок.",
+    ("result",),
+    buckets=FAST_BUCKETS,
+))
+upload_stage_duration = registry.register(Histogram(
+    "yacut_upload_stage_duration_seconds",
+    "Время запросов к API Диска по этапам загрузки.",
+    ("stage",),
+    buckets=UPLOAD_BUCKETS,
+))
+visits_flushed = registry.register(Counter(
+    "yacut_visits_flushed",
+    "Переходы по коротким ссылкам, записанные в статистику.",
+))
+visits_dropped = registry.register(Counter(
+    "yacut_visits_dropped",
+    "Переходы, не попавшие в статистику из-за переполнения буфера "
+    "или ошибки записи.",
+))
+upload_requests = registry.register(Counter(
+    "yacut_upload_requests",
+    "Запросы к API Диска по этапам загрузки и статусам ответа.",
+    ("stage", "status"),
+))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    started = conn.info["query_started"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper()
+    db_query_duration.observe(
+        time.perf_counter() - started, operation=operation
+    )
+    if has_request_context() and "metrics_queries" in g:
+        g.metrics_queries += 1
+
+
+def _handle_error(context):
+    if context.connection is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_queries = 0
+
+
+def _after_request(response):
+    if "metrics_started" in g:
+        endpoint = request.endpoint or "unknown"
+        request_duration.observe(
+            time.perf_counter() - g.metrics_started,
+            endpoint=endpoint,
+            method=request.method,
+            status=response.status_code,
+        )
+        request_queries.observe(g.metrics_queries, endpoint=endpoint)
+    return response
+
+
+def init_metrics(app):
+    """Подключает сбор метрик запросов и SQL-запросов к приложению."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    if not event.contains(
+        Engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
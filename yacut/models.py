@@ -1,19 +1,56 @@
+import atexit
+import hashlib
 import random
 import re
+import time
+import uuid
 from datetime import datetime, timezone
+from http import HTTPStatus
 
-from flask import url_for
+from flask import abort, url_for
+from sqlalchemy import (
+    bindparam,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 
-from yacut import db
+from yacut import app, db
+from yacut.analytics import VisitRecorder
+from yacut.cache import MISSING, create_cache
 from yacut.constants import (
     ALLOWED_RE,
+    BULK_QUERY_CHUNK_SIZE,
+    FILENAME_MAX_LEN,
+    JOB_DONE,
+    JOB_FAILED,
+    JOB_PENDING,
     MAX_GENERATION_ATTEMPTS,
     ORIGINAL_MAX_LEN,
     REDIRECT_VIEW_NAME,
+    REFERRER_MAX_LEN,
     RESERVED_SHORTS,
     SHORT_ALPHABET,
     SHORT_LENGTH,
+    SHA256_HEX_LEN,
     SHORT_MAX_LEN,
+    UPLOAD_ERROR_MAX_LEN,
+)
+from yacut.disk_links import download_links
+from yacut.metrics import cache_lookup_duration
+from yacut.replicas import MISSING_REPLICA, init_replicas
+from yacut.shards import init_shards
+from yacut.short_ids import (
+    ERR_NO_SECRET,
+    PoolAllocator,
+    SequenceAllocator,
+    sequence_key,
 )
 
 ERR_SHORT_EXISTS = "Предложенный вариант короткой ссылки уже существует."
@@ -22,52 +59,418 @@ ERR_GENERATION_FAILED = (
     "Не удалось сгенерировать уникальный короткий идентификатор "
     f"после {MAX_GENERATION_ATTEMPTS} попыток"
 )
+ERR_UNKNOWN_STRATEGY = "Неизвестная стратегия генерации short: {strategy}"
+ERR_ORIGINAL_INVALID = "Указан недопустимый оригинальный URL"
 ERR_ORIGINAL_TOO_LONG = (
     f"Максимальная длина оригинального URL — {ORIGINAL_MAX_LEN} символов."
 )
 
+URL_MAP_SEQUENCE = "url_map"
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+STATS_HOUR = "hour"
+STATS_DAY = "day"
+STATS_TOTAL = "total"
+STATS_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Значение в кэше для ссылки на файл: MARK + путь на Диске + MARK + original.
+FILE_LINK_MARK = "\x00"
+
+url_cache = create_cache(app.config)
+replicas = init_replicas(app, db)
+shards = init_shards(app, db)
+
+
+def original_hash(original: str) -> str:
+    """SHA-256 оригинального URL для индексированного поиска дублей."""
+    return hashlib.sha256(original.encode()).hexdigest()
+
+
+def _original_hash_default(context):
+    return original_hash(context.get_current_parameters()["original"])
+
+
+def url_map_shards() -> list:
+    """Номера шардов url_map; ``[None]``, если таблица в основной базе."""
+    return list(range(len(shards.engines))) if shards else [None]
+
+
+def url_map_execute(statement, shard: int = None) -> list:
+    """Выполняет запрос к url_map основной базы или шарда ``shard``."""
+    if shard is None:
+        return db.session.execute(statement).all()
+    with shards.engines[shard].connect() as connection:
+        return connection.execute(statement).all()
+
+
+class ShortIdSequence(db.Model):
+    """Счётчик, из которого воркеры резервируют блоки номеров для short."""
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False)
+
+    @staticmethod
+    def reserve(size: int, name: str = URL_MAP_SEQUENCE) -> int:
+        """Атомарно резервирует ``size`` номеров и возвращает первый.
+
+        Резервирование идёт в отдельной транзакции, чтобы блок не
+        зависел от исхода транзакции запроса.
+        """
+        table = ShortIdSequence.__table__
+        for _ in range(MAX_GENERATION_ATTEMPTS):
+            with db.engine.begin() as connection:
+                if connection.execute(
+                    update(table)
+                    .where(table.c.name == name)
+                    .values(value=table.c.value + size)
+                ).rowcount:
+                    return connection.scalar(
+                        select(table.c.value).where(table.c.name == name)
+                    ) - size
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(
+                        insert(table).values(name=name, value=size)
+                    )
+                return 0
+            except IntegrityError:
+                continue
+        raise RuntimeError(ERR_GENERATION_FAILED)
+
+
+if app.config["SHORT_ID_STRATEGY"] == "sequence" and not (
+    app.config["SHORT_ID_SECRET"]
+):
+    raise RuntimeError(ERR_NO_SECRET)
+short_id_sequence = SequenceAllocator(
+    ShortIdSequence.reserve,
+    key=sequence_key(app.config["SHORT_ID_SECRET"]),
+    block_size=app.config["SHORT_ID_BLOCK_SIZE"],
+)
+
 
 class URLMap(db.Model):
     """Модель для хранения оригинальных и коротких URL."""
 
     id = db.Column(db.Integer, primary_key=True)
     original = db.Column(db.String(ORIGINAL_MAX_LEN), nullable=False)
+    # original слишком длинный для индекса, поэтому дубли ищутся по хэшу.
+    original_hash = db.Column(
+        db.String(SHA256_HEX_LEN),
+        index=True,
+        default=_original_hash_default,
+    )
     short = db.Column(db.String(SHORT_MAX_LEN), unique=True, nullable=False)
+    remote_path = db.Column(db.String(ORIGINAL_MAX_LEN))
     timestamp = db.Column(
         db.DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
+    # Покрывающий индекс для поиска по short в PostgreSQL: original и
+    # remote_path добавлены через INCLUDE, чтобы длинные URL не входили в
+    # ключ, и читаются index-only scan без обращения к таблице.
+    __table_args__ = (
+        db.Index(
+            "ix_url_map_short_covering", "short",
+            postgresql_include=["original", "remote_path"],
+        ).ddl_if(dialect="postgresql"),
+    )
 
     @staticmethod
-    def get_or_404(short: str):
+    def _cache_value(original: str, remote_path: str = None) -> str:
+        if remote_path:
+            return FILE_LINK_MARK + remote_path + FILE_LINK_MARK + original
+        return original
+
+    @staticmethod
+    def _from_cache(short: str, value: str) -> "URLMap":
+        if value.startswith(FILE_LINK_MARK):
+            remote_path, original = value[1:].split(FILE_LINK_MARK, 1)
+            return URLMap(
+                original=original, short=short, remote_path=remote_path
+            )
+        return URLMap(original=value, short=short)
+
+    @staticmethod
+    def get_or_404(short: str, *, replica: bool = False):
         """Получить объект по short, если нет — 404."""
-        return URLMap.query.filter_by(short=short).first_or_404()
+        mapping = URLMap.get(short, replica=replica)
+        if mapping is None:
+            abort(HTTPStatus.NOT_FOUND)
+        return mapping
 
     @staticmethod
-    def get(short: str):
-        """Возвращает объект URLMap по short или None, если не найден."""
-        return URLMap.query.filter_by(short=short).first()
+    def lookup(short: str, *, replica: bool = False):
+        """Ищет ссылку по short без загрузки сущности в сессию.
+
+        Запрос ``SHORT_LOOKUP`` выбирает только original и remote_path; в
+        PostgreSQL он обслуживается покрывающим индексом. С ``replica``
+        запрос уходит на реплику; если реплик нет или ссылка на реплике
+        ещё не появилась из-за отставания репликации, он повторяется на
+        основной базе. Проверки уникальности и запись всегда идут на
+        основную базу. При шардировании запрос выполняется в шарде short,
+        а реплики не используются.
+        """
+        parameters = {"short": short}
+        if shards:
+            row = shards.first(short, SHORT_LOOKUP, parameters)
+        else:
+            row = MISSING_REPLICA
+            if replica and replicas:
+                row = replicas.first(SHORT_LOOKUP, parameters)
+            if row is None or row is MISSING_REPLICA:
+                row = db.session.connection().execute(
+                    SHORT_LOOKUP, parameters
+                ).first()
+        if row is None:
+            return None
+        return URLMap(
+            original=row.original, short=short, remote_path=row.remote_path
+        )
+
+    @staticmethod
+    def get(short: str, *, use_cache: bool = True, replica: bool = False):
+        """Возвращает объект URLMap по short или None, если не найден.
+
+        Возвращается не связанный с сессией объект, в котором заполнены
+        только поля short, original и remote_path. ``replica`` разрешает
+        читать с реплики (см. ``lookup``).
+        """
+        if not use_cache:
+            return URLMap.lookup(short, replica=replica)
+        started = time.perf_counter()
+        value = url_cache.get(short)
+        cache_lookup_duration.observe(
+            time.perf_counter() - started,
+            result="miss" if value is MISSING else "hit",
+        )
+        if value is MISSING:
+            mapping = URLMap.lookup(short, replica=replica)
+            url_cache.set(short, URLMap._cache_value(
+                mapping.original, mapping.remote_path
+            ) if mapping else None)
+            return mapping
+        if value is None:
+            return None
+        return URLMap._from_cache(short, value)
+
+    def destination(self) -> str:
+        """Адрес для перенаправления.
+
+        Для файлов на Диске это текущая ссылка на скачивание из
+        ``download_links``; пока её нет в кэше, — сохранённая при загрузке.
+        """
+        if self.remote_path:
+            return download_links.resolve(self.remote_path) or self.original
+        return self.original
 
     @staticmethod
     def generate_short() -> str:
         """Сгенерировать уникальное значение short."""
+        return URLMap.generate_shorts(1)[0]
+
+    @staticmethod
+    def _strategy() -> str:
+        strategy = app.config["SHORT_ID_STRATEGY"]
+        if strategy not in ("random", "sequence", "pool"):
+            raise ValueError(ERR_UNKNOWN_STRATEGY.format(strategy=strategy))
+        return strategy
+
+    @staticmethod
+    def _sequence_shorts(count: int, taken=()) -> list:
+        """Выдаёт short из счётчика без проверочных запросов к базе.
+
+        Номера счётчика не повторяются, поэтому занятыми могут оказаться
+        только совпавшие с ними пользовательские варианты.
+        """
+        taken = set(taken) | RESERVED_SHORTS
+        shorts = []
+        while len(shorts) < count:
+            shorts.extend(
+                short for short in short_id_sequence.shorts(
+                    count - len(shorts)
+                )
+                if short not in taken
+            )
+        return shorts
+
+    @staticmethod
+    def existing_shorts(shorts) -> set:
+        """Возвращает те из переданных short, что уже есть в базе.
+
+        При шардировании каждый short ищется только в своих шардах.
+        """
+        groups = (
+            shards.group(shorts, read=True) if shards else {None: list(shorts)}
+        )
+        existing = set()
+        for shard, group in groups.items():
+            for start in range(0, len(group), BULK_QUERY_CHUNK_SIZE):
+                existing.update(short for short, in url_map_execute(
+                    select(URLMap.short).where(URLMap.short.in_(
+                        group[start:start + BULK_QUERY_CHUNK_SIZE]
+                    )),
+                    shard,
+                ))
+        return existing
+
+    @staticmethod
+    def _unclaimed_shorts(draw, count: int, taken=()) -> list:
+        """Short из ``draw``, не занятые пользовательскими вариантами.
+
+        Счётчик и пул не знают о short, созданных пользователями позже
+        резервирования, поэтому выданные ими short сверяются с базой
+        одним запросом на раунд, а занятые заменяются новыми. Пачечная
+        вставка не повторяет строки при нарушении уникальности, поэтому
+        проверка нужна до неё.
+        """
+        taken = set(taken)
+        shorts = []
         for _ in range(MAX_GENERATION_ATTEMPTS):
+            drawn = draw(count - len(shorts), taken)
+            existing = URLMap.existing_shorts(drawn)
+            shorts += [short for short in drawn if short not in existing]
+            if len(shorts) == count:
+                return shorts
+            taken |= set(drawn)
+        raise RuntimeError(ERR_GENERATION_FAILED)
+
+    @staticmethod
+    def generate_shorts(count: int, taken=()) -> list:
+        """Сгенерировать пачку уникальных short выбранной стратегией."""
+        strategy = URLMap._strategy()
+        if strategy == "sequence":
+            return URLMap._unclaimed_shorts(
+                URLMap._sequence_shorts, count, taken
+            )
+        if strategy == "pool":
+            return URLMap._unclaimed_shorts(URLMap._pool_shorts, count, taken)
+        return URLMap._random_shorts(count, taken)
+
+    @staticmethod
+    def _candidate_short() -> str:
+        """Short для вставки без проверки занятости.
+
+        Ни одна стратегия не ходит в базу с проверкой: коллизию с
+        пользовательским short поймает уникальный индекс.
+        """
+        strategy = URLMap._strategy()
+        if strategy == "sequence":
+            return URLMap._sequence_shorts(1)[0]
+        if strategy == "pool":
+            return URLMap._pool_shorts(1)[0]
+        while True:
             short = "".join(random.choices(SHORT_ALPHABET, k=SHORT_LENGTH))
-            if short not in RESERVED_SHORTS and not URLMap.get(short):
+            if short not in RESERVED_SHORTS:
                 return short
+
+    @staticmethod
+    def _random_shorts(count: int, taken=()) -> list:
+        """Сгенерировать случайные short одним запросом на раунд."""
+        taken = set(taken) | RESERVED_SHORTS
+        shorts = set()
+        for _ in range(MAX_GENERATION_ATTEMPTS):
+            candidates = {
+                "".join(random.choices(SHORT_ALPHABET, k=SHORT_LENGTH))
+                for _ in range(count - len(shorts))
+            } - taken - shorts
+            shorts |= candidates - URLMap.existing_shorts(candidates)
+            if len(shorts) == count:
+                return list(shorts)
         raise RuntimeError(ERR_GENERATION_FAILED)
 
     @staticmethod
-    def create(
+    def _pool_shorts(count: int, taken=()) -> list:
+        """Выдаёт short из пула, при его нехватке — случайные."""
+        taken = set(taken) | RESERVED_SHORTS
+        shorts = [
+            short for short in short_id_pool.shorts(count)
+            if short not in taken
+        ]
+        if len(shorts) < count:
+            shorts += URLMap._random_shorts(
+                count - len(shorts), taken | set(shorts)
+            )
+        return shorts
+
+    @staticmethod
+    def _reuses_existing(short: str = None, remote_path: str = None) -> bool:
+        """Нужно ли отдавать уже существующую ссылку на тот же адрес.
+
+        Включается настройкой ``URL_REUSE_EXISTING`` и касается только
+        сгенерированных short обычных ссылок, не ссылок на файлы.
+        """
+        return (
+            app.config["URL_REUSE_EXISTING"] and not short
+            and not remote_path
+        )
+
+    @staticmethod
+    def find_by_original(original: str):
+        """Самая ранняя обычная ссылка на ``original`` или None."""
+        if shards:
+            short = URLMap.existing_originals([original]).get(original)
+            return URLMap(original=original, short=short) if short else None
+        return URLMap.query.filter_by(
+            original_hash=original_hash(original),
+            original=original,
+            remote_path=None,
+        ).order_by(URLMap.id).first()
+
+    @staticmethod
+    def _first_originals(originals, hashes, shard=None) -> dict:
+        """Самые ранние по id ссылки на ``originals`` в одном шарде.
+
+        Возвращает пары (время создания, short) по original.
+        """
+        found = {}
+        for start in range(0, len(hashes), BULK_QUERY_CHUNK_SIZE):
+            rows = url_map_execute(
+                select(URLMap.original, URLMap.timestamp, URLMap.short)
+                .where(
+                    URLMap.original_hash.in_(
+                        hashes[start:start + BULK_QUERY_CHUNK_SIZE]
+                    ),
+                    URLMap.remote_path.is_(None),
+                )
+                .order_by(URLMap.id),
+                shard,
+            )
+            for original, timestamp, short in rows:
+                if original in originals:
+                    found.setdefault(original, (timestamp, short))
+        return found
+
+    @staticmethod
+    def existing_originals(originals) -> dict:
+        """Возвращает short уже сокращённых адресов из ``originals``.
+
+        Как и ``find_by_original``, учитывает только обычные ссылки и из
+        нескольких ссылок на один адрес выбирает самую раннюю. Адрес может
+        быть сокращён в любом шарде, поэтому при шардировании опрашиваются
+        все шарды, а самая ранняя ссылка выбирается по времени создания.
+        """
+        originals = set(originals)
+        hashes = list({original_hash(original) for original in originals})
+        found = {}
+        for shard in url_map_shards():
+            for original, first in URLMap._first_originals(
+                originals, hashes, shard
+            ).items():
+                found[original] = min(found.get(original, first), first)
+        return {original: short for original, (_, short) in found.items()}
+
+    @staticmethod
+    def check(
         original: str,
         short: str = None,
         *,
         validate: bool = True
-    ) -> "URLMap":
-        """Создаёт и сохраняет объект URLMap."""
+    ) -> None:
+        """Проверяет данные ссылки без обращения к базе."""
         if validate and len(original) > ORIGINAL_MAX_LEN:
             raise ValueError(ERR_ORIGINAL_TOO_LONG)
+        if original.startswith(FILE_LINK_MARK):
+            raise ValueError(ERR_ORIGINAL_INVALID)
         if short:
             if validate and len(short) > SHORT_MAX_LEN:
                 raise ValueError(ERR_SHORT_INVALID)
@@ -75,19 +478,608 @@ class URLMap(db.Model):
                 raise ValueError(ERR_SHORT_EXISTS)
             if validate and re.match(ALLOWED_RE, short) is None:
                 raise ValueError(ERR_SHORT_INVALID)
-            if URLMap.get(short):
-                raise ValueError(ERR_SHORT_EXISTS)
-        else:
-            short = URLMap.generate_short()
 
-        mapping = URLMap(original=original, short=short)
-        db.session.add(mapping)
-        db.session.commit()
-        return mapping
+    @staticmethod
+    def create(
+        original: str,
+        short: str = None,
+        *,
+        validate: bool = True,
+        remote_path: str = None
+    ) -> "URLMap":
+        """Создаёт и сохраняет объект URLMap.
 
-    def short_url(self) -> str:
+        ``remote_path`` указывается для ссылок на файлы на Диске: по нему
+        при переходе запрашивается актуальная ссылка на скачивание.
+        Занятость short не проверяется заранее: запись вставляется в
+        savepoint, и нарушение уникальности либо сообщается как ошибка
+        для пользовательского short, либо приводит к повтору с новым
+        сгенерированным. При ``URL_REUSE_EXISTING`` для уже сокращённого
+        адреса без пользовательского short возвращается существующая
+        ссылка. При коллизии транзакция сессии откатывается, поэтому
+        вызывать метод нужно без несохранённых изменений в сессии.
+        """
+        URLMap.check(original, short, validate=validate)
+        if URLMap._reuses_existing(short, remote_path):
+            mapping = URLMap.find_by_original(original)
+            if mapping is not None:
+                return mapping
+        for _ in range(MAX_GENERATION_ATTEMPTS):
+            candidate = short or URLMap._candidate_short()
+            mapping = URLMap(
+                original=original, short=candidate, remote_path=remote_path
+            )
+            if not URLMap._save(mapping):
+                if short:
+                    raise ValueError(ERR_SHORT_EXISTS)
+                continue
+            url_cache.set(
+                candidate, URLMap._cache_value(original, remote_path)
+            )
+            return mapping
+        raise RuntimeError(ERR_GENERATION_FAILED)
+
+    @staticmethod
+    def _save(mapping) -> bool:
+        """Сохраняет новую ссылку; False, если её short уже занят.
+
+        При шардировании строка вставляется в шард short. Пока после
+        добавления шардов не завершён перенос строк, short дополнительно
+        ищется в прежнем шарде: там его уникальность не защищена индексом.
+        """
+        if not shards:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(mapping)
+            except IntegrityError:
+                # Внешняя транзакция держит блокировку записи SQLite, а
+                # следующий кандидат может резервироваться через отдельное
+                # соединение (счётчик, пул): без отката оно ждало бы её
+                # до busy_timeout. Откат, а не коммит, чтобы неудачная
+                # вставка не сохраняла чужие изменения сессии.
+                db.session.rollback()
+                return False
+            db.session.commit()
+            return True
+        if shards.previous_count and URLMap.existing_shorts([mapping.short]):
+            return False
+        try:
+            shards.insert(URLMap.__table__, [{
+                "original": mapping.original,
+                "short": mapping.short,
+                "remote_path": mapping.remote_path,
+            }])
+        except IntegrityError:
+            return False
+        return True
+
+    @staticmethod
+    def insert_rows(rows, *, commit: bool = True) -> None:
+        """Вставляет пачку строк url_map одним executemany.
+
+        При шардировании строки раскладываются по шардам и каждая группа
+        коммитится в своём шарде сразу, независимо от ``commit`` и от
+        транзакции сессии основной базы.
+        """
+        if not rows:
+            return
+        if shards:
+            shards.insert(URLMap.__table__, rows)
+            return
+        db.session.execute(insert(URLMap.__table__), rows)
+        if commit:
+            db.session.commit()
+
+    @staticmethod
+    def _check_many(items, validate, return_errors) -> list:
+        """Проверяет пачку ссылок, включая занятость short в базе.
+
+        Возвращает список, где для корректных элементов стоит None,
+        а для некорректных — ValueError.
+        """
+        results = [None] * len(items)
+        seen = set()
+        for index, (original, short) in enumerate(items):
+            try:
+                URLMap.check(original, short, validate=validate)
+                if short and short in seen:
+                    raise ValueError(ERR_SHORT_EXISTS)
+            except ValueError as exc:
+                if not return_errors:
+                    raise
+                results[index] = exc
+            if short:
+                seen.add(short)
+        existing = URLMap.existing_shorts(
+            short for (_, short), result in zip(items, results)
+            if short and result is None
+        )
+        if existing and not return_errors:
+            raise ValueError(ERR_SHORT_EXISTS)
+        for index, (_, short) in enumerate(items):
+            if results[index] is None and short in existing:
+                results[index] = ValueError(ERR_SHORT_EXISTS)
+        return results
+
+    @staticmethod
+    def _reuse_plan(items, results, remote_paths) -> tuple:
+        """Какие элементы пачки получат уже существующий short.
+
+        Возвращает флаги элементов, для которых допустимо переиспользование,
+        найденные в базе short по original и число short, которые нужно
+        сгенерировать с учётом повторов внутри пачки.
+        """
+        reusable = [
+            result is None and URLMap._reuses_existing(short, remote_path)
+            for (_, short), result, remote_path
+            in zip(items, results, remote_paths)
+        ]
+        reused = URLMap.existing_originals(
+            original for (original, _), reuse in zip(items, reusable) if reuse
+        ) if any(reusable) else {}
+        needed = 0
+        seen = set(reused)
+        for (original, short), result, reuse in zip(items, results, reusable):
+            if short or result is not None or (reuse and original in seen):
+                continue
+            if reuse:
+                seen.add(original)
+            needed += 1
+        return reusable, reused, needed
+
+    @staticmethod
+    def create_many(
+        items,
+        *,
+        validate: bool = True,
+        return_errors: bool = False,
+        remote_paths=None,
+        commit: bool = True
+    ) -> list:
+        """Создаёт пачку ссылок одной вставкой и одним коммитом.
+
+        ``items`` — пары (original, short); short может быть пустым.
+        ``remote_paths`` — пути на Диске для ссылок на файлы в порядке
+        ``items``. Возвращает список несвязанных с сессией объектов URLMap
+        в порядке ``items``. При ``return_errors=True`` вместо объектов для
+        некорректных элементов возвращаются исключения ValueError,
+        остальные элементы сохраняются; иначе первая ошибка прерывает
+        создание всей пачки. При ``commit=False`` строки только
+        вставляются, а коммит остаётся за вызывающим кодом (кроме
+        шардирования, см. ``insert_rows``). При
+        ``URL_REUSE_EXISTING`` уже сокращённые адреса без пользовательского
+        short, в том числе повторы внутри пачки, получают существующий short.
+        """
+        items = list(items)
+        results = URLMap._check_many(items, validate, return_errors)
+        remote_paths = remote_paths or [None] * len(items)
+        reusable, reused, needed = URLMap._reuse_plan(
+            items, results, remote_paths
+        )
+        generated = iter(URLMap.generate_shorts(
+            needed, taken={short for _, short in items if short},
+        ))
+        rows = []
+        for index, (original, short) in enumerate(items):
+            if results[index] is not None:
+                continue
+            if reusable[index] and original in reused:
+                results[index] = URLMap(
+                    original=original, short=reused[original]
+                )
+                continue
+            results[index] = URLMap(
+                original=original,
+                short=short or next(generated),
+                remote_path=remote_paths[index],
+            )
+            if reusable[index]:
+                reused[original] = results[index].short
+            rows.append({
+                "original": original,
+                "short": results[index].short,
+                "remote_path": remote_paths[index],
+            })
+        URLMap.insert_rows(rows, commit=commit)
+        for row in rows:
+            url_cache.delete(row["short"])
+        return results
+
+    @staticmethod
+    def short_url_for(short: str) -> str:
         return url_for(
             REDIRECT_VIEW_NAME,
-            short=self.short,
+            short=short,
             _external=True
         )
+
+    def short_url(self) -> str:
+        return URLMap.short_url_for(self.short)
+
+
+# Собирается один раз: скомпилированная форма берётся из кэша движка.
+SHORT_LOOKUP = select(
+    URLMap.__table__.c.original, URLMap.__table__.c.remote_path
+).where(URLMap.__table__.c.short == bindparam("short"))
+
+
+@event.listens_for(URLMap, "after_insert")
+@event.listens_for(URLMap, "after_update")
+@event.listens_for(URLMap, "after_delete")
+def invalidate_cached_short(mapper, connection, target):
+    """Сбрасывает закэшированные значения для изменённой записи."""
+    url_cache.delete(target.short)
+    for short in inspect(target).attrs.short.history.deleted or ():
+        url_cache.delete(short)
+
+
+@event.listens_for(db.metadata, "after_create")
+@event.listens_for(db.metadata, "after_drop")
+def clear_url_cache(target, connection, **kwargs):
+    """Очищает кэш при пересоздании схемы базы данных."""
+    url_cache.clear()
+
+
+class ShortIdPool(db.Model):
+    """Заранее сгенерированные свободные short."""
+
+    short = db.Column(db.String(SHORT_MAX_LEN), primary_key=True)
+
+    @staticmethod
+    def claim(count: int) -> list:
+        """Забирает из пула до ``count`` short в отдельной транзакции."""
+        table = ShortIdPool.__table__
+        with db.engine.begin() as connection:
+            return list(connection.scalars(
+                delete(table)
+                .where(table.c.short.in_(
+                    select(table.c.short).limit(count).scalar_subquery()
+                ))
+                .returning(table.c.short)
+            ))
+
+    @staticmethod
+    def refill(size: int = None, batch_size: int = None) -> int:
+        """Пополняет пул до ``size`` записей пачками по ``batch_size``.
+
+        Возвращает число добавленных short.
+        """
+        size = size or app.config["SHORT_ID_POOL_SIZE"]
+        batch_size = batch_size or app.config["SHORT_ID_POOL_REFILL_BATCH"]
+        table = ShortIdPool.__table__
+        added = 0
+        missing = size - db.session.scalar(select(func.count(table.c.short)))
+        while missing > 0:
+            shorts = set(URLMap._random_shorts(min(batch_size, missing)))
+            shorts -= set(db.session.scalars(
+                select(table.c.short).where(table.c.short.in_(shorts))
+            ))
+            try:
+                db.session.execute(
+                    insert(table), [{"short": short} for short in shorts]
+                )
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                continue
+            added += len(shorts)
+            missing -= len(shorts)
+        return added
+
+
+def refill_short_id_pool():
+    """Пополняет пул short в контексте приложения."""
+    with app.app_context():
+        ShortIdPool.refill()
+
+
+short_id_pool = PoolAllocator(
+    ShortIdPool.claim,
+    refill_short_id_pool,
+    claim_size=app.config["SHORT_ID_POOL_CLAIM_SIZE"],
+    interval=app.config["SHORT_ID_POOL_REFILL_INTERVAL"],
+    background=app.config["SHORT_ID_POOL_BACKGROUND_REFILL"],
+    logger=app.logger,
+)
+
+
+class UploadJob(db.Model):
+    """Фоновая задача загрузки файлов на Яндекс.Диск."""
+
+    id = db.Column(
+        db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex
+    )
+    status = db.Column(db.String(16), nullable=False, default=JOB_PENDING)
+    timestamp = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    files = db.relationship(
+        "UploadJobFile",
+        order_by="UploadJobFile.position",
+        lazy="selectin",
+        cascade="all, delete-orphan",
+    )
+
+    @staticmethod
+    def create(filenames) -> "UploadJob":
+        """Создаёт задачу с файлами в статусе ожидания."""
+        job = UploadJob(files=[
+            UploadJobFile(position=position, filename=filename)
+            for position, filename in enumerate(filenames)
+        ])
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def finish_file(self, position: int, short=None, error=None) -> None:
+        """Сохраняет итог загрузки файла: short ссылки на него или ошибку."""
+        job_file = self.files[position]
+        if error is None:
+            job_file.short = short
+            job_file.status = JOB_DONE
+        else:
+            job_file.error = error[:UPLOAD_ERROR_MAX_LEN]
+            job_file.status = JOB_FAILED
+        db.session.commit()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "files": [job_file.to_dict() for job_file in self.files],
+        }
+
+
+class UploadJobFile(db.Model):
+    """Файл фоновой задачи загрузки."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(
+        db.String(32), db.ForeignKey("upload_job.id"), nullable=False
+    )
+    position = db.Column(db.Integer, nullable=False)
+    filename = db.Column(db.String(FILENAME_MAX_LEN), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default=JOB_PENDING)
+    error = db.Column(db.String(UPLOAD_ERROR_MAX_LEN))
+    short = db.Column(db.String(SHORT_MAX_LEN))
+
+    def to_dict(self) -> dict:
+        data = {"filename": self.filename, "status": self.status}
+        if self.error:
+            data["message"] = self.error
+        if self.short:
+            data["short_link"] = URLMap.short_url_for(self.short)
+        return data
+
+
+class UploadedFile(db.Model):
+    """Загруженный на Яндекс.Диск файл, адресуемый хэшем содержимого."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(SHA256_HEX_LEN), unique=True, nullable=False)
+    remote_path = db.Column(db.String(ORIGINAL_MAX_LEN), nullable=False)
+    short = db.Column(db.String(SHORT_MAX_LEN), nullable=False)
+    timestamp = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    @staticmethod
+    def find(digests) -> dict:
+        """Возвращает short уже загруженных файлов по хэшам содержимого."""
+        digests = list(set(digests))
+        known = {}
+        for start in range(0, len(digests), BULK_QUERY_CHUNK_SIZE):
+            known.update(db.session.execute(
+                select(UploadedFile.digest, UploadedFile.short).where(
+                    UploadedFile.digest.in_(
+                        digests[start:start + BULK_QUERY_CHUNK_SIZE]
+                    )
+                )
+            ).all())
+        return known
+
+    @staticmethod
+    def remember_many(records) -> None:
+        """Добавляет в сессию тройки (хэш, путь на Диске, short) без коммита.
+
+        Хэши, уже сохранённые параллельным запросом, пропускаются.
+        """
+        rows = [
+            {"digest": digest, "remote_path": remote_path, "short": short}
+            for digest, remote_path, short in records
+        ]
+        if not rows:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(UploadedFile.__table__), rows)
+        except IntegrityError:
+            for row in rows:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(
+                            insert(UploadedFile.__table__), row
+                        )
+                except IntegrityError:
+                    continue
+
+
+def add_counts(table, key_columns, rows) -> None:
+    """Прибавляет ``count`` строк к таблице счётчиков, создавая новые.
+
+    В SQLite и PostgreSQL это один INSERT ... ON CONFLICT DO UPDATE на
+    всю пачку, в остальных базах — UPDATE с INSERT для новых ключей.
+    Коммит остаётся за вызывающим кодом.
+    """
+    upsert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if upsert is not None:
+        statement = upsert(table)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={"count": table.c.count + statement.excluded.count},
+        ), rows)
+        return
+    for row in rows:
+        if not db.session.execute(
+            update(table)
+            .where(*(table.c[key] == row[key] for key in key_columns))
+            .values(count=table.c.count + row["count"])
+        ).rowcount:
+            db.session.execute(insert(table), row)
+
+
+class LinkVisit(db.Model):
+    """Число переходов по короткой ссылке за минуту по источникам."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    short = db.Column(db.String(SHORT_MAX_LEN), nullable=False)
+    minute = db.Column(db.DateTime(timezone=True), nullable=False)
+    referrer = db.Column(
+        db.String(REFERRER_MAX_LEN), nullable=False, default=""
+    )
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint("short", "minute", "referrer"),)
+
+    @staticmethod
+    def add(counts) -> None:
+        """Сохраняет счётчики вида {(short, минута, источник): число}."""
+        add_counts(
+            LinkVisit.__table__,
+            ["short", "minute", "referrer"],
+            [
+                {
+                    "short": short,
+                    "minute": minute,
+                    "referrer": referrer,
+                    "count": count,
+                }
+                for (short, minute, referrer), count in counts.items()
+            ],
+        )
+        LinkStat.add(counts)
+        db.session.commit()
+
+    @staticmethod
+    def summary(short: str, since: datetime) -> dict:
+        """Переходы по ``short`` с момента ``since``.
+
+        Возвращает общее число, разбивку по источникам и по минутам.
+        """
+        table = LinkVisit.__table__
+        condition = (table.c.short == short) & (table.c.minute >= since)
+        referrers = dict(db.session.execute(
+            select(table.c.referrer, func.sum(table.c.count))
+            .where(condition)
+            .group_by(table.c.referrer)
+        ).all())
+        minutes = db.session.execute(
+            select(table.c.minute, func.sum(table.c.count))
+            .where(condition)
+            .group_by(table.c.minute)
+            .order_by(table.c.minute)
+        ).all()
+        return {
+            "total": sum(referrers.values()),
+            "referrers": referrers,
+            "minutes": [
+                {"minute": minute.isoformat(), "count": count}
+                for minute, count in minutes
+            ],
+        }
+
+
+class LinkStat(db.Model):
+    """Переходы по короткой ссылке, сведённые по часам, дням и всего.
+
+    Счётчики пополняются вместе с ``link_visit`` при записи буфера
+    переходов, поэтому чтение статистики не зависит от объёма трафика.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    short = db.Column(db.String(SHORT_MAX_LEN), nullable=False)
+    period = db.Column(db.String(8), nullable=False)
+    bucket = db.Column(db.DateTime(timezone=True), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (db.UniqueConstraint("short", "period", "bucket"),)
+
+    @staticmethod
+    def buckets(minute: datetime):
+        """Пары (период, начало периода), в которые попадает минута."""
+        hour = minute.replace(minute=0, second=0, microsecond=0)
+        return (
+            (STATS_HOUR, hour),
+            (STATS_DAY, hour.replace(hour=0)),
+            (STATS_TOTAL, STATS_EPOCH),
+        )
+
+    @staticmethod
+    def add(counts) -> None:
+        """Добавляет счётчики переходов в сводки без коммита."""
+        totals = {}
+        for (short, minute, _), count in counts.items():
+            for period, bucket in LinkStat.buckets(minute):
+                key = (short, period, bucket)
+                totals[key] = totals.get(key, 0) + count
+        add_counts(
+            LinkStat.__table__,
+            ["short", "period", "bucket"],
+            [
+                {
+                    "short": short,
+                    "period": period,
+                    "bucket": bucket,
+                    "count": count,
+                }
+                for (short, period, bucket), count in totals.items()
+            ],
+        )
+
+    @staticmethod
+    def series(short: str, period: str, since: datetime) -> list:
+        """Счётчики ``short`` за периоды начиная с ``since``."""
+        table = LinkStat.__table__
+        return [
+            {"start": bucket.isoformat(), "count": count}
+            for bucket, count in db.session.execute(
+                select(table.c.bucket, table.c.count)
+                .where(
+                    (table.c.short == short)
+                    & (table.c.period == period)
+                    & (table.c.bucket >= since)
+                )
+                .order_by(table.c.bucket)
+            )
+        ]
+
+    @staticmethod
+    def total(short: str) -> int:
+        table = LinkStat.__table__
+        return db.session.scalar(
+            select(table.c.count).where(
+                (table.c.short == short)
+                & (table.c.period == STATS_TOTAL)
+                & (table.c.bucket == STATS_EPOCH)
+            )
+        ) or 0
+
+
+def flush_visits(counts):
+    """Записывает счётчики переходов в контексте приложения."""
+    with app.app_context():
+        LinkVisit.add(counts)
+
+
+visit_recorder = VisitRecorder(
+    flush_visits,
+    max_keys=app.config["ANALYTICS_MAX_KEYS"],
+    interval=app.config["ANALYTICS_FLUSH_INTERVAL"],
+    background=app.config["ANALYTICS_BACKGROUND_FLUSH"],
+    logger=app.logger,
+)
+atexit.register(visit_recorder.flush_now)
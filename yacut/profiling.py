@@ -0,0 +1,111 @@
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+SLOW_QUERY = "Медленный SQL-запрос ({duration:.1f} мс): {statement}\n{plan}"
+PLAN_UNAVAILABLE = "План запроса недоступен: {error}"
+QUERY_BUDGET_EXCEEDED = (
+    "Запрос {method} {path} выполнил {count} SQL-запросов "
+    "при бюджете {budget}"
+)
+REPEATED_QUERY = (
+    "Возможная проблема N+1 в {method} {path}: запрос выполнен "
+    "{count} раз: {statement}"
+)
+QUERY_COUNT_HEADER = "X-Query-Count"
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN "}
+EXPLAINED_OPERATIONS = ("SELECT", "UPDATE", "DELETE")
+
+
+def explain(connection, statement, parameters) -> str:
+    """Возвращает план запроса, не затрагивая курсор исходного запроса."""
+    prefix = EXPLAIN_PREFIXES.get(connection.dialect.name, "EXPLAIN ")
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(
+            " ".join(str(column) for column in row)
+            for row in cursor.fetchall()
+        )
+    except Exception as exc:
+        return PLAN_UNAVAILABLE.format(error=exc)
+    finally:
+        cursor.close()
+
+
+class QueryProfiler:
+    """Профилирование SQL-запросов приложения.
+
+    Включается настройкой ``SQL_PROFILING``. Запросы дольше
+    ``SQL_SLOW_QUERY_THRESHOLD`` секунд пишутся в лог вместе с планом,
+    а HTTP-запросы, превысившие ``SQL_QUERY_BUDGET`` запросов к базе или
+    повторившие один запрос ``SQL_REPEAT_THRESHOLD`` раз (признак N+1),
+    отмечаются предупреждением.
+    """
+
+    def __init__(self, app, engine):
+        self.app = app
+        event.listen(engine, "before_cursor_execute", self.before_execute)
+        event.listen(engine, "after_cursor_execute", self.after_execute)
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    @property
+    def enabled(self) -> bool:
+        return self.app.config["SQL_PROFILING"]
+
+    def before_execute(self, conn, cursor, statement, parameters, context,
+                       executemany):
+        if self.enabled:
+            conn.info["profile_started"] = time.perf_counter()
+
+    def after_execute(self, conn, cursor, statement, parameters, context,
+                      executemany):
+        started = conn.info.pop("profile_started", None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        if has_request_context() and "profile_queries" in g:
+            g.profile_queries[statement] += 1
+        if duration < self.app.config["SQL_SLOW_QUERY_THRESHOLD"]:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper()
+        plan = ""
+        if not executemany and operation in EXPLAINED_OPERATIONS:
+            plan = explain(conn, statement, parameters)
+        self.app.logger.warning(SLOW_QUERY.format(
+            duration=duration * 1000, statement=statement, plan=plan
+        ))
+
+    def before_request(self):
+        if self.enabled:
+            g.profile_queries = Counter()
+
+    def after_request(self, response):
+        queries = g.pop("profile_queries", None)
+        if queries is None:
+            return response
+        count = sum(queries.values())
+        response.headers[QUERY_COUNT_HEADER] = str(count)
+        budget = self.app.config["SQL_QUERY_BUDGET"]
+        if count > budget:
+            self.app.logger.warning(QUERY_BUDGET_EXCEEDED.format(
+                method=request.method, path=request.path, count=count,
+                budget=budget,
+            ))
+        for statement, repeats in queries.most_common():
+            if repeats < self.app.config["SQL_REPEAT_THRESHOLD"]:
+                break
+            self.app.logger.warning(REPEATED_QUERY.format(
+                method=request.method, path=request.path, count=repeats,
+                statement=statement,
+            ))
+        return response
+
+
+def init_profiling(app, db) -> QueryProfiler:
+    """Подключает профилирование SQL к движку ``db`` приложения."""
+    with app.app_context():
+        return QueryProfiler(app, db.engine)
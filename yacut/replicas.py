@@ -0,0 +1,154 @@
+import itertools
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+REPLICA_BIND_PREFIX = "replica_"
+REPLICA_FAILED = (
+    "Реплика {name} недоступна, повтор через {interval} с: {error}"
+)
+REPLICA_RESTORED = "Реплика {name} снова доступна"
+# Нет доступной реплики: запрос нужно выполнить на основной базе.
+MISSING_REPLICA = object()
+
+
+def replica_binds(config) -> dict:
+    """Привязки Flask-SQLAlchemy для реплик из ``DATABASE_REPLICA_URIS``."""
+    uris = [
+        uri.strip() for uri in config["DATABASE_REPLICA_URIS"].split(",")
+        if uri.strip()
+    ]
+    return {
+        f"{REPLICA_BIND_PREFIX}{index}": uri for index, uri in enumerate(uris)
+    }
+
+
+class ReplicaRouter:
+    """Выбор реплики для запросов только на чтение.
+
+    Реплики перебираются по кругу. Реплика, на которой запрос упал с
+    ошибкой драйвера, исключается на ``retry_interval`` секунд, после чего
+    возвращается в ротацию, только если отвечает на ``SELECT 1``. Когда
+    доступных реплик нет, ``first`` возвращает ``MISSING_REPLICA``, и
+    вызывающий код читает с основной базы.
+    """
+
+    def __init__(self, engines, retry_interval=30.0, logger=None):
+        self.engines = list(engines)
+        self.retry_interval = retry_interval
+        self.logger = logger
+        self._down_until = {}
+        self._order = itertools.cycle(range(len(self.engines)))
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def _name(self, engine) -> str:
+        return engine.url.render_as_string(hide_password=True)
+
+    def _status(self, engine):
+        """True — в ротации, False — исключена, None — пора проверить."""
+        with self._lock:
+            down_until = self._down_until.get(engine)
+        if down_until is None:
+            return True
+        if time.monotonic() < down_until:
+            return False
+        return None
+
+    def _is_up(self, engine) -> bool:
+        status = self._status(engine)
+        return self.probe(engine) if status is None else status
+
+    def _restore(self, engine) -> None:
+        with self._lock:
+            self._down_until.pop(engine, None)
+        if self.logger is not None:
+            self.logger.info(REPLICA_RESTORED.format(name=self._name(engine)))
+
+    def probe(self, engine) -> bool:
+        """Проверяет реплику запросом ``SELECT 1``."""
+        try:
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except DBAPIError as exc:
+            self.mark_down(engine, exc)
+            return False
+        self._restore(engine)
+        return True
+
+    def mark_down(self, engine, error=None):
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_interval
+        if self.logger is not None:
+            self.logger.warning(REPLICA_FAILED.format(
+                name=self._name(engine), interval=self.retry_interval,
+                error=error,
+            ))
+
+    def _ring(self) -> list:
+        """Все реплики, начиная со следующей по кругу."""
+        with self._lock:
+            start = next(self._order) if self.engines else 0
+        return self.engines[start:] + self.engines[:start]
+
+    def candidates(self):
+        """Доступные реплики, начиная со следующей по кругу."""
+        for engine in self._ring():
+            if self._is_up(engine):
+                yield engine
+
+    def first(self, statement, parameters=None):
+        """Первая строка результата с реплики или ``MISSING_REPLICA``."""
+        for engine in self.candidates():
+            try:
+                with engine.connect() as connection:
+                    return connection.execute(statement, parameters).first()
+            except DBAPIError as exc:
+                self.mark_down(engine, exc)
+        return MISSING_REPLICA
+
+
+class AsyncReplicaRouter(ReplicaRouter):
+    """``ReplicaRouter`` для асинхронных движков ASGI-приложения."""
+
+    async def probe(self, engine) -> bool:
+        """Проверяет реплику запросом ``SELECT 1``."""
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        except DBAPIError as exc:
+            self.mark_down(engine, exc)
+            return False
+        self._restore(engine)
+        return True
+
+    async def first(self, statement, parameters=None):
+        """Первая строка результата с реплики или ``MISSING_REPLICA``."""
+        for engine in self._ring():
+            status = self._status(engine)
+            if status is None:
+                status = await self.probe(engine)
+            if not status:
+                continue
+            try:
+                async with engine.connect() as connection:
+                    return (
+                        await connection.execute(statement, parameters)
+                    ).first()
+            except DBAPIError as exc:
+                self.mark_down(engine, exc)
+        return MISSING_REPLICA
+
+
+def init_replicas(app, db) -> ReplicaRouter:
+    """Маршрутизатор по репликам из привязок приложения."""
+    with app.app_context():
+        return ReplicaRouter(
+            [db.engines[key] for key in replica_binds(app.config)],
+            retry_interval=app.config["REPLICA_RETRY_INTERVAL"],
+            logger=app.logger,
+        )
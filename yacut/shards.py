@@ -0,0 +1,195 @@
+import hashlib
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+SHARD_BIND_PREFIX = "shard_"
+ERR_SHARD_PREVIOUS_COUNT = (
+    "SHARD_PREVIOUS_COUNT должно быть меньше числа шардов: {previous} >= "
+    "{count}"
+)
+
+
+def shard_binds(config) -> dict:
+    """Привязки Flask-SQLAlchemy для шардов из ``DATABASE_SHARD_URIS``."""
+    uris = [
+        uri.strip() for uri in config["DATABASE_SHARD_URIS"].split(",")
+        if uri.strip()
+    ]
+    return {
+        f"{SHARD_BIND_PREFIX}{index}": uri for index, uri in enumerate(uris)
+    }
+
+
+def shard_key(short: str) -> int:
+    """Стабильный между процессами 64-битный хэш short."""
+    return int.from_bytes(
+        hashlib.blake2b(short.encode(), digest_size=8).digest(), "big"
+    )
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping, Veach): номер корзины для ``key``.
+
+    При добавлении корзины в конец переезжает только 1/N ключей, и все
+    они переезжают в новую корзину.
+    """
+    index, candidate = -1, 0
+    while candidate < buckets:
+        index = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((index + 1) * (1 << 31) / ((key >> 33) + 1))
+    return index
+
+
+class ShardRouter:
+    """Размещение строк по шардам по хэшу short.
+
+    Шард выбирается jump consistent hash, поэтому новые шарды добавляются
+    только в конец списка. Пока строки после добавления шардов не
+    перенесены командой ``flask rebalance-shards``, ``previous_count``
+    задаёт прежнее число шардов: чтение и проверка занятости short
+    смотрят и в прежний шард, а запись идёт только в новый.
+    """
+
+    def __init__(self, engines, previous_count=0):
+        self.engines = list(engines)
+        if previous_count >= len(self.engines) > 0:
+            raise ValueError(ERR_SHARD_PREVIOUS_COUNT.format(
+                previous=previous_count, count=len(self.engines)
+            ))
+        self.previous_count = previous_count
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def index(self, short: str) -> int:
+        """Номер шарда, в который пишется ``short``."""
+        return jump_hash(shard_key(short), len(self.engines))
+
+    def read_indexes(self, short: str) -> list:
+        """Шарды, в которых может лежать ``short``, в порядке проверки."""
+        indexes = [self.index(short)]
+        if self.previous_count:
+            previous = jump_hash(shard_key(short), self.previous_count)
+            if previous != indexes[0]:
+                indexes.append(previous)
+        return indexes
+
+    def group(self, shorts, *, read: bool = False) -> dict:
+        """Раскладывает short по номерам шардов с сохранением порядка.
+
+        С ``read`` short попадает во все шарды из ``read_indexes``.
+        """
+        groups = {}
+        for short in shorts:
+            indexes = self.read_indexes(short) if read else [self.index(short)]
+            for index in indexes:
+                groups.setdefault(index, []).append(short)
+        return groups
+
+    def first(self, short: str, statement, parameters=None):
+        """Первая строка результата из шардов, где может лежать short."""
+        for index in self.read_indexes(short):
+            with self.engines[index].connect() as connection:
+                row = connection.execute(statement, parameters).first()
+            if row is not None:
+                return row
+        return None
+
+    def insert(self, table, rows) -> None:
+        """Вставляет строки ``table`` в их шарды, по транзакции на шард.
+
+        Шарды независимы: при ошибке в одном из них строки, уже
+        вставленные в другие, остаются.
+        """
+        groups = {}
+        for row in rows:
+            groups.setdefault(self.index(row["short"]), []).append(row)
+        for index, shard_rows in groups.items():
+            with self.engines[index].begin() as connection:
+                connection.execute(insert(table), shard_rows)
+
+    def create_all(self, metadata, tables) -> None:
+        """Создаёт недостающие таблицы ``tables`` во всех шардах."""
+        for engine in self.engines:
+            metadata.create_all(engine, tables=tables)
+
+    def count(self, table) -> int:
+        """Общее число строк ``table`` во всех шардах."""
+        total = 0
+        for engine in self.engines:
+            with engine.connect() as connection:
+                total += connection.scalar(
+                    select(func.count()).select_from(table)
+                )
+        return total
+
+    def _copy(self, index, table, rows) -> None:
+        """Копирует строки в шард; уже скопированные short пропускаются."""
+        engine = self.engines[index]
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(table), rows)
+        except IntegrityError:
+            for row in rows:
+                try:
+                    with engine.begin() as connection:
+                        connection.execute(insert(table), row)
+                except IntegrityError:
+                    continue
+
+    def _rebalance_batch(self, index, table, rows) -> int:
+        """Переносит строки пачки, лежащие не в своём шарде."""
+        moves = {}
+        for row in rows:
+            target = self.index(row["short"])
+            if target != index:
+                moves.setdefault(target, []).append(row)
+        for target, moved in moves.items():
+            self._copy(target, table, [
+                {key: value for key, value in row.items() if key != "id"}
+                for row in moved
+            ])
+        ids = [row["id"] for moved in moves.values() for row in moved]
+        if ids:
+            with self.engines[index].begin() as connection:
+                connection.execute(delete(table).where(table.c.id.in_(ids)))
+        return len(ids)
+
+    def rebalance(self, table, batch_size: int, on_batch=None) -> int:
+        """Переносит строки ``table`` в шарды, которые им положены.
+
+        Каждый шард читается пачками по первичному ключу. Строки сначала
+        копируются в целевой шард и только потом удаляются из исходного,
+        так что прерванный перенос можно безопасно запустить заново.
+        После каждой пачки вызывается ``on_batch`` с числом прочитанных
+        строк. Возвращает число перенесённых строк.
+        """
+        moved = 0
+        for index, engine in enumerate(self.engines):
+            last_id = 0
+            while True:
+                with engine.connect() as connection:
+                    rows = connection.execute(
+                        select(table)
+                        .where(table.c.id > last_id)
+                        .order_by(table.c.id)
+                        .limit(batch_size)
+                    ).mappings().all()
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+                moved += self._rebalance_batch(index, table, rows)
+                if on_batch is not None:
+                    on_batch(len(rows))
+        return moved
+
+
+def init_shards(app, db) -> ShardRouter:
+    """Маршрутизатор по шардам из привязок приложения."""
+    with app.app_context():
+        return ShardRouter(
+            [db.engines[key] for key in shard_binds(app.config)],
+            previous_count=app.config["SHARD_PREVIOUS_COUNT"],
+        )
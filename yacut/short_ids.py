@@ -0,0 +1,184 @@
+import hashlib
+import os
+import threading
+from collections import deque
+
+from yacut.constants import SHORT_ALPHABET, SHORT_LENGTH
+
+ID_SPACE = len(SHORT_ALPHABET) ** SHORT_LENGTH
+FEISTEL_HALF_BITS = ((ID_SPACE - 1).bit_length() + 1) // 2
+FEISTEL_HALF_MASK = (1 << FEISTEL_HALF_BITS) - 1
+FEISTEL_ROUNDS = 4
+
+ERR_ID_SPACE_EXHAUSTED = "Пространство коротких идентификаторов исчерпано"
+ERR_POOL_REFILL = "Не удалось пополнить пул коротких идентификаторов"
+ERR_NO_SECRET = (
+    "Для стратегии sequence задайте SHORT_ID_SECRET или SECRET_KEY: без "
+    "ключа идентификаторы можно угадать"
+)
+
+
+def sequence_key(secret: str) -> bytes:
+    """Ключ перемешивания из секрета произвольной длины.
+
+    blake2b принимает ключ не длиннее 64 байт, поэтому используется
+    SHA-256 секрета. Для пустого секрета возвращается пустой ключ.
+    """
+    if not secret:
+        return b""
+    return hashlib.sha256(secret.encode()).digest()
+
+
+def _round(value: int, round_number: int, key: bytes) -> int:
+    digest = hashlib.blake2b(
+        value.to_bytes(8, "big") + bytes([round_number]),
+        key=key,
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "big") & FEISTEL_HALF_MASK
+
+
+def scramble(number: int, key: bytes) -> int:
+    """Биективно перемешивает номер в пределах ``ID_SPACE``.
+
+    Сеть Фейстеля работает на чётном числе бит, а значения за пределами
+    пространства идентификаторов пропускаются повторным шифрованием
+    (cycle walking), поэтому разные номера дают разные результаты.
+    """
+    if not 0 <= number < ID_SPACE:
+        raise RuntimeError(ERR_ID_SPACE_EXHAUSTED)
+    while True:
+        left = number >> FEISTEL_HALF_BITS
+        right = number & FEISTEL_HALF_MASK
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ _round(right, round_number, key)
+        number = (left << FEISTEL_HALF_BITS) | right
+        if number < ID_SPACE:
+            return number
+
+
+def encode(number: int) -> str:
+    """Кодирует число в short фиксированной длины из ``SHORT_ALPHABET``."""
+    base = len(SHORT_ALPHABET)
+    chars = []
+    for _ in range(SHORT_LENGTH):
+        number, index = divmod(number, base)
+        chars.append(SHORT_ALPHABET[index])
+    return "".join(reversed(chars))
+
+
+class SequenceAllocator:
+    """Выдаёт short по счётчику, резервируя номера блоками.
+
+    ``reserve(size)`` атомарно сдвигает общий счётчик в базе и возвращает
+    начало зарезервированного диапазона. Пока блок не исчерпан, воркер
+    выдаёт идентификаторы без обращений к базе. Без ключа перемешивания
+    номера предсказуемы, поэтому ``shorts`` отказывается их выдавать.
+    """
+
+    def __init__(self, reserve, key: bytes, block_size: int = 1000):
+        self.reserve = reserve
+        self.key = key
+        self.block_size = block_size
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+
+    def numbers(self, count: int) -> list:
+        """Возвращает ``count`` ещё не выданных номеров."""
+        numbers = []
+        with self._lock:
+            while len(numbers) < count:
+                if self._next >= self._end:
+                    size = max(self.block_size, count - len(numbers))
+                    self._next = self.reserve(size)
+                    self._end = self._next + size
+                take = min(count - len(numbers), self._end - self._next)
+                numbers.extend(range(self._next, self._next + take))
+                self._next += take
+        return numbers
+
+    def shorts(self, count: int) -> list:
+        """Возвращает ``count`` уникальных short."""
+        if not self.key:
+            raise RuntimeError(ERR_NO_SECRET)
+        return [
+            encode(scramble(number, self.key))
+            for number in self.numbers(count)
+        ]
+
+
+class PoolAllocator:
+    """Выдаёт short из заранее подготовленного пула.
+
+    ``claim(count)`` забирает из общего пула в базе до ``count`` short,
+    которые затем выдаются из локального буфера за O(1). ``refill()``
+    пополняет общий пул и вызывается в фоновом потоке раз в
+    ``interval`` секунд, а также сразу, если пул оказался пуст. После
+    fork буфер родителя отбрасывается, чтобы одни и те же short не
+    выдавались несколькими воркерами.
+    """
+
+    def __init__(self, claim, refill, claim_size=100, interval=30.0,
+                 background=True, logger=None):
+        self.claim = claim
+        self.refill = refill
+        self.claim_size = claim_size
+        self.interval = interval
+        self.background = background
+        self.logger = logger
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _forget_parent(self):
+        """Сбрасывает буфер и поток, унаследованные от родителя при fork.
+
+        Вызывается под ``_lock``.
+        """
+        if self._pid != os.getpid():
+            self._buffer.clear()
+            self._thread = None
+            self._pid = os.getpid()
+
+    def shorts(self, count: int) -> list:
+        """Возвращает до ``count`` short; меньше — если пул исчерпан."""
+        self.start()
+        with self._lock:
+            self._forget_parent()
+            if len(self._buffer) < count:
+                self._buffer.extend(self.claim(
+                    max(self.claim_size, count - len(self._buffer))
+                ))
+            shorts = [
+                self._buffer.popleft()
+                for _ in range(min(count, len(self._buffer)))
+            ]
+        if len(shorts) < count:
+            self._wakeup.set()
+        return shorts
+
+    def start(self):
+        """Запускает фоновое пополнение пула, если оно ещё не запущено."""
+        if not self.background or (
+            self._thread is not None and self._pid == os.getpid()
+        ):
+            return
+        with self._lock:
+            self._forget_parent()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="short-id-pool", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refill()
+            except Exception:
+                if self.logger is not None:
+                    self.logger.exception(ERR_POOL_REFILL)
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
@@ -0,0 +1,80 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Режимы, которые PRAGMA принимает только как ключевые слова.
+JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+ERR_PRAGMA_VALUE = "Недопустимое значение {name} для SQLite: {value}"
+
+
+def is_sqlite(uri) -> bool:
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def is_memory(uri) -> bool:
+    return make_url(uri).database in (None, "", ":memory:")
+
+
+def sqlite_pragmas(config, uri=None) -> dict:
+    """PRAGMA профиля производительности SQLite из настроек.
+
+    WAL позволяет читателям не ждать коммитов писателя, а
+    ``synchronous=NORMAL`` в режиме WAL синхронизирует диск только на
+    контрольных точках. Для базы в памяти журнал и mmap не настраиваются.
+    ``uri`` — адрес базы, если он отличается от ``SQLALCHEMY_DATABASE_URI``.
+    """
+    if not config["SQLITE_TUNING"]:
+        return {}
+    journal_mode = config["SQLITE_JOURNAL_MODE"].upper()
+    synchronous = config["SQLITE_SYNCHRONOUS"].upper()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(ERR_PRAGMA_VALUE.format(
+            name="SQLITE_JOURNAL_MODE", value=journal_mode
+        ))
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(ERR_PRAGMA_VALUE.format(
+            name="SQLITE_SYNCHRONOUS", value=synchronous
+        ))
+    pragmas = {
+        "busy_timeout": int(config["SQLITE_BUSY_TIMEOUT"]),
+        "cache_size": int(config["SQLITE_CACHE_SIZE"]),
+        "synchronous": synchronous,
+    }
+    if not is_memory(uri or config["SQLALCHEMY_DATABASE_URI"]):
+        pragmas["journal_mode"] = journal_mode
+        pragmas["mmap_size"] = int(config["SQLITE_MMAP_SIZE"])
+    return pragmas
+
+
+def sqlite_engine_options(config) -> dict:
+    """Параметры движка для ``SQLALCHEMY_ENGINE_OPTIONS``.
+
+    Таймаут драйвера согласован с ``busy_timeout``: занятая база
+    ожидается, а не сразу отвечает ``database is locked``.
+    """
+    if not config["SQLITE_TUNING"]:
+        return {}
+    return {
+        "connect_args": {"timeout": config["SQLITE_BUSY_TIMEOUT"] / 1000},
+    }
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Выполняет PRAGMA на новом соединении."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def init_sqlite_profile(engine, pragmas):
+    """Применяет ``pragmas`` к каждому новому соединению ``engine``."""
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    event.listen(engine, "connect", on_connect)
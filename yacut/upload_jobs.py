@@ -0,0 +1,111 @@
+import asyncio
+import shutil
+from tempfile import SpooledTemporaryFile
+
+from werkzeug.datastructures import FileStorage
+
+from yacut import app, db
+from yacut.async_upload import upload_files, upload_loop
+from yacut.constants import JOB_DONE, JOB_FAILED, JOB_RUNNING
+from yacut.file_links import (
+    find_known,
+    link_uploaded,
+    remote_path_for,
+    upload_keys,
+)
+from yacut.models import UploadJob
+
+ERR_JOB_FAILED = "Задача загрузки {job_id} завершилась с ошибкой"
+
+running_jobs = {}
+
+
+def spool_file(file_obj):
+    """Копирует загруженный файл: поток запроса закроется раньше задачи."""
+    stream = SpooledTemporaryFile(
+        max_size=app.config["UPLOAD_SPOOL_MAX_SIZE"], mode="w+b"
+    )
+    file_obj.stream.seek(0)
+    shutil.copyfileobj(file_obj.stream, stream)
+    return FileStorage(stream, file_obj.filename)
+
+
+def update_job(job_id, status=None, upload=None, result=None):
+    """Обновляет задачу в контексте приложения из потока исполнителя.
+
+    ``upload`` — тройка (позиции, ключ, файл) с итогом ``result``.
+    """
+    with app.app_context():
+        job = db.session.get(UploadJob, job_id)
+        if result is not None:
+            positions, key, _ = upload
+            if result.ok:
+                short = link_uploaded(key, result)
+                for position in positions:
+                    job.finish_file(position, short=short)
+            else:
+                for position in positions:
+                    job.finish_file(position, error=result.error)
+        if status is not None:
+            job.status = status
+            db.session.commit()
+
+
+async def run_upload_job(job_id, uploads):
+    """Загружает файлы задачи, сохраняя итог каждого файла по готовности.
+
+    ``uploads`` — тройки (позиции в задаче, ключ, копия файла); файл
+    с одинаковым содержимым загружается один раз на все свои позиции.
+    """
+    loop = asyncio.get_running_loop()
+    # Итоги одной задачи пишутся по очереди: ссылка и запись о файле
+    # сохраняются одной транзакцией и не должны перемежаться.
+    lock = asyncio.Lock()
+
+    async def on_result(index, result):
+        async with lock:
+            await loop.run_in_executor(
+                None, update_job, job_id, None, uploads[index], result
+            )
+
+    try:
+        await loop.run_in_executor(None, update_job, job_id, JOB_RUNNING)
+        await upload_files(
+            [file_obj for _, _, file_obj in uploads],
+            await upload_loop.session(),
+            on_result,
+            [remote_path_for(key, file_obj) for _, key, file_obj in uploads],
+            upload_loop.semaphore(),
+        )
+        await loop.run_in_executor(None, update_job, job_id, JOB_DONE)
+    except Exception:
+        app.logger.exception(ERR_JOB_FAILED.format(job_id=job_id))
+        await loop.run_in_executor(None, update_job, job_id, JOB_FAILED)
+    finally:
+        for _, _, file_obj in uploads:
+            file_obj.close()
+
+
+def start_upload_job(files) -> UploadJob:
+    """Создаёт задачу загрузки и запускает её в фоновом цикле воркера.
+
+    Уже загруженные ранее файлы отмечаются готовыми сразу, одинаковые
+    файлы внутри задачи загружаются один раз.
+    """
+    keys = upload_keys(files)
+    known = find_known(keys)
+    job = UploadJob.create(file_obj.filename for file_obj in files)
+    job_id = job.id
+    pending = {}
+    for position, (key, file_obj) in enumerate(zip(keys, files)):
+        if key in known:
+            job.finish_file(position, short=known[key])
+        else:
+            pending.setdefault(key, ([], file_obj))[0].append(position)
+    future = upload_loop.submit(run_upload_job(job_id, [
+        (positions, key, spool_file(file_obj))
+        for key, (positions, file_obj) in pending.items()
+    ]))
+    running_jobs[job_id] = future
+    future.add_done_callback(lambda _: running_jobs.pop(job_id, None))
+    return job
@@ -1,9 +1,21 @@
-from flask import flash, redirect, render_template
+from http import HTTPStatus
+
+from flask import (
+    Response,
+    abort,
+    flash,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 
 from yacut import app
-from yacut.async_upload import upload_files_sync
+from yacut.file_links import upload_file_links
 from yacut.forms import FilesForm, URLForm
-from yacut.models import URLMap
+from yacut.metrics import CONTENT_TYPE, registry
+from yacut.models import URLMap, visit_recorder
+from yacut.upload_jobs import start_upload_job
 
 
 @app.route("/", methods=["GET", "POST"])
@@ -32,7 +44,10 @@ def index():
 @app.route("/<string:short>")
 def redirect_short(short):
     """Перенаправление по короткой ссылке на оригинальный адрес."""
-    return redirect(URLMap.get_or_404(short).original)
+    mapping = URLMap.get_or_404(short, replica=True)
+    if app.config["ANALYTICS_ENABLED"]:
+        visit_recorder.record(short, request.referrer)
+    return redirect(mapping.destination())
 
 
 @app.route("/files", methods=["GET", "POST"])
@@ -43,29 +58,43 @@ def files():
     if not form.validate_on_submit():
         return render_template("files.html", form=form)
 
-    try:
-        uploaded_file_urls = upload_files_sync(form.files.data)
-    except Exception as exc:
-        flash(str(exc), "danger")
-        return render_template("files.html", form=form)
-
-    try:
+    if app.config["UPLOAD_BACKGROUND_JOBS"]:
+        job = start_upload_job(form.files.data)
         return render_template(
             "files.html",
             form=form,
-            uploaded_files=[
-                {
-                    "filename": uploaded_file.filename,
-                    "url": uploaded_url,
-                    "short_url": URLMap.create(
-                        original=uploaded_url
-                    ).short_url(),
-                }
-                for uploaded_file, uploaded_url in zip(
-                    form.files.data, uploaded_file_urls
-                )
-            ],
+            job_url=url_for(
+                "api_get_upload_job", job_id=job.id, _external=True
+            ),
         )
-    except ValueError as exc:
+
+    try:
+        links = upload_file_links(form.files.data)
+    except Exception as exc:
         flash(str(exc), "danger")
         return render_template("files.html", form=form)
+
+    for link in links:
+        if "error" in link:
+            flash(link["error"], "danger")
+
+    return render_template(
+        "files.html",
+        form=form,
+        uploaded_files=[
+            {
+                "filename": link["filename"],
+                "short_url": URLMap.short_url_for(link["short"]),
+            }
+            for link in links
+            if "short" in link
+        ],
+    )
+
+
+@app.route("/metrics")
+def metrics():
+    """Метрики процесса в текстовом формате Prometheus."""
+    if not app.config["METRICS_ENABLED"]:
+        abort(HTTPStatus.NOT_FOUND)
+    return Response(registry.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,19 @@
+from tempfile import SpooledTemporaryFile
+
+from flask import Request, current_app
+
+
+class SpooledRequest(Request):
+    """Запрос, хранящий загружаемые файлы в памяти только до порога.
+
+    Файлы крупнее ``UPLOAD_SPOOL_MAX_SIZE`` сбрасываются во временный
+    файл на диске, поэтому память на загрузку не зависит от её размера.
+    """
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None,
+        content_length=None
+    ):
+        return SpooledTemporaryFile(
+            max_size=current_app.config["UPLOAD_SPOOL_MAX_SIZE"], mode="rb+"
+        )